@@ -0,0 +1,84 @@
+"""Per-request overhead of the local bridge server, single-request loop vs threaded keep-alive.
+
+Plays the interpreter (GET a command, POST its response) for a number of
+commands while background threads POST device telemetry at the same server, and
+reports the mean command round trip seen from Python.
+
+    python benchmarks/bridge_server.py [--commands 500] [--telemetry-threads 2]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from os.path import abspath, dirname
+from threading import Event, Thread
+
+import requests
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonServerThread
+
+RESPONSE = '{{"command": "STAR-return", "step-name": "command-1", "step-return1": 1, "id": "{}" }}'
+TELEMETRY = '{"command": "telemetry", "step-return1": 1}'
+
+
+def interpreter(url, stop, session):
+    get = session.get if session else requests.get
+    post = session.post if session else requests.post
+    while not stop.is_set():
+        cmd = get(url).text
+        if cmd:
+            post(url, data=RESPONSE.format(json.loads(cmd)['id']))
+
+
+def telemetry(url, stop, session):
+    post = session.post if session else requests.post
+    while not stop.is_set():
+        post(url, data=TELEMETRY)
+
+
+def run(port, threaded, n_commands, n_telemetry):
+    server_thread = HamiltonServerThread('127.0.0.1', port, threaded=threaded)
+    server_thread.start()
+    time.sleep(0.2)
+    url = 'http://127.0.0.1:{}'.format(port)
+    stop = Event()
+    # keep-alive only pays off if the client reuses its connection
+    new_session = requests.Session if threaded else (lambda: None)
+    workers = [Thread(target=interpreter, args=(url, stop, new_session()), daemon=True)]
+    workers += [Thread(target=telemetry, args=(url, stop, new_session()), daemon=True) for _ in range(n_telemetry)]
+    for worker in workers:
+        worker.start()
+
+    round_trips = []
+    for i in range(n_commands):
+        cmd_id = 'bench-{}-{}'.format(port, i)
+        start = time.perf_counter()
+        server_thread.bridge.send_str(json.dumps({'command': 'ping', 'id': cmd_id}), cmd_id)
+        server_thread.bridge.response_event(cmd_id).wait(10)
+        round_trips.append(time.perf_counter() - start)
+        server_thread.bridge.pop_response(cmd_id)
+
+    stop.set()
+    server_thread.should_continue = False
+    server_thread.join(timeout=2)
+    return round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=500)
+    parser.add_argument('--telemetry-threads', type=int, default=2)
+    args = parser.parse_args()
+
+    for label, port, threaded in (('single-request loop', 3251, False), ('threaded keep-alive', 3252, True)):
+        round_trips = run(port, threaded, args.commands, args.telemetry_threads)
+        print('{:<20} mean {:7.3f} ms   median {:7.3f} ms   p95 {:7.3f} ms'.format(
+            label, 1000 * statistics.mean(round_trips), 1000 * statistics.median(round_trips),
+            1000 * sorted(round_trips)[int(0.95 * len(round_trips))]))
+
+
+if __name__ == '__main__':
+    main()
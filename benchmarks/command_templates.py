@@ -0,0 +1,57 @@
+"""Microbenchmark of building command JSON from HamiltonCmdTemplate, previous vs compiled path.
+
+`legacy` is the previous `assemble_cmd` (defaults copied, two key sets built and
+compared on every call) followed by `json.dumps`, kept below as `legacy_assemble`.
+`assemble_cmd` is the current dict path with precomputed key sets, and
+`serialize_cmd` splices pre-serialized defaults straight into the JSON string.
+Cases are an 8-channel aspirate as sent by `pip_transfer` and an HHS temperature
+poll.
+
+    python benchmarks/command_templates.py [--rounds 20000]
+"""
+import argparse
+import json
+import sys
+import timeit
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonCmdTemplate, ASPIRATE, HHS_GET_TEMP
+
+CASES = {
+    'aspirate': (ASPIRATE, dict(
+        channelVariable='11111111' + '0' * 8,
+        labwarePositions=';'.join('Cos_96_DW_1mL_0001, ' + well for well in 'A1 B1 C1 D1 E1 F1 G1 H1'.split()),
+        volumes=[25.0] * 8, liquidClass='HighVolume_Water_DispenseJet_Empty')),
+    'hhs_poll': (HHS_GET_TEMP, dict(deviceNumber=1)),
+}
+
+
+def legacy_assemble(template, **kwargs):
+    """Equivalent of the previous HamiltonCmdTemplate.assemble_cmd."""
+    assembled_cmd = {'command': template.cmd_name, 'id': HamiltonCmdTemplate.unique_id()}
+    assembled_cmd.update(template.defaults)
+    assembled_cmd.update(kwargs)
+    template.assert_valid_cmd(assembled_cmd)
+    return assembled_cmd
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20000)
+    args = parser.parse_args()
+
+    paths = (('legacy', lambda t, kw: json.dumps(legacy_assemble(t, **kw))),
+             ('assemble_cmd', lambda t, kw: json.dumps(t.assemble_cmd(**kw))),
+             ('serialize_cmd', lambda t, kw: t.serialize_cmd(**kw)))
+    for case, (template, kwargs) in CASES.items():
+        kwargs = dict(kwargs, id='0x1')
+        assert template.serialize_cmd(**kwargs)[1] == json.dumps(legacy_assemble(template, **kwargs))
+        for label, build in paths:
+            elapsed = timeit.timeit(lambda: build(template, kwargs), number=args.rounds)
+            print('{:<9} {:<14} {:7.2f} us/command'.format(case, label, 1e6 * elapsed / args.rounds))
+
+
+if __name__ == '__main__':
+    main()
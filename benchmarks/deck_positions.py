@@ -0,0 +1,78 @@
+"""Benchmark of labware position ids, per-call arithmetic vs class tables.
+
+`legacy` formats position ids the way `Plate96.position_id` and friends did
+before the class-level tables, and builds the 96-head position string the way
+`HamiltonInterface._compound_pos_str_96` did. The memory figures compare
+instantiating plates with and without building their per-position items up
+front, which every constructor used to do.
+
+    python benchmarks/deck_positions.py [--rounds 2000] [--plates 500]
+"""
+import argparse
+import sys
+import timeit
+import tracemalloc
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonInterface
+from pyhamilton.resources import Plate384, Plate96, Tip96, Vessel
+
+
+def legacy_position_id(res, idx, rows, row_labels):
+    res._assert_idx_in_range(idx)
+    x, y = int(idx) // rows, int(idx) % rows
+    return row_labels[y] + str(x + 1)
+
+
+def legacy_compound_pos_str_96(labware96):
+    return ';'.join(labware96.layout_name() + ', ' + legacy_position_id(labware96, idx, 8, 'ABCDEFGH')
+                    for idx in range(96))
+
+
+def allocated_kb(make):
+    tracemalloc.start()
+    kept = make()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--plates', type=int, default=500)
+    args = parser.parse_args()
+
+    plate = Plate96('Cos_96_DW_1mL_0001')
+    assert HamiltonInterface._compound_pos_str_96(plate) == legacy_compound_pos_str_96(plate)
+    timings = (
+        ('position_id x384', lambda p=Plate384('p'): [legacy_position_id(p, i, 16, 'ABCDEFGHIJKLMNOP')
+                                                      for i in range(384)],
+                             lambda p=Plate384('p'): [p.position_id(i) for i in range(384)]),
+        ('96-head position string', lambda: legacy_compound_pos_str_96(plate),
+                                    lambda: HamiltonInterface._compound_pos_str_96(plate)),
+    )
+    for label, legacy, current in timings:
+        legacy_s = timeit.timeit(legacy, number=args.rounds) / args.rounds
+        current_s = timeit.timeit(current, number=args.rounds) / args.rounds
+        print(label)
+        print('  legacy   {:9.2f} us'.format(1e6 * legacy_s))
+        print('  current  {:9.2f} us   ({:.0f}x faster)'.format(1e6 * current_s, legacy_s / current_s))
+
+    def eager():
+        plates = [Plate384('plate_%04d' % i) for i in range(args.plates)]
+        for p in plates:
+            p.__dict__['_items'] = [Vessel(p, i) for i in range(p._num_items)]
+        return plates
+    print('{} x Plate384 + {} x Tip96'.format(args.plates, args.plates))
+    print('  legacy   {:9.0f} kB'.format(allocated_kb(eager) + allocated_kb(
+        lambda: [Tip96('tips_%04d' % i)._items for i in range(args.plates)])))
+    print('  current  {:9.0f} kB'.format(allocated_kb(lambda: [Plate384('plate_%04d' % i) for i in range(args.plates)])
+                                         + allocated_kb(lambda: [Tip96('tips_%04d' % i) for i in range(args.plates)])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""End-to-end HamiltonInterface throughput and latency against the Python interpreter stand-in.
+
+Runs without VENUS or a robot: the bridge is served as usual and
+`InterpreterStandIn` plays the HSL side. Scenarios:
+
+  sequential   send_command + wait_on_response, one command at a time
+  pipelined    queue all commands, then wait on each
+  batched      the same commands inside HamiltonInterface.batch()
+  aspirate     8-channel channelAspirate responses, parsed with raise_first_exception
+
+    python benchmarks/interpreter_roundtrip.py [--commands 500] [--delay 0] [--threaded-server]
+"""
+import argparse
+import statistics
+import sys
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonInterface, ASPIRATE
+from pyhamilton.interpreter_standin import InterpreterStandIn
+
+PORT = 3261
+
+
+def sequential(ham_int, n):
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        ham_int.wait_on_response(ham_int.send_command(command='ping', id='seq-' + str(i)))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def pipelined(ham_int, n):
+    start = time.perf_counter()
+    ids = [ham_int.send_command(command='ping', id='pipe-' + str(i)) for i in range(n)]
+    latencies = []
+    for cmd_id in ids:
+        ham_int.wait_on_response(cmd_id)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def batched(ham_int, n):
+    start = time.perf_counter()
+    with ham_int.batch():
+        for i in range(n):
+            ham_int.send_command(command='ping', id='batch-' + str(i))
+    return [time.perf_counter() - start] * n
+
+
+def aspirate(ham_int, n):
+    positions = ';'.join('Cos_96_DW_1mL_0001, ' + well for well in ('A1', 'B1', 'C1', 'D1', 'E1', 'F1', 'G1', 'H1'))
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        ham_int.wait_on_response(
+            ham_int.send_command(ASPIRATE, channelVariable='11111111', labwarePositions=positions,
+                                 volumes=[10.0] * 8, liquidClass='HighVolume_Water_DispenseJet_Empty'),
+            raise_first_exception=True, return_data=['step-return2', 'step-return3'])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label, n, elapsed, latencies):
+    print('{:<11} {:8.0f} cmd/s   mean {:8.3f} ms   p50 {:8.3f} ms   p95 {:8.3f} ms'.format(
+        label, n / elapsed, 1000 * statistics.mean(latencies), 1000 * statistics.median(latencies),
+        1000 * sorted(latencies)[int(0.95 * len(latencies))]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.0, help='simulated seconds per command')
+    parser.add_argument('--threaded-server', action='store_true')
+    args = parser.parse_args()
+
+    with InterpreterStandIn(port=PORT, default_delay=args.delay, batch_max=64), \
+            HamiltonInterface(port=PORT, external_interpreter=True, threaded_server=args.threaded_server) as ham_int:
+        for label, scenario in (('sequential', sequential), ('pipelined', pipelined),
+                                ('batched', batched), ('aspirate', aspirate)):
+            start = time.perf_counter()
+            latencies = scenario(ham_int, args.commands)
+            report(label, args.commands, time.perf_counter() - start, latencies)
+
+
+if __name__ == '__main__':
+    main()
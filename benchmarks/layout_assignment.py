@@ -0,0 +1,84 @@
+"""Benchmark of assigning every labware item of a layout, line scans vs LayoutModel indexes.
+
+`legacy` is the previous `LayoutManager` matching, kept below as
+`LegacyLayoutManager`: every exact-name or prefix `ResourceType` tested each
+layout line, and each position-id check scanned every line with up to three
+regexes. The current `LayoutManager` looks both up in its `LayoutModel`. Each
+round assigns every labware item of the layout by exact name, plus the tip racks
+again through `resource_list_with_prefix`, with position-id verification on.
+
+    python benchmarks/layout_assignment.py [--rounds 3] [layout.lay]
+"""
+import argparse
+import re
+import sys
+import time
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.resources import LayoutManager, Plate96, ResourceType, Tip96, resource_list_with_prefix
+
+NGS_LAYOUT = join(dirname(dirname(abspath(__file__))), 'pyhamilton', 'ngs', 'tests',
+                  'PacBio_MultiPlexLibraryPrepDeck_v1.2.lay')
+
+
+class LegacyLayoutManager(LayoutManager):
+    """LayoutManager with the previous line-by-line matching."""
+
+    def _matching_names(self, restype):
+        return list(dict.fromkeys(restype.extract_name(line) for line in self.lines if restype.test(line)))
+
+    def _find_resource_line(self, resource_name):
+        name = re.escape(resource_name)
+        matching_lines = [line for line in self.lines if re.search(rf"ObjId[\s\x00-\x1f]*{name}(?:[\s\x00-\x1f]|Seq)", line)]
+        matching_lines += [line for line in self.lines if re.search(rf"^{name}[\s\x00-\x1f]", line) and 'PosId' in line]
+        if matching_lines:
+            return ''.join(matching_lines)
+        for line in self.lines:
+            if re.search(rf"Seq\.\d+\.Name[\s\x00-\x1f]*{name}(?:[\s\x00-\x1f]+|(?=Seq))", line):
+                return line
+        return None
+
+
+def labware_names(lines):
+    """Ids of the `Labware.<n>.Id` fields, which may be split onto the next line."""
+    names = []
+    for i, line in enumerate(lines):
+        match = re.match(r'Labware\.\d+\.Id(.*)', line)
+        if match:
+            value = match.group(1)[1:] if match.group(1) else lines[i + 1]
+            names.append(re.split(r'[\x00-\x1f]', value)[0])
+    return names
+
+
+def assign_all(manager_class, path, names):
+    lmgr = manager_class(path, install=False, use_cache=False)
+    for name in names:
+        lmgr.assign_unused_resource(ResourceType(Plate96, name))
+    lmgr.resources.clear()
+    resource_list_with_prefix(lmgr, 'TIP_50uLF_L_', Tip96, 8)
+    return lmgr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('layout', nargs='?', default=NGS_LAYOUT)
+    args = parser.parse_args()
+
+    names = labware_names(LayoutManager._read_layfile_lines(args.layout))
+    print('{} labware items'.format(len(names)))
+    results = {}
+    for label, manager_class in (('legacy', LegacyLayoutManager), ('indexed', LayoutManager)):
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            lmgr = assign_all(manager_class, args.layout, names)
+        results[label] = (time.perf_counter() - started) / args.rounds
+        print('{:<8} {:9.1f} ms/deck'.format(label, 1e3 * results[label]))
+        assert sorted(lmgr.resources) == ['TIP_50uLF_L_000' + str(i) for i in range(1, 9)]
+    print('{:.0f}x faster'.format(results['legacy'] / results['indexed']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark of reading Hamilton layout (.lay) files, byte-by-byte vs bulk reader.
+
+`legacy` is the previous `LayoutManager._read_layfile_lines`, which decoded the
+file one byte at a time, kept below as `legacy_read_layfile_lines`. The previous
+`LayoutManager.__init__` read the file twice (lines, then checksum), which is
+what `legacy x2` times; the current constructor reads it once.
+
+    python benchmarks/layout_reader.py [--rounds 5] [layout.lay ...]
+"""
+import argparse
+import glob
+import sys
+import timeit
+from os.path import abspath, basename, dirname, getsize, join
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.resources import LayoutManager
+
+NGS_LAYOUTS = join(dirname(dirname(abspath(__file__))), 'pyhamilton', 'ngs', 'tests', '*.lay')
+
+
+def legacy_read_layfile_lines(layfile_path):
+    """Equivalent of the previous LayoutManager._read_layfile_lines."""
+    buff = ''
+    lines = []
+    with open(layfile_path, 'rb') as f:
+        for c in f.read():
+            try:
+                c = bytes([c]).decode('utf-8')
+            except UnicodeDecodeError:
+                continue
+            buff += c
+            if c in '\n\r\t':
+                lines.append(buff.strip())
+                buff = ''
+    if buff:
+        lines.append(buff)
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('layouts', nargs='*')
+    args = parser.parse_args()
+
+    for path in args.layouts or sorted(glob.glob(NGS_LAYOUTS)):
+        assert LayoutManager._read_layfile_lines(path) == legacy_read_layfile_lines(path)
+        print('{} ({:.0f} kB)'.format(basename(path), getsize(path) / 1024))
+        legacy = timeit.timeit(lambda: legacy_read_layfile_lines(path), number=args.rounds) / args.rounds
+        current = timeit.timeit(lambda: LayoutManager._read_layfile_lines(path), number=args.rounds) / args.rounds
+        print('  legacy     {:9.2f} ms'.format(1e3 * legacy))
+        print('  legacy x2  {:9.2f} ms'.format(2e3 * legacy))
+        print('  current    {:9.2f} ms   ({:.0f}x faster per LayoutManager)'.format(1e3 * current, 2 * legacy / current))
+
+
+if __name__ == '__main__':
+    main()
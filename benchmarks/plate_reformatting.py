@@ -0,0 +1,98 @@
+"""Benchmark of planning plate reformatting, per-well arithmetic vs NumPy well maps.
+
+`legacy` plans a 96 to 384 compression the way `liquid_handling_wrappers` did:
+every well of every quadrant through `cells_96_to_384`, and every position id
+of the 96-head position strings through the per-call arithmetic of the old
+`position_id`. `current` runs `compression_plan`. Position strings are timed on
+fresh plates and again on the same plates, where they are cached. The 1536 and
+cherry-pick figures time plans that had no helper before.
+
+    python benchmarks/plate_reformatting.py [--plates 48] [--rounds 5]
+"""
+import argparse
+import sys
+import timeit
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.reformatting import cherry_pick_plan, compression_plan
+from pyhamilton.resources import Plate96, Plate384, Plate1536
+
+
+def legacy_cells_96_to_384(well, idx):
+    return well*2+idx%2+(idx//2)*16+16*(well//8)
+
+
+def legacy_position_id(plate, idx, rows, row_labels):
+    plate._assert_idx_in_range(idx)
+    x, y = int(idx) // rows, int(idx) % rows
+    return row_labels[y] + str(x + 1)
+
+
+def legacy_plan(plates_96, plates_384):
+    return [(plate, list(range(96)), plates_384[i // 4], [legacy_cells_96_to_384(w, i % 4) for w in range(96)])
+            for i, plate in enumerate(plates_96)]
+
+
+def legacy_compression(plates_96, plates_384):
+    return [(';'.join(source.layout_name() + ', ' + legacy_position_id(source, w, 8, 'ABCDEFGH') for w in source_wells),
+             ';'.join(target.layout_name() + ', ' + legacy_position_id(target, w, 16, 'ABCDEFGHIJKLMNOP')
+                      for w in target_wells))
+            for source, source_wells, target, target_wells in legacy_plan(plates_96, plates_384)]
+
+
+def current_compression(plates_96, plates_384):
+    return [(s.source_positions(), s.target_positions()) for s in compression_plan(plates_96, plates_384)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plates', type=int, default=48, help='number of 96-well source plates')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    n_384 = (args.plates + 3) // 4
+    assert legacy_compression(*plates(args.plates, n_384)) == current_compression(*plates(args.plates, n_384))
+
+    def report(label, legacy, current):
+        legacy_s = timeit.timeit(legacy, number=args.rounds) / args.rounds
+        current_s = timeit.timeit(current, number=args.rounds) / args.rounds
+        print(label)
+        print('  legacy   {:9.2f} ms'.format(1e3 * legacy_s))
+        print('  current  {:9.2f} ms   ({:.1f}x faster)'.format(1e3 * current_s, legacy_s / current_s))
+
+    deck = plates(args.plates, n_384)
+    report('{} x 96 -> {} x 384 plan'.format(args.plates, n_384),
+           lambda: legacy_plan(*deck), lambda: compression_plan(*deck))
+    # fresh plates every round, so the position strings cached on the plates are built each time
+    report('  with position strings, new plates',
+           lambda: legacy_compression(*plates(args.plates, n_384)),
+           lambda: current_compression(*plates(args.plates, n_384)))
+    report('  with position strings, same plates',
+           lambda: legacy_compression(*deck), lambda: current_compression(*deck))
+
+    def plan_1536():
+        sources = [Plate384('p384_%03d' % i) for i in range(n_384)]
+        targets = [Plate1536('p1536_%03d' % i) for i in range((n_384 + 3) // 4)]
+        return compression_plan(sources, targets)
+    seconds = timeit.timeit(plan_1536, number=args.rounds) / args.rounds
+    print('{} x 384 -> 1536 plan ({} stamps)  {:.2f} ms'.format(n_384, len(plan_1536()), 1e3 * seconds))
+
+    sources = [Plate96('src_%03d' % i) for i in range(args.plates)]
+    target = [Plate384('dst_%03d' % i) for i in range(n_384)]
+    # every source well once, in scrambled order
+    picks = [((sources[i % args.plates], (i // args.plates * 37) % 96), (target[i % n_384], (i * 11) % 384))
+             for i in range(96 * args.plates)]
+    src, dst = zip(*picks)
+    seconds = timeit.timeit(lambda: cherry_pick_plan(src, dst, [1.0] * len(src)), number=args.rounds) / args.rounds
+    print('cherry-pick plan of {} transfers ({} steps)  {:.2f} ms'.format(
+        len(picks), len(cherry_pick_plan(src, dst)), 1e3 * seconds))
+
+
+def plates(n_96, n_384):
+    return [Plate96('p96_%03d' % i) for i in range(n_96)], [Plate384('p384_%03d' % i) for i in range(n_384)]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Microbenchmark of HamiltonResponse.digest over the cases in tests/interface_tests.py.
+
+Compares the current single-decode, precompiled-grammar parser with the previous
+implementation (json decoded per field, block format rebuilt per block), kept
+below as `legacy_digest`.
+
+    python benchmarks/response_parsing.py [--rounds 2000]
+"""
+import argparse
+import json
+import sys
+import timeit
+from os.path import abspath, dirname
+
+from parse import parse
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonResponse
+from tests.interface_tests import TEST_DATA
+
+FIELD_NAMES = ["{numField:d}", "{mainErrField:d}", "{slaveErr:d}", "{recoveryBtnId:d}",
+               "{stepData}", "{labwareName:w}", "{labwarePos}"]
+
+
+def legacy_digest(raw, fields):
+    """Field-by-field equivalent of the previous HamiltonResponse.digest."""
+    status_return = json.loads(raw)['step-return1'] if 'step-return1' in raw else None
+    response = json.loads(raw)
+    return_data = [response[f] for f in (fields or []) if f in response]
+    module_id = str(json.loads(raw)['step-return2']) if 'step-return2' in raw else ''
+    parsed = None
+    if 'step-return1' in raw:
+        block_str = json.loads(raw)['step-return1']
+        if isinstance(block_str, str) and '[' in block_str and ',' in block_str:
+            parsed = [parse(",".join(FIELD_NAMES[:block.count(',') + 1]),
+                            ",".join([' ' if item == '' else item for item in block.split(',')]))
+                      for block in block_str.split('[')[1:]]
+            parsed = [p.named for p in parsed if p]
+    return status_return, return_data, module_id, parsed
+
+
+def current_digest(raw, fields):
+    HamiltonResponse(raw=raw).digest(fields)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [(case.data, case.fields) for case in TEST_DATA]
+    for label, digest in (('legacy', legacy_digest), ('current', current_digest)):
+        elapsed = timeit.timeit(lambda: [digest(raw, fields) for raw, fields in cases], number=args.rounds)
+        per_response = elapsed / (args.rounds * len(cases))
+        print('{:<8} {:8.2f} us/response   {:9.0f} responses/s'.format(label, 1e6 * per_response, 1 / per_response))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Replay a long recorded session flat out to measure the Python-side cost of a run.
+
+Writes a synthetic recording of an aspirate/dispense protocol, `--hours` long at
+the instrument (each step taking `--step-seconds`), then re-runs the same
+protocol against `SessionReplayer` with `time_scale=0` and reports how long the
+replay took and the Python overhead per command.
+
+    python benchmarks/session_replay.py [--hours 6] [--step-seconds 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.interface import HamiltonInterface, ASPIRATE, DISPENSE
+from pyhamilton.interpreter_standin import InterpreterStandIn, SessionReplayer
+from pyhamilton.journal import CommandJournal
+
+PORT = 3271
+POSITIONS = ';'.join('Cos_96_DW_1mL_0001, ' + well for well in 'A1 B1 C1 D1 E1 F1 G1 H1'.split())
+
+
+def protocol_steps(n):
+    for i in range(n):
+        template = ASPIRATE if i % 2 == 0 else DISPENSE
+        yield template, dict(channelVariable='11111111' + '0' * 8, labwarePositions=POSITIONS, volumes=[25.0] * 8,
+                             liquidClass='HighVolume_Water_DispenseJet_Empty')
+
+
+def record(path, n, step_seconds):
+    """Journal the protocol as if it had run on the instrument."""
+    standin = InterpreterStandIn()
+    journal = CommandJournal(path, max_bytes=0, buffer_size=2 * n + 1, flush_interval=3600)
+    for template, kwargs in protocol_steps(n):
+        cmd = template.assemble_cmd(**kwargs)
+        journal.record_command(cmd['id'], cmd)
+        journal.record_response(cmd['id'], standin.execute(cmd), latency=step_seconds)
+    journal.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hours', type=float, default=6)
+    parser.add_argument('--step-seconds', type=float, default=8)
+    args = parser.parse_args()
+    n = int(args.hours * 3600 / args.step_seconds)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'session.jsonl')
+        record(path, n, args.step_seconds)
+        start = time.perf_counter()
+        with SessionReplayer(path, port=PORT) as replayer, \
+                HamiltonInterface(port=PORT, external_interpreter=True) as ham_int:
+            loaded = time.perf_counter()
+            for template, kwargs in protocol_steps(n):
+                ham_int.wait_on_response(ham_int.send_command(template, **kwargs), raise_first_exception=True)
+            replayed = time.perf_counter()
+            assert replayer.position == n and not replayer.divergences
+
+    print('{} commands, {:.1f} h at the instrument'.format(n, n * args.step_seconds / 3600))
+    print('load {:.2f} s   replay {:.2f} s   {:.3f} ms/command'.format(
+        loaded - start, replayed - loaded, 1000 * (replayed - loaded) / n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark of StackedResources startup, line scans and connection per row vs indexes and one connection.
+
+`legacy` mirrors the previous `StackedResources`: each name was checked with
+`any(rname in line for line in lmgr.lines)`, and every row write opened its own
+SQLite connection and committed. `current` checks names with
+`LayoutManager.has_name`, backed by the layout's word index, and shares one
+connection between all stacks. The index is built once per layout, and also serves
+exact-name `ResourceType` assignment; each scan's cost grows with the layout
+and with how far down it the name first appears. The names checked are the
+labware names of the NGS example layout, repeated to fill the stacks; the
+stacks themselves are built without a layout so both sides write the same rows.
+
+    python benchmarks/stack_startup.py [--stacks 12] [--depth 20] [--db-dir DIR]
+"""
+import argparse
+import itertools
+import sqlite3
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+from pathlib import Path
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.resources import LayoutManager, Plate96, StackedResources
+from pyhamilton.resources import managed_resources
+
+NGS_LAYOUT = join(dirname(dirname(abspath(__file__))), 'pyhamilton', 'ngs', 'tests',
+                  'PacBio_MultiPlexLibraryPrepDeck_v1.2.lay')
+
+
+def legacy_conn():
+    conn = sqlite3.connect(managed_resources._STACKED_DB)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+class LegacyStackedResources(StackedResources):
+    """`StackedResources` writing through a fresh connection per operation, as before."""
+
+    def _reset_rows(self):
+        conn = legacy_conn()
+        conn.execute("DELETE FROM stacked WHERE tracker_id = ?;", (self.tracker_id,))
+        conn.executemany("INSERT OR REPLACE INTO stacked (tracker_id, rack_name, slot_idx, available) "
+                         "VALUES (?,?,NULL,1);", [(self.tracker_id, rname) for rname in self._stacked])
+        conn.commit()
+        conn.close()
+
+    def _update_row(self, rname, *, available):
+        conn = legacy_conn()
+        conn.execute("INSERT OR REPLACE INTO stacked (tracker_id, rack_name, slot_idx, available) "
+                     "VALUES (?,?,NULL,?);", (self.tracker_id, rname, int(available)))
+        conn.commit()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stacks', type=int, default=12)
+    parser.add_argument('--depth', type=int, default=20)
+    parser.add_argument('--db-dir', help='directory of the benchmark database (default: a temporary directory)')
+    args = parser.parse_args()
+
+    lmgr = LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+    labware = sorted({LayoutManager.layline_objid(line) for line in lmgr.lines
+                      if 'Labware' in line and LayoutManager.layline_objid(line)})
+    names = list(itertools.islice(itertools.cycle(labware), args.stacks * args.depth))
+    print('{} names checked against {} layout lines'.format(len(names), len(lmgr.lines)))
+    started = time.perf_counter()
+    assert all(any(name in line for line in lmgr.lines) for name in names)
+    legacy_s = time.perf_counter() - started
+    started = time.perf_counter()
+    lmgr.has_name(names[0])
+    index_s = time.perf_counter() - started
+    started = time.perf_counter()
+    assert all(lmgr.has_name(name) for name in names)
+    current_s = time.perf_counter() - started
+    print('  legacy   {:8.2f} ms'.format(1e3 * legacy_s))
+    print('  current  {:8.2f} ms   ({:.0f}x faster), after {:.2f} ms to build the word index once per layout'.format(
+        1e3 * current_s, legacy_s / current_s, 1e3 * index_s))
+
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as db_dir:
+        managed_resources._STACKED_DB = Path(db_dir) / 'stacked_resources.db'
+        print('{} stacks of {}: create, then fetch every plate and put half back'.format(args.stacks, args.depth))
+        for label, cls in (('legacy', LegacyStackedResources), ('current', StackedResources)):
+            started = time.perf_counter()
+            stacks = [cls.from_prefix('%s_%d' % (label, s), 'plate_%d' % s, args.depth, None, Plate96)
+                      for s in range(args.stacks)]
+            startup_s = time.perf_counter() - started
+            started = time.perf_counter()
+            for stack in stacks:
+                while stack.count():
+                    stack.fetch_next()
+                for _ in range(args.depth // 2):
+                    stack.put_back()
+            run_s = time.perf_counter() - started
+            print('  {:8} startup {:8.1f} ms   run {:8.1f} ms'.format(label, 1e3 * startup_s, 1e3 * run_s))
+            for stack in stacks:
+                stack.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark of tip allocation policies: channel arm moves for a run of mixed pickups.
+
+Runs the same sequence of pickups (random sizes from 1 to 8 tips) against fresh
+`TrackedTips` for each policy in `TIP_POLICIES`. Rack positions come from the
+NGS test layout, so racks on one carrier share arm positions. `moves` counts
+distinct column positions per pickup. `saved` compares each pickup with the
+index order `fetch_next` would have taken from the same tracker state. Compare
+the `moves` of the `flat` row for the run as a whole.
+
+    python benchmarks/tip_allocation.py [--racks 5] [--seed 0]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+from pathlib import Path
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.resources import LayoutManager, TIP_POLICIES, Tip96, TrackedTips, get_tip_policy
+from pyhamilton.resources import managed_resources
+
+NGS_LAYOUT = join(dirname(dirname(abspath(__file__))), 'pyhamilton', 'ngs', 'tests',
+                  'PacBio_MultiPlexLibraryPrepDeck_v1.2.lay')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--racks', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    lmgr = LayoutManager(NGS_LAYOUT, install=False)
+    rng = random.Random(args.seed)
+    sizes = [rng.randint(1, 8) for _ in range(96 * args.racks)]
+    with tempfile.TemporaryDirectory() as db_dir:
+        managed_resources._DB_PATH = Path(db_dir) / 'tip_tracker.db'
+        racks = [Tip96('TIP_50uLF_L_%04d' % i) for i in range(1, args.racks + 1)]
+        print('{} racks, pickups of 1-8 tips until the racks run out'.format(args.racks))
+        for name in TIP_POLICIES:
+            tips = TrackedTips(racks, 50, tracker_id=name, commit_interval=60)
+            policy = get_tip_policy(name, lmgr)
+            started = time.perf_counter()
+            for n in sizes:
+                if n > tips.count_remaining():
+                    break
+                try:
+                    policy.fetch(tips, n)
+                except ValueError:
+                    break # same-rack policy: no rack has n left
+            seconds = time.perf_counter() - started
+            print('  {:7} {:5d} pickups {:6d} moves {:6d} saved   {:6.1f} us/pickup'.format(
+                name, policy.pickups, policy.moves, policy.moves_saved, 1e6 * seconds / max(policy.pickups, 1)))
+            tips.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark of TrackedTips persistence, connection per tip vs batched transactions.
+
+`legacy` mirrors the previous `TrackedTips._update_row`: every tip opened its own
+SQLite connection, set WAL mode and committed, so a 96-tip rack fetch was 96
+commits (and 96 fsyncs). `current` runs the same operations on `TrackedTips`,
+which keeps one connection and commits each operation once. `grouped` adds a
+`commit_interval`, so the operations of one run share commits. `journal` uses
+`write_behind`: each operation is appended to a journal file and fsynced once,
+and the database is written only when the journal is compacted. `journal+`
+groups the fsyncs as well. Unlike `grouped`, whose held-back changes are lost
+if the process crashes, it keeps every change in the journal file at once and
+risks only the unsynced ones, on power loss. `syncs` counts commits plus
+journal fsyncs.
+
+    python benchmarks/tip_tracking.py [--racks 4] [--db-dir DIR]
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname
+from pathlib import Path
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from pyhamilton.resources import Tip96, TrackedTips
+from pyhamilton.resources import managed_resources
+
+
+class LegacyTrackedTips(TrackedTips):
+    """`TrackedTips` writing each tip through a fresh connection, as before."""
+    commits = 0
+
+    def _update_row(self, position_idx, occupied):
+        rack = self.occupancy[position_idx][0]
+        conn = sqlite3.connect(managed_resources._DB_PATH)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        try:
+            conn.execute("INSERT OR REPLACE INTO tips (tracker_id, position_idx, rack_name, occupied) "
+                         "VALUES (?,?,?,?);", (self.tracker_id, position_idx, rack.layout_name(), int(occupied)))
+            conn.commit()
+            LegacyTrackedTips.commits += 1
+        finally:
+            conn.close()
+
+
+def run(tips, racks):
+    """A run's worth of tip use: rack fetches for the 96-head, a refill, then 8-tip fetches for the channels."""
+    for _ in range(racks // 2):
+        rack, occupancy_map = tips.fetch_rack_with_min_columns(12)
+    tips.fill_rack_from_occupancy_map(rack, occupancy_map)
+    while tips.count_remaining() >= 8:
+        tips.fetch_next(8)
+
+
+def commits(tips):
+    journal_syncs = tips._journal.syncs if tips._journal is not None else 0
+    return LegacyTrackedTips.commits + tips._db.commits + journal_syncs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--racks', type=int, default=4)
+    parser.add_argument('--db-dir', help='directory of the benchmark database (default: a temporary directory)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as db_dir:
+        managed_resources._DB_PATH = Path(db_dir) / 'tip_tracker.db'
+        racks = [Tip96('tips_%04d' % i) for i in range(max(args.racks, 2))]
+        print('one 96-tip rack fetch, then a run of {} rack fetches, a refill and {} fetches of 8'.format(
+            len(racks) // 2, (len(racks) - len(racks) // 2) * 12))
+        for label, make in (('legacy', lambda: LegacyTrackedTips(racks, 50, tracker_id='legacy')),
+                            ('current', lambda: TrackedTips(racks, 50, tracker_id='current')),
+                            ('grouped', lambda: TrackedTips(racks, 50, tracker_id='grouped', commit_interval=1.0)),
+                            ('journal', lambda: TrackedTips(racks, 50, tracker_id='journal', write_behind=True)),
+                            ('journal+', lambda: TrackedTips(racks, 50, tracker_id='journal+', write_behind=True,
+                                                             commit_interval=1.0))):
+            tips = make()
+            before = commits(tips)
+            started = time.perf_counter()
+            tips.fetch_rack_with_min_columns(12)
+            fetch_s, fetch_commits = time.perf_counter() - started, commits(tips) - before
+            before = commits(tips)
+            started = time.perf_counter()
+            run(tips, len(racks))
+            tips.flush()
+            run_s, run_commits = time.perf_counter() - started, commits(tips) - before
+            print('  {:8} rack fetch {:7.2f} ms {:3d} syncs   run {:8.1f} ms {:4d} syncs'.format(
+                label, 1e3 * fetch_s, fetch_commits, 1e3 * run_s, run_commits))
+            tips.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""asyncio counterpart of `HamiltonInterface`.
+
+The HSL interpreter talks to pyhamilton exactly as it does for the threaded
+interface: it polls the local HTTP endpoint with GET for the next command and
+POSTs the JSON response back. Here that endpoint is an `asyncio` server living in
+the caller's event loop, so several commands (e.g. heater shakers, an ODTC and the
+pipetting channels) can be awaited concurrently without one thread per wait.
+
+Example:
+
+    async with AsyncHamiltonInterface() as ham:
+        await ham.initialize()
+        await asyncio.gather(ham.tip_pick_up(tips), hhs_start_shaker(ham, 1, 800))
+"""
+import asyncio
+import json
+import logging
+import subprocess
+from collections import deque
+from multiprocessing import Process
+
+from pyhamilton import OEM_RUN_EXE_PATH, OEM_HSL_PATH
+from .oemerr import HamiltonTimeoutError, PositionError
+from .interface import (HamiltonInterface, AspirateResult, DispenseResult, JSONLogger,
+    labware_pos_str, run_hamilton_process, INITIALIZE, ASPIRATE, DISPENSE, PICKUP, EJECT, ISWAP_GET, ISWAP_PLACE)
+from .liquid_class_db import get_liquid_class_dispense_mode
+
+_POST_REPLY = b'<html><body><h1>POST!</h1></body></html>'
+
+
+class AsyncHamiltonInterface:
+    """Drive the Hamilton interpreter from an `asyncio` event loop.
+
+    Mirrors the constructor and command helpers of `HamiltonInterface`, except that
+    every command helper is a coroutine and `send_command` returns an awaitable.
+    `start()` must be awaited from inside a running event loop, since the local HTTP
+    endpoint is served by that loop.
+    """
+
+    def __init__(self, address=None, port=None, simulating=False, debug=False, windowed=False):
+        self.address = HamiltonInterface.default_address if address is None else address
+        self.port = HamiltonInterface.default_port if port is None else port
+        self.simulating = simulating
+        self.windowed = windowed
+        self.debug = debug
+        self.active = False
+        self.oem_process = None
+        self.json_logger = JSONLogger()
+        self.logger = logging.getLogger(__name__)
+        self._server = None
+        self._send_queue = deque()  # (cmd_id, bytes) waiting for the interpreter's next GET
+        self._pending = {}          # cmd_id -> asyncio.Future resolved with the raw POST body
+
+    async def start(self):
+        """Start the local HTTP endpoint and, unless simulating, the interpreter.
+
+        When used with an `async with:` block, awaited automatically upon entering the block.
+        """
+        if self.active:
+            return
+        self.log('starting an async Hamilton interface')
+        if self.simulating:
+            self.active = True
+            self.log('running in simulation mode')
+            return
+        self._server = await asyncio.start_server(self._handle_connection, self.address, self.port)
+        self.log('started the async HTTP endpoint')
+        if self.windowed:
+            subprocess.Popen([OEM_RUN_EXE_PATH, OEM_HSL_PATH])
+            self.log('started the oem application for simulation')
+        else:
+            self.oem_process = Process(target=run_hamilton_process, args=())
+            self.oem_process.start()
+            self.log('started the oem process')
+        self.active = True
+
+    async def stop(self):
+        """Stop the interpreter and close the local HTTP endpoint."""
+        if not self.active:
+            return
+        try:
+            if self.windowed or self.simulating:
+                try:
+                    await self.wait_on_response(self.send_command(command='end', id=hex(0)), timeout=1.5)
+                except HamiltonTimeoutError:
+                    pass
+            elif self.oem_process is not None:
+                self.oem_process.terminate()  # SIGTERM, through the handle rather than a bare pid
+                await asyncio.get_running_loop().run_in_executor(None, self.oem_process.join)
+                self.log('oem process exited')
+        finally:
+            self.active = False
+            if self._server is not None:
+                self._server.close()
+                await self._server.wait_closed()
+                self._server = None
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._send_queue.clear()
+            self.json_logger.close_journal()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.stop()
+        return False
+
+    def is_open(self):
+        """Return `True` if the interface has been started and not stopped."""
+        return self.active
+
+    def send_command(self, template=None, **cmd_dict):
+        """Queue a command for the interpreter and return an awaitable for its response.
+
+        Accepts the same arguments as `HamiltonInterface.send_command`. The command is
+        picked up by the interpreter's next GET; this method does not block.
+
+        Returns:
+          asyncio.Future resolving to the raw response string once the interpreter
+          POSTs it (or to `None` when simulating). Pass it to `wait_on_response` to
+          apply a timeout and parse it.
+        """
+        if not self.is_open():
+            self.log_and_raise(RuntimeError('Cannot send a command from a closed AsyncHamiltonInterface'))
+        future = asyncio.get_running_loop().create_future()
+        if self.simulating:
+            try:
+                send_cmd_dict = HamiltonInterface._assemble_send_cmd(template, cmd_dict)
+            except ValueError as err:
+                self.log_and_raise(err)
+            self.json_logger.log(str(send_cmd_dict))
+            self.json_logger.journal_command(send_cmd_dict['id'], send_cmd_dict)
+            future.set_result(None)
+            return future
+        try:
+            cmd_id, _, cmd_str = HamiltonInterface._serialize_send_cmd(template, cmd_dict)
+        except ValueError as err:
+            self.log_and_raise(err)
+        self._pending[cmd_id] = future
+        future.add_done_callback(lambda done: self._forget(cmd_id, done))
+        self.json_logger.journal_command(cmd_id, cmd_str)
+        self._send_queue.append((cmd_id, cmd_str.encode()))
+        return future
+
+    async def wait_on_response(self, pending, timeout=60, raise_first_exception=False, return_data=None):
+        """Await the response behind `pending` and parse it.
+
+        Args:
+          pending (asyncio.Future): As returned by `send_command`.
+          timeout (float): Optional; seconds to wait before raising `HamiltonTimeoutError`.
+            Default is 60 seconds.
+          raise_first_exception (bool): Optional; raise the first error encoded in
+            the response. Default is False.
+          return_data (list | str): Optional; field(s) to extract, e.g. "step-return1".
+
+        Returns:
+          HamiltonResponse, or `None` when simulating.
+        """
+        try:
+            server_response = await asyncio.wait_for(asyncio.shield(pending), timeout)
+        except asyncio.TimeoutError:
+            pending.cancel()  # drops it from `_pending`; a late response is ignored
+            self.log_and_raise(HamiltonTimeoutError('Timed out after ' + str(timeout) + ' sec while waiting for a response'))
+        if server_response is None:
+            return None
+        if self.debug:
+            print(server_response)
+        return HamiltonInterface.parse_response(self, server_response, raise_first_exception, return_data)
+
+    async def _handle_connection(self, reader, writer):
+        # HTTP/1.1 with keep-alive: the interpreter may reuse one socket for many GET/POST pairs
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, _, version = request_line.decode('latin-1').strip().partition(' ')
+                version = version.rpartition(' ')[2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                if method == 'GET':
+                    payload = self._send_queue.popleft()[1] if self._send_queue else b''
+                elif method == 'POST':
+                    self._receive(body)
+                    payload = _POST_REPLY
+                else:
+                    payload = b''
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/HTML\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n'
+                             % (len(payload), b'keep-alive' if keep_alive else b'close') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _receive(self, post_body):
+        try:
+            cmd_id = json.loads(post_body).get('id')
+        except (json.decoder.JSONDecodeError, AttributeError):
+            return
+        future = self._pending.pop(cmd_id, None)
+        if future is not None:
+            self.json_logger.journal_response(cmd_id, post_body)
+        if future is not None and not future.done():
+            future.set_result(post_body.decode())
+
+    def _forget(self, cmd_id, future):
+        if self._pending.get(cmd_id) is future:
+            del self._pending[cmd_id]
+
+    def log(self, msg, msg_type='info'):
+        getattr(self.logger, msg_type.lower(), self.logger.info)(msg)
+
+    def log_and_raise(self, err):
+        self.log(repr(err), 'error')
+        raise err
+
+    async def initialize(self, **more_options):
+        """Initialize the Hamilton robot with optional parameters."""
+        self.log('initialize: Initializing Hamilton robot with options ' + str(more_options))
+        return await self.wait_on_response(self.send_command(INITIALIZE, **more_options), timeout=300,
+                raise_first_exception=True, return_data=['step-return2', 'step-return3'])
+
+    async def aspirate(self, pos_tuples, vols, **more_options) -> AspirateResult:
+        """Aspirate liquid from specified positions. See `HamiltonInterface.aspirate`."""
+        self.log('aspirate: Aspirate volumes ' + str(vols) + ' from positions [' +
+                '; '.join((labware_pos_str(*pt) if pt else '(skip)' for pt in pos_tuples)) +
+                (']' if not more_options else '] with extra options ' + str(more_options)))
+        if len(pos_tuples) > 8:
+            raise ValueError('Can only aspirate with 8 channels at a time')
+        HamiltonInterface._assert_parallel_nones(pos_tuples, vols)
+        if 'liquidClass' not in more_options:
+            raise ValueError('Must specify a liquidClass for aspirate commands')
+        if more_options.get('capacitiveLLD', 0) not in (0, 5):
+            if 'Surface' not in get_liquid_class_dispense_mode(more_options['liquidClass']):
+                raise ValueError('cLLD can only be used with Surface dispense modes')
+        response = await self.wait_on_response(
+            self.send_command(ASPIRATE,
+                channelVariable=HamiltonInterface._channel_var(pos_tuples),
+                labwarePositions=HamiltonInterface._compound_pos_str(pos_tuples),
+                volumes=[v for v in vols if v is not None],
+                **more_options),
+            raise_first_exception=True, return_data=['step-return2', 'step-return3'])
+        if self.simulating:
+            return AspirateResult(liquidHeights=[2.0] * len(pos_tuples), liquidVolumes=[10.0] * len(pos_tuples), raw=response)
+        return AspirateResult(
+            liquidHeights=[float(x) for x in response.return_data[0].split(';')],
+            liquidVolumes=[float(x) for x in response.return_data[1].split(';')],
+            raw=response)
+
+    async def dispense(self, pos_tuples, vols, **more_options) -> DispenseResult:
+        """Dispense liquid into specified positions. See `HamiltonInterface.dispense`."""
+        self.log('dispense: Dispense volumes ' + str(vols) + ' into positions [' +
+                '; '.join((labware_pos_str(*pt) if pt else '(skip)' for pt in pos_tuples)) +
+                (']' if not more_options else '] with extra options ' + str(more_options)))
+        if len(pos_tuples) > 8:
+            raise ValueError('Can only dispense with 8 channels at a time')
+        HamiltonInterface._assert_parallel_nones(pos_tuples, vols)
+        if 'liquidClass' not in more_options:
+            more_options['liquidClass'] = 'HighVolumeFilter_Water_DispenseJet_Empty_with_transport_vol'
+        if more_options.get('capacitiveLLD', 0) not in (0, 5):
+            if 'Surface' not in get_liquid_class_dispense_mode(more_options['liquidClass']):
+                raise ValueError('cLLD can only be used with Surface dispense modes')
+        response = await self.wait_on_response(
+            self.send_command(DISPENSE,
+                channelVariable=HamiltonInterface._channel_var(pos_tuples),
+                labwarePositions=HamiltonInterface._compound_pos_str(pos_tuples),
+                volumes=[v for v in vols if v is not None],
+                **more_options),
+            raise_first_exception=True, return_data=['step-return2', 'step-return3'])
+        if self.simulating:
+            return DispenseResult(liquidHeights=[2.0] * len(pos_tuples), liquidVolumes=[10.0] * len(pos_tuples), raw=response)
+        return DispenseResult(
+            liquidHeights=[float(x) for x in response.return_data[0].split(';')],
+            liquidVolumes=[float(x) for x in response.return_data[1].split(';')],
+            raw=response)
+
+    async def tip_pick_up(self, pos_tuples, **more_options):
+        """Pick up tips from specified positions."""
+        self.log('tip_pick_up: Pick up tips at ' + '; '.join((labware_pos_str(*pt) if pt else '(skip)'
+                for pt in pos_tuples)) + ('' if not more_options else ' with extra options ' + str(more_options)))
+        if len(pos_tuples) > 8:
+            raise ValueError('Can only pick up 8 tips at a time')
+        await self.wait_on_response(
+            self.send_command(PICKUP,
+                labwarePositions=HamiltonInterface._compound_pos_str(pos_tuples),
+                channelVariable=HamiltonInterface._channel_var(pos_tuples),
+                **more_options),
+            raise_first_exception=True)
+
+    async def tip_eject(self, pos_tuples=None, **more_options):
+        """Eject tips to specified positions, or to the default waste if `pos_tuples` is None."""
+        if pos_tuples is None:
+            self.log('tip_eject: Eject tips to default waste' +
+                    ('' if not more_options else ' with extra options ' + str(more_options)))
+            more_options['useDefaultWaste'] = 1
+            from .resources.deckresource import Tip96
+            dummy = Tip96('')
+            pos_tuples = [(dummy, 0)] * 8
+        else:
+            self.log('tip_eject: Eject tips to ' + '; '.join((labware_pos_str(*pt) if pt else '(skip)'
+                    for pt in pos_tuples)) + ('' if not more_options else ' with extra options ' + str(more_options)))
+        if len(pos_tuples) > 8:
+            raise ValueError('Can only eject up to 8 tips')
+        await self.wait_on_response(
+            self.send_command(EJECT,
+                labwarePositions=HamiltonInterface._compound_pos_str(pos_tuples),
+                channelVariable=HamiltonInterface._channel_var(pos_tuples),
+                **more_options),
+            raise_first_exception=True)
+
+    async def move_plate(self, source_plate, target_plate, CmplxGetDict=None, CmplxPlaceDict=None, inversion=None, **more_options):
+        """Move a plate from source to target position using iSWAP. See `HamiltonInterface.move_plate`."""
+        self.log('move_plate: Moving plate ' + source_plate.layout_name() + ' to ' + target_plate.layout_name())
+        src_pos = source_plate.layout_name() + ', ' + source_plate.position_id(0)
+        trgt_pos = target_plate.layout_name() + ', ' + target_plate.position_id(0)
+        try_inversions = (0, 1) if not inversion else (inversion,)
+
+        getCmplxMvmnt, getRetractDist, getLiftUpHeight, getOrientation = (0, 0.0, 20.0, 1)
+        placeCmplxMvmnt, placeRetractDist, placeLiftUpHeight, placeOrientation = (0, 0.0, 20.0, 1)
+        if CmplxGetDict:
+            getCmplxMvmnt = 1
+            getRetractDist = CmplxGetDict['retractDist']
+            getLiftUpHeight = CmplxGetDict['liftUpHeight']
+            getOrientation = CmplxGetDict['labwareOrientation']
+        if CmplxPlaceDict:
+            placeCmplxMvmnt = 1
+            placeRetractDist = CmplxPlaceDict['retractDist']
+            placeLiftUpHeight = CmplxPlaceDict['liftUpHeight']
+            placeOrientation = CmplxPlaceDict['labwareOrientation']
+
+        for inv in try_inversions:
+            pending = self.send_command(ISWAP_GET,
+                                        plateLabwarePositions=src_pos,
+                                        inverseGrip=inv,
+                                        movementType=getCmplxMvmnt,
+                                        retractDistance=getRetractDist,
+                                        liftUpHeight=getLiftUpHeight,
+                                        labwareOrientation=getOrientation,
+                                        **more_options)
+            try:
+                await self.wait_on_response(pending, raise_first_exception=True, timeout=120)
+                break
+            except PositionError:
+                self.log("trying inverse", 'info')
+
+        pending = self.send_command(ISWAP_PLACE,
+                                    plateLabwarePositions=trgt_pos,
+                                    movementType=placeCmplxMvmnt,
+                                    retractDistance=placeRetractDist,
+                                    liftUpHeight=placeLiftUpHeight,
+                                    labwareOrientation=placeOrientation)
+        try:
+            await self.wait_on_response(pending, raise_first_exception=True, timeout=120)
+        except PositionError:
+            raise IOError
@@ -0,0 +1,367 @@
+"""Thread-safe state shared between `HamiltonInterface` and the local bridge server."""
+from collections import deque, OrderedDict
+from threading import Condition, Event, Lock
+from weakref import WeakSet
+import json
+import time
+
+from .command_timing import CommandTimer
+from .oemerr import HamiltonQueueFullError
+
+
+class CommandQueue:
+    """Bounded FIFO of serialized commands waiting for the interpreter's next GET.
+
+    Producers (`send_command` on any thread) `put` commands; the server thread
+    `pop`s them when the interpreter polls. Both ends are O(1) and guarded by a
+    single condition variable, which also wakes `wait_drained` callers as soon as
+    the queue empties instead of having them spin.
+
+    Args:
+      maxsize (int): Optional; most commands held at once, 0 for unbounded.
+        Default is 1000.
+      overflow (str): Optional; what `put` does when the queue is full: 'block'
+        waits for room (up to `put_timeout`), 'raise' fails immediately.
+        Default is 'block'.
+      put_timeout (float): Optional; seconds a blocking `put` waits before raising
+        `HamiltonQueueFullError`, `None` to wait forever. Default is 60, so a
+        `send_command` fails instead of hanging once the interpreter stops polling.
+    """
+
+    def __init__(self, maxsize=1000, overflow='block', put_timeout=60):
+        if overflow not in ('block', 'raise'):
+            raise ValueError("overflow must be 'block' or 'raise', not " + repr(overflow))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self._items = deque()  # (cmd_id, cmd_bytes, batch_id)
+        self._cond = Condition()
+        self._enqueued = 0
+        self._dequeued = 0
+        self._rejected = 0
+        self._blocked_puts = 0
+        self._high_water = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def _wait_for_room(self, n):
+        # callers hold self._cond; an oversized group only has to wait for an empty queue
+        def has_room():
+            return not self.maxsize or not self._items or len(self._items) + n <= self.maxsize
+        if has_room():
+            return
+        if self.overflow == 'raise':
+            self._rejected += n
+            raise HamiltonQueueFullError('Command queue is full (' + str(self.maxsize) + ' commands)')
+        self._blocked_puts += 1
+        if not self._cond.wait_for(has_room, self.put_timeout):
+            self._rejected += n
+            raise HamiltonQueueFullError('Command queue stayed full for ' + str(self.put_timeout) + ' sec')
+
+    def put(self, cmd_id, cmd_bytes, batch_id=None):
+        """Append one command, applying backpressure if the queue is full."""
+        self.put_many([(cmd_id, cmd_bytes)], batch_id)
+
+    def put_many(self, cmds, batch_id=None):
+        """Append `(cmd_id, cmd_bytes)` pairs contiguously, tagged with `batch_id`."""
+        with self._cond:
+            self._wait_for_room(len(cmds))
+            self._items.extend((cmd_id, cmd_bytes, batch_id) for cmd_id, cmd_bytes in cmds)
+            self._enqueued += len(cmds)
+            self._high_water = max(self._high_water, len(self._items))
+
+    def pop(self, batch_max=1):
+        """Remove and return the next command as a list of `(cmd_id, cmd_bytes, batch_id)`.
+
+        If the next command belongs to a batch and `batch_max` > 1, up to `batch_max`
+        consecutive commands of that batch are returned together. Returns an empty
+        list if nothing is queued.
+        """
+        with self._cond:
+            if not self._items:
+                return []
+            popped = [self._items.popleft()]
+            batch_id = popped[0][2]
+            if batch_id is not None:
+                while self._items and len(popped) < batch_max and self._items[0][2] == batch_id:
+                    popped.append(self._items.popleft())
+            self._dequeued += len(popped)
+            self._cond.notify_all()
+            return popped
+
+    def wait_drained(self, timeout=None):
+        """Block until every queued command has been picked up. Returns `False` on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._items, timeout)
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Snapshot of queue depth and throughput counters.
+
+        Returns:
+          dict with 'depth', 'max_depth' (high-water mark), 'maxsize', 'enqueued',
+          'dequeued', 'rejected' and 'blocked_puts' (puts that had to wait for room).
+        """
+        with self._cond:
+            return {'depth': len(self._items), 'max_depth': self._high_water, 'maxsize': self.maxsize,
+                    'enqueued': self._enqueued, 'dequeued': self._dequeued, 'rejected': self._rejected,
+                    'blocked_puts': self._blocked_puts}
+
+
+class ResponseStore:
+    """Responses POSTed by the interpreter, indexed by command id until someone pops them.
+
+    Lookup, insertion and removal are O(1). Responses are kept in arrival order,
+    so eviction only ever looks at the oldest entries: a response is dropped once
+    it is older than `ttl` seconds or when more than `maxsize` are held. That keeps
+    memory flat in long `persistent=True` sessions where fire-and-forget commands
+    are never waited on.
+
+    Each command registered with `expect` gets a `threading.Event` that is set when
+    its response arrives. A response dropped for age or size before anyone popped
+    it, such as that of a fire-and-forget command, is counted as orphaned. The
+    same `ttl` pass drops registrations (and pickup times) of commands with no
+    response after `ttl` seconds, so waits longer than `ttl` are not supported.
+    It runs on every `expect`, `put` and `pop`.
+
+    Args:
+      maxsize (int): Optional; most unclaimed responses held at once. Default is 1000.
+      ttl (float): Optional; seconds an unclaimed response is kept, `None` to keep
+        until evicted by size. Default is 3600.
+    """
+
+    def __init__(self, maxsize=1000, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._responses = OrderedDict()  # idx -> (body, arrival time, latency)
+        self._events = {}
+        self._registered = OrderedDict()  # idx -> registration time, while no response has arrived
+        self._pickup_times = {}
+        self._lock = Lock()
+        self._stored = 0
+        self._evicted = 0
+        self._expired = 0
+        self._orphaned = 0
+        self._unanswered = 0
+
+    def __contains__(self, idx):
+        return idx in self._responses
+
+    def __len__(self):
+        return len(self._responses)
+
+    def expect(self, idx):
+        """Register interest in the response for `idx`; returns the Event set on its arrival."""
+        now = time.perf_counter()
+        with self._lock:
+            self._evict(now)
+            event = self._events.get(idx)
+            if event is None:
+                event = self._events[idx] = Event()
+                if idx in self._responses:
+                    event.set()
+                else:
+                    self._registered[idx] = now
+            return event
+
+    def abandon(self, idx):
+        """Stop waiting for `idx`, e.g. after a timeout. A late response is dropped unclaimed."""
+        with self._lock:
+            self._events.pop(idx, None)
+            self._registered.pop(idx, None)
+            self._pickup_times.pop(idx, None)
+
+    def mark_picked_up(self, idx, when):
+        """Record when the interpreter fetched command `idx`, to report its latency."""
+        with self._lock:
+            if idx in self._events:
+                self._pickup_times[idx] = when
+
+    def put(self, idx, body):
+        """Store the response for `idx` and wake its waiter; returns its latency, or `None`."""
+        now = time.perf_counter()
+        with self._lock:
+            picked_up = self._pickup_times.pop(idx, None)
+            self._registered.pop(idx, None)
+            event = self._events.get(idx)
+            latency = None if picked_up is None else now - picked_up
+            self._responses[idx] = (body, now, latency)
+            self._responses.move_to_end(idx)
+            self._stored += 1
+            self._evict(now)
+        if event is not None:
+            event.set()
+        return latency
+
+    def pop(self, idx):
+        """Remove and return `(body, latency)` for `idx`, or `(None, None)` if absent."""
+        now = time.perf_counter()
+        with self._lock:
+            self._events.pop(idx, None)
+            self._registered.pop(idx, None)
+            entry = self._responses.pop(idx, None)
+            self._evict(now)
+        if entry is None:
+            return None, None
+        return entry[0], entry[2]
+
+    def _evict(self, now):
+        # caller holds self._lock; oldest entries are always first
+        responses = self._responses
+        if self.ttl is not None:
+            while responses:
+                idx, (_, arrived, _) = next(iter(responses.items()))
+                if now - arrived <= self.ttl:
+                    break
+                responses.popitem(last=False)
+                self._forget(idx)
+                self._expired += 1
+            registered = self._registered
+            while registered:
+                idx, since = next(iter(registered.items()))
+                if now - since <= self.ttl:
+                    break
+                # no response within ttl: nobody will be woken for it any more
+                registered.popitem(last=False)
+                self._events.pop(idx, None)
+                self._pickup_times.pop(idx, None)
+                self._unanswered += 1
+        while self.maxsize and len(responses) > self.maxsize:
+            idx, _ = responses.popitem(last=False)
+            self._forget(idx)
+            self._evicted += 1
+
+    def _forget(self, idx):
+        # the response was dropped before anyone popped it
+        self._orphaned += 1
+        event = self._events.get(idx)
+        if event is not None and event.is_set():
+            # nobody claimed it in time; a waiter that shows up later will just time out
+            del self._events[idx]
+
+    def evict_expired(self):
+        """Drop responses older than `ttl` now rather than on the next arrival."""
+        with self._lock:
+            self._evict(time.perf_counter())
+
+    def metrics(self):
+        """Snapshot of store size and eviction counters.
+
+        Returns:
+          dict with 'held' (unclaimed responses), 'waiting' (registered commands
+          without a response yet), 'stored', 'evicted' (dropped for size),
+          'expired' (dropped for age), 'orphaned' (dropped, for size or age,
+          before anyone claimed them) and 'unanswered' (registrations dropped
+          after `ttl` with no response).
+        """
+        with self._lock:
+            return {'held': len(self._responses), 'waiting': sum(1 for e in self._events.values() if not e.is_set()),
+                    'stored': self._stored, 'evicted': self._evicted, 'expired': self._expired,
+                    'orphaned': self._orphaned, 'unanswered': self._unanswered}
+
+
+class Bridge:
+    """Queue, response store and command timer behind one bridge server.
+
+    Each `HamiltonServerThread` (one per port) owns a `Bridge`; the request
+    handlers reach it as `self.server.bridge`, and the `HamiltonInterface` objects
+    using that port as `ham_int.bridge`. Nothing here is shared between ports, so
+    one process can drive several instruments.
+
+    Each interface adds its `JSONLogger` to `loggers`, so responses are journaled
+    as they arrive, whether or not anyone waits on them.
+
+    Args:
+      max_queued_responses (int): Optional; see `ResponseStore`. Default is 1000.
+      response_ttl (float): Optional; see `ResponseStore`. Default is 3600.
+    """
+
+    def __init__(self, max_queued_responses=1000, response_ttl=3600):
+        self.send_queue = CommandQueue()
+        self.responses = ResponseStore(max_queued_responses, response_ttl)
+        self.command_timer = CommandTimer()
+        self.loggers = WeakSet()
+
+    def send_str(self, cmd_str, cmd_id=None, batch_id=None):
+        if not isinstance(cmd_str, bytes):
+            if isinstance(cmd_str, str):
+                cmd_str = cmd_str.encode()
+            else:
+                raise ValueError('send_command can only send strings, not ' + str(cmd_str))
+        if cmd_id is not None:
+            # register the completion event before the interpreter can possibly answer
+            self.responses.expect(cmd_id)
+        try:
+            self.send_queue.put(cmd_id, cmd_str, batch_id)
+        except HamiltonQueueFullError:
+            if cmd_id is not None:
+                self.responses.abandon(cmd_id)  # never queued, so nobody will answer it
+            raise
+        if cmd_id is not None:
+            self.command_timer.mark(cmd_id, 'queued')
+
+    def send_batch(self, cmds, batch_id):
+        """Queue `(cmd_id, cmd_str)` pairs contiguously so one GET can pick them all up."""
+        for cmd_id, _ in cmds:
+            self.responses.expect(cmd_id)
+        try:
+            self.send_queue.put_many(
+                [(cmd_id, cmd_str.encode() if isinstance(cmd_str, str) else cmd_str) for cmd_id, cmd_str in cmds],
+                batch_id)
+        except HamiltonQueueFullError:
+            for cmd_id, _ in cmds:
+                self.responses.abandon(cmd_id)
+            raise
+        now = time.perf_counter()
+        for cmd_id, _ in cmds:
+            self.command_timer.mark(cmd_id, 'queued', now)
+
+    def has_queued_cmds(self):
+        return bool(self.send_queue)
+
+    def response_event(self, idx):
+        """Return the `threading.Event` that is set as soon as the response for `idx` is POSTed."""
+        return self.responses.expect(idx)
+
+    def pop_response(self, idx):
+        return self.pop_timed_response(idx)[0]
+
+    def pop_timed_response(self, idx):
+        """Remove the response for `idx` and return `(response_str, latency)`, or `(None, None)`.
+
+        `latency` is the seconds between the interpreter picking up the command and
+        POSTing its response, or `None` if the pickup was not recorded.
+        """
+        body, latency = self.responses.pop(idx)
+        return (None if body is None else body.decode()), latency
+
+    def next_payload(self, batch_max=1):
+        """Pop the next command (or batch envelope) to hand to the interpreter, or b'' if none."""
+        popped = self.send_queue.pop(batch_max)
+        if not popped:
+            return b''
+        now = time.perf_counter()
+        for picked_id, _, _ in popped:
+            if picked_id is not None:
+                self.responses.mark_picked_up(picked_id, now)
+                self.command_timer.mark(picked_id, 'picked_up', now)
+        if len(popped) == 1:
+            return popped[0][1]
+        return (b'{"command": "batch", "id": ' + json.dumps(popped[0][2]).encode()
+                + b', "commands": [' + b', '.join(cmd for _, cmd, _ in popped) + b']}')
+
+    def store_response(self, index, post_body):
+        if index is None:
+            return
+        latency = self.responses.put(index, post_body)
+        self.command_timer.mark(index, 'responded')
+        for logger in list(self.loggers):
+            logger.journal_response(index, post_body, latency)
@@ -0,0 +1,160 @@
+"""Per-command timing of the Python <-> interpreter round trip.
+
+Every command sent through `HamiltonInterface` is timestamped at five points:
+
+  assembled  `send_command` has built and journaled it, just before queuing it
+  queued     it is on the send queue
+  picked_up  the interpreter fetched it with GET
+  responded  the interpreter POSTed its response
+  claimed    `wait_on_response` handed the parsed response back to the caller
+
+The gaps between them are recorded, per command name (e.g. `channelAspirate`,
+`mph96Dispense`, `iSwapGet`), into the phases
+
+  assembly         building and validating the command in Python
+  send_wait        getting onto the send queue: held in an open `batch()`
+                   block, or blocked by a full queue
+  queue_wait       waiting on the send queue for the interpreter's next poll
+  execution        the interpreter running the step on the instrument
+  response_pickup  the response waiting to be claimed and parsed
+  total            `send_command` call to `wait_on_response` return
+
+each kept as a `LatencyHistogram`.
+"""
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Event, Lock, Thread
+import json
+import os
+import time
+
+_PHASE_OF_EVENT = {'assembled': 'assembly', 'queued': 'send_wait', 'picked_up': 'queue_wait',
+                   'responded': 'execution', 'claimed': 'response_pickup'}
+PHASES = ('assembly', 'send_wait', 'queue_wait', 'execution', 'response_pickup', 'total')
+
+
+class LatencyHistogram:
+    """Durations bucketed on a doubling scale from 50 us to about 15 hours."""
+
+    BUCKET_EDGES = tuple(50e-6 * 2 ** k for k in range(31))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKET_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        self.counts[bisect_right(self.BUCKET_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the `q` quantile (0..1), capped at the observed max."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                edge = self.BUCKET_EDGES[i] if i < len(self.BUCKET_EDGES) else self.max
+                return min(edge, self.max)
+        return self.max
+
+    def summary(self):
+        """JSON-ready dict with count, mean, min, max, p50, p95, p99 (seconds) and the bucket counts."""
+        return {'count': self.count, 'mean': self.total / self.count if self.count else None,
+                'min': self.min, 'max': self.max, 'p50': self.percentile(0.5), 'p95': self.percentile(0.95),
+                'p99': self.percentile(0.99),
+                'buckets': {('<=%g' % edge if i < len(self.BUCKET_EDGES) else '>%g' % self.BUCKET_EDGES[-1]): n
+                            for i, (edge, n) in enumerate(zip(self.BUCKET_EDGES + (None,), self.counts)) if n}}
+
+
+class CommandTimer:
+    """Collects command timestamps and aggregates them into per-command, per-phase histograms.
+
+    Thread-safe. At most `max_in_flight` commands are tracked at once; the oldest
+    are dropped beyond that, e.g. fire-and-forget commands that are never claimed.
+    """
+
+    def __init__(self, max_in_flight=10000):
+        self.enabled = True
+        self.max_in_flight = max_in_flight
+        self._in_flight = OrderedDict()  # cmd_id -> [command name, started, last timestamp]
+        self._histograms = {}            # command name -> {phase: LatencyHistogram}
+        self._lock = Lock()
+        self._dump_stop = None
+
+    def begin(self, cmd_id, command, started):
+        """Start timing `cmd_id`, a `command` whose `send_command` call began at `started`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._in_flight[cmd_id] = [command, started, started]
+            while len(self._in_flight) > self.max_in_flight:
+                self._in_flight.popitem(last=False)
+
+    def mark(self, cmd_id, event, when=None):
+        """Record that `cmd_id` reached `event` ('assembled', 'queued', 'picked_up', 'responded' or 'claimed')."""
+        if not self.enabled:
+            return
+        when = time.perf_counter() if when is None else when
+        with self._lock:
+            record = self._in_flight.get(cmd_id)
+            if record is None:
+                return
+            command, started, last = record
+            self._add(command, _PHASE_OF_EVENT[event], when - last)
+            record[2] = when
+            if event == 'claimed':
+                self._add(command, 'total', when - started)
+                del self._in_flight[cmd_id]
+
+    def _add(self, command, phase, seconds):
+        phases = self._histograms.get(command)
+        if phases is None:
+            phases = self._histograms[command] = {}
+        histogram = phases.get(phase)
+        if histogram is None:
+            histogram = phases[phase] = LatencyHistogram()
+        histogram.add(seconds)
+
+    def histograms(self):
+        """Return `{command name: {phase: LatencyHistogram.summary()}}` for everything seen so far."""
+        with self._lock:
+            return {command: {phase: phases[phase].summary() for phase in PHASES if phase in phases}
+                    for command, phases in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._in_flight.clear()
+
+    def dump(self, path):
+        """Write `histograms()` to `path` as JSON, replacing the file atomically."""
+        tmp_path = str(path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'written': time.time(), 'commands': self.histograms()}, f, indent=1)
+        os.replace(tmp_path, path)
+
+    def start_periodic_dump(self, path, interval=60):
+        """Rewrite the dump file at `path` every `interval` seconds from a daemon thread."""
+        self.stop_periodic_dump()
+        stop = self._dump_stop = Event()
+
+        def dump_loop():
+            while not stop.wait(interval):
+                self.dump(path)
+            self.dump(path)
+
+        Thread(target=dump_loop, daemon=True).start()
+
+    def stop_periodic_dump(self):
+        """Stop periodic dumping, writing the file one last time."""
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
@@ -4,4 +4,6 @@ from .hig_wrappers import *
 from .mpe_wrappers import *
 from .odtc_wrappers import *
 from .tec_wrappers import *
-from .pH_wrappers import *
\ No newline at end of file
+from .pH_wrappers import *
+from . import async_wrappers
+from .scheduler import DeviceScheduler, DeviceOperation
@@ -0,0 +1,192 @@
+"""Coroutine versions of the HHS, ODTC and MPE2 device wrappers for `AsyncHamiltonInterface`.
+
+Each function has the same name, arguments and return value as its blocking
+counterpart in `hhs_wrappers`, `odtc_wrappers` or `mpe_wrappers`, so switching a
+method over is a matter of importing from here and adding `await`. These are not
+star-exported from `pyhamilton.devices` to avoid shadowing the blocking versions.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+
+from ..interface import (HHS_CREATE_STAR_DEVICE, HHS_CREATE_USB_DEVICE, HHS_GET_TEMP, HHS_SET_PLATE_LOCK,
+    HHS_START_SHAKER, HHS_START_SHAKER_TIMED, HHS_START_TEMP_CTRL, HHS_STOP_SHAKER, HHS_STOP_TEMP_CTRL,
+    HHS_TERMINATE, HHS_WAIT_FOR_SHAKER, HHS_WAIT_FOR_TEMP_CTRL)
+from ..interface import (ODTC_CONNECT, ODTC_INIT, ODTC_CLOSE, ODTC_EXCT, ODTC_STATUS, ODTC_OPEN, ODTC_READ,
+    ODTC_STOP, ODTC_TERM)
+from ..interface import (MPE2_IP, MPE2_CLAMP, MPE2_DISCONNECT, MPE2_INIT, MPE2_FIL_PLACED, MPE2_FIL_REMOVED,
+    MPE2_FIL_TO_COL, MPE2_FIL_TO_WASTE, MPE2_RETRIEVE_FIL, MPE2_START_VAC, MPE2_STOP_VAC, MPE2_GET_VAC)
+from ..interface import HamiltonResponse
+from . import hhs_wrappers, odtc_wrappers
+
+
+@dataclass
+class ODTCExecuteResponse:
+    duration: float
+    resultID: int
+    raw: HamiltonResponse
+
+
+@dataclass
+class ODTCStatusResponse:
+    state: str
+    raw: HamiltonResponse
+
+
+async def _run(ham, template, timeout=None, return_data=None, **cmd_dict):
+    kwargs = {} if timeout is None else {'timeout': timeout}
+    return await ham.wait_on_response(ham.send_command(template, **cmd_dict), raise_first_exception=True,
+            return_data=return_data, **kwargs)
+
+
+# Heater shaker
+
+async def hhs_create_star_device(ham, star_device='ML_STAR', used_node=1):
+    response = await _run(ham, HHS_CREATE_STAR_DEVICE, hhs_wrappers.std_timeout, ['step-return2'],
+            starDevice=star_device, usedNode=used_node)
+    return response.return_data[0]
+
+async def hhs_create_usb_device(ham, used_node):
+    response = await _run(ham, HHS_CREATE_USB_DEVICE, hhs_wrappers.std_timeout, ['step-return2'], usedNode=used_node)
+    return response.return_data[0]
+
+async def hhs_get_temp(ham, device_number):
+    response = await _run(ham, HHS_GET_TEMP, hhs_wrappers.std_timeout, ['step-return2'], deviceNumber=device_number)
+    return response.return_data[0]
+
+async def hhs_set_plate_lock(ham, device_number, plate_lock):
+    await _run(ham, HHS_SET_PLATE_LOCK, hhs_wrappers.std_timeout, deviceNumber=device_number, plateLock=plate_lock)
+
+async def hhs_start_shaker(ham, device_number, shaking_speed):
+    await _run(ham, HHS_START_SHAKER, hhs_wrappers.std_timeout, deviceNumber=device_number, shakingSpeed=shaking_speed)
+
+async def hhs_start_shaker_timed(ham, device_number, shaking_speed, shaking_time):
+    await _run(ham, HHS_START_SHAKER_TIMED, hhs_wrappers.std_timeout, deviceNumber=device_number,
+            shakingSpeed=shaking_speed, shakingTime=shaking_time)
+
+async def hhs_start_temp_ctrl(ham, device_number, temperature, wait_for_temp_reached):
+    await _run(ham, HHS_START_TEMP_CTRL, hhs_wrappers.std_timeout, deviceNumber=device_number,
+            temperature=temperature, waitForTempReached=wait_for_temp_reached)
+
+async def hhs_stop_shaker(ham, device_number):
+    await _run(ham, HHS_STOP_SHAKER, hhs_wrappers.std_timeout, deviceNumber=device_number)
+
+async def hhs_stop_temp_ctrl(ham, device_number):
+    await _run(ham, HHS_STOP_TEMP_CTRL, hhs_wrappers.std_timeout, deviceNumber=device_number)
+
+async def hhs_terminate(ham):
+    await _run(ham, HHS_TERMINATE, hhs_wrappers.std_timeout)
+
+async def hhs_wait_for_shaker(ham, device_number):
+    await _run(ham, HHS_WAIT_FOR_SHAKER, hhs_wrappers.std_timeout, deviceNumber=device_number)
+
+async def hhs_wait_for_temp_ctrl(ham, device_number):
+    await _run(ham, HHS_WAIT_FOR_TEMP_CTRL, hhs_wrappers.std_timeout, deviceNumber=device_number)
+
+
+# ODTC
+
+async def odtc_connect(ham, simulation_mode, local_ip, device_ip, device_port=''):
+    response = await _run(ham, ODTC_CONNECT, odtc_wrappers.std_timeout, ['step-return2'], LocalIP=local_ip,
+            DeviceIP=device_ip, DevicePort=device_port, SimulationMode=simulation_mode)
+    if ham.simulating:
+        return 1  # Simulated device ID
+    return int(response.return_data[0])
+
+async def odtc_initialize(ham, device_id, lock_id=''):
+    return await _run(ham, ODTC_INIT, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id, LockID=lock_id)
+
+async def odtc_close_door(ham, device_id, lock_id=''):
+    return await _run(ham, ODTC_CLOSE, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id, LockID=lock_id)
+
+async def odtc_open_door(ham, device_id, lock_id=''):
+    return await _run(ham, ODTC_OPEN, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id, LockID=lock_id)
+
+async def odtc_execute_protocol(ham, device_id, method_name, simulating, priority=1, lock_id=''):
+    if not 0 < priority < 10001:
+        raise ValueError("Date provided can't be in the past")
+    response = await _run(ham, ODTC_EXCT, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id,
+            LockID=lock_id, MethodName=method_name, Priority=priority)
+    if simulating:
+        return ODTCExecuteResponse(duration=0.0, resultID=0, raw=response)
+    return ODTCExecuteResponse(duration=response.return_data[0], resultID=response.return_data[1], raw=response)
+
+async def odtc_get_status(ham, device_id, simulating):
+    response = await _run(ham, ODTC_STATUS, odtc_wrappers.std_timeout, ['step-return2', 'step-return3',
+            'step-return4', 'step-return5', 'step-return6', 'step-return7', 'step-return8'], DeviceID=device_id)
+    if ham.simulating or simulating:
+        return ODTCStatusResponse(state='idle', raw=response)
+    return ODTCStatusResponse(state=response.return_data[0], raw=response)
+
+async def odtc_read_actual_temperature(ham, device_id, lock_id=''):
+    return_fields = ['step-return2', 'step-return3']
+    response = await _run(ham, ODTC_READ, odtc_wrappers.std_timeout, return_fields, DeviceID=device_id, LockID=lock_id)
+    if ham.simulating:
+        return ['Simulation_mode_placeholder']*len(return_fields)
+    return response.return_data
+
+async def odtc_stop_method(ham, device_id, lock_id):
+    return await _run(ham, ODTC_STOP, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id, LockID=lock_id)
+
+async def odtc_terminate(ham, device_id):
+    return await _run(ham, ODTC_TERM, odtc_wrappers.std_timeout, ['step-return2'], DeviceID=device_id)
+
+async def odtc_wait_for_idle(ham, device_id, simulating, check_interval=5, max_wait=3000):
+    """Poll the ODTC until it reports 'idle', yielding to the event loop between checks.
+
+    Raises:
+        TimeoutError: If the device does not reach 'idle' state within max_wait seconds.
+    """
+    if simulating:
+        return
+    start_time = time.time()
+    while (await odtc_get_status(ham, device_id, simulating)).state != 'idle':
+        if time.time() - start_time > max_wait:
+            raise TimeoutError(f"ODTC device {device_id} did not reach 'idle' state within {max_wait} seconds.")
+        await asyncio.sleep(check_interval)
+
+
+# MPE2
+
+async def mpe2_connect_ip(ham, instrument_name, port_number, simulation_mode, options=''):
+    response = await _run(ham, MPE2_IP, return_data=['step-return2'], InstrumentName=instrument_name,
+            PortNumber=port_number, SimulationMode=simulation_mode, Options=options)
+    return response.return_data[0]
+
+async def mpe2_clamp_filter_plate(ham, device_id):
+    return await _run(ham, MPE2_CLAMP, return_data=['step-return2'], DeviceID=device_id)
+
+async def mpe2_disconnect(ham, device_id):
+    return await _run(ham, MPE2_DISCONNECT, return_data=['step-return2'], DeviceID=device_id)
+
+async def mpe2_initialize(ham, device_id):
+    return await _run(ham, MPE2_INIT, DeviceID=device_id)
+
+async def mpe2_filter_plate_placed(ham, device_id, filter_height, nozzle_height):
+    return await _run(ham, MPE2_FIL_PLACED, DeviceID=device_id, FilterHeight=filter_height, NozzleHeight=nozzle_height)
+
+async def mpe2_filter_plate_removed(ham, device_id):
+    return await _run(ham, MPE2_FIL_REMOVED, DeviceID=device_id)
+
+async def mpe2_process_filter_to_collection_plate(ham, device_id, control_points, return_plate_to_integration_area=''):
+    return await _run(ham, MPE2_FIL_TO_COL, DeviceID=device_id, ControlPoints=control_points,
+            ReturnPlateToIntegrationArea=return_plate_to_integration_area)
+
+async def mpe2_process_filter_to_waste_container(ham, device_id, control_points, return_plate_to_integration_area='',
+        waste_container_id='', disable_vacuum_check=''):
+    return await _run(ham, MPE2_FIL_TO_WASTE, DeviceID=device_id, ControlPoints=control_points,
+            ReturnPlateToIntegrationArea=return_plate_to_integration_area, WasteContainerID=waste_container_id,
+            DisableVacuumCheck=disable_vacuum_check)
+
+async def mpe2_retrieve_filter_plate(ham, device_id):
+    return await _run(ham, MPE2_RETRIEVE_FIL, DeviceID=device_id)
+
+async def mpe2_start_mpe_vacuum(ham, device_id, waste_container_id='', disable_vacuum_check=''):
+    return await _run(ham, MPE2_START_VAC, DeviceID=device_id, WasteContainerID=waste_container_id,
+            DisableVacuumCheck=disable_vacuum_check)
+
+async def mpe2_stop_vacuum(ham, device_id):
+    return await _run(ham, MPE2_STOP_VAC, DeviceID=device_id)
+
+async def mpe2_get_vacuum_status(ham, device_id):
+    return await _run(ham, MPE2_GET_VAC, DeviceID=device_id)
@@ -26,10 +26,9 @@ def centrifuge_get_drive_status(ham, label):
     return outputs
 
 
-def centrifuge_set_run(ham, label, array_speed, array_acceleration,
-                   array_duration, deceleration, close_cover, 
-                   direction, present_position):
-    
+def _centrifuge_run_params(array_speed, array_acceleration, array_duration, deceleration, close_cover,
+                           direction, present_position):
+    """Validate a centrifuge run and return the keyword arguments of its CENT_CENT command."""
     if not all([201 < speed < 4200 for speed in array_speed]):
         raise ValueError('Speed must be between 201 and 4200 rpm')
     
@@ -46,11 +45,18 @@ def centrifuge_set_run(ham, label, array_speed, array_acceleration,
     array_duration = ','.join(map(str, array_duration))
     array_speed = ','.join(map(str, array_speed))
 
+    return dict(ArraySpeed = array_speed, ArrayAcceleration = array_acceleration, ArrayDuration = array_duration,
+                Deceleration = deceleration, CloseCoverAtEnd = close_cover, Direction = direction,
+                PresentPosition = present_position)
+
+
+def centrifuge_set_run(ham, label, array_speed, array_acceleration,
+                   array_duration, deceleration, close_cover, 
+                   direction, present_position):
     
-    cmd = ham.send_command(CENT_CENT, Label = label, ArraySpeed = array_speed, 
-                           ArrayAcceleration = array_acceleration, ArrayDuration = array_duration,
-                           Deceleration = deceleration, CloseCoverAtEnd = close_cover, 
-                           Direction = direction, PresentPosition = present_position)
+    run_params = _centrifuge_run_params(array_speed, array_acceleration, array_duration, deceleration,
+                                       close_cover, direction, present_position)
+    cmd = ham.send_command(CENT_CENT, Label = label, **run_params)
     
     ham.wait_on_response(cmd, raise_first_exception=True, timeout=300)
 
@@ -0,0 +1,307 @@
+"""Start long device actions without blocking and join them later.
+
+The blocking wrappers (`hhs_start_shaker_timed`, `odtc_execute_protocol`,
+`centrifuge_set_run`, ...) hold the calling thread in `wait_on_response` until
+the device is done, so nothing else is sent to the robot meanwhile. A
+`DeviceScheduler` sends the same command and returns a `DeviceOperation` handle
+right away; a background thread claims the device's response and polls its
+status until the action is complete, while the script carries on pipetting:
+
+    with DeviceScheduler(ham) as devices:
+        shake = devices.hhs_start_shaker_timed(1, 1200, 300)
+        cycle = devices.odtc_execute_protocol(1, 'bead_binding')
+        pip_transfer(ham, other_plate_transfers, ...)
+        shake.join()
+        cycle.join(timeout=1800)
+
+Commands still run one at a time on the instrument; only the waiting overlaps.
+Status queries are ordinary commands and queue behind whatever the script sent
+last, so keep `poll_interval` well above the length of a pipetting step.
+"""
+import logging
+import time
+from threading import Event, Lock, Thread
+
+from ..interface import (CENT_CENT, HHS_GET_TEMP, HHS_GET_TEMP_STATE, HHS_START_SHAKER_TIMED, HHS_START_TEMP_CTRL,
+    HHS_WAIT_FOR_SHAKER, ODTC_EXCT, ODTC_READ, ODTC_STATUS)
+from ..oemerr import HamiltonTimeoutError, TemperatureError
+from .centrifuge_wrappers import _centrifuge_run_params
+from . import hhs_wrappers
+
+_TICK = 0.05 # seconds between checks for start responses and elapsed durations
+
+# HHS temperature states (HslHamHeaterShakerLib TemperateParam) that end a temperature control
+HHS_TEMP_OUT_OF_SECURITY = 2
+HHS_TEMP_TIMEOUT = 3
+
+
+class DeviceOperation:
+    """Handle of a device action started by `DeviceScheduler`.
+
+    Attributes:
+      name (str): what was started, e.g. `'HHS_StartShakerTimed:1'`.
+      cmd_id (str): id of the start command.
+      response (HamiltonResponse): the device's answer to the start command, once in.
+      status: the last status reading taken while polling, if the operation polls.
+      result: the value `join` returns, once done.
+      error (Exception): what the operation failed with, if it did.
+    """
+
+    def __init__(self, name, cmd_id, poll=None, duration=0.0, timeout=None):
+        self.name = name
+        self.cmd_id = cmd_id
+        self.duration = duration
+        self.timeout = timeout
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.response = None
+        self.status = None
+        self.result = None
+        self.error = None
+        self._poll = poll
+        self._next_poll = 0.0
+        self._done = Event()
+
+    def done(self):
+        """Return `True` once the operation has completed or failed."""
+        return self._done.is_set()
+
+    def join(self, timeout=None):
+        """Block until the operation is done and return its result.
+
+        Raises:
+          the exception the operation failed with, or `HamiltonTimeoutError` if it
+          is still running after `timeout` seconds.
+        """
+        if not self._done.wait(timeout):
+            raise HamiltonTimeoutError('Device operation ' + self.name + ' still running after ' + str(timeout)
+                                       + ' sec')
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def elapsed(self):
+        """Seconds since the command was sent, up to completion if done."""
+        return (self.finished or time.monotonic()) - self.submitted
+
+    def _finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished = time.monotonic()
+        self._done.set()
+
+    def __repr__(self):
+        state = 'failed' if self.error is not None else 'done' if self.done() else 'running'
+        return '<DeviceOperation {} {} {:.1f}s>'.format(self.name, state, self.elapsed())
+
+
+class DeviceScheduler:
+    """Run long device actions in the background of a `HamiltonInterface`.
+
+    Args:
+      ham (HamiltonInterface): the interface to send device commands through.
+      poll_interval (float): Optional; seconds between status queries of a running
+        operation. Default is 5.
+      query_timeout (float): Optional; timeout of each status query. Default is
+        `hhs_wrappers.std_timeout`.
+    """
+
+    def __init__(self, ham, poll_interval=5.0, query_timeout=None):
+        self.ham = ham
+        self.poll_interval = poll_interval
+        self.query_timeout = hhs_wrappers.std_timeout if query_timeout is None else query_timeout
+        self.logger = logging.getLogger(__name__)
+        self._pending = []
+        self._lock = Lock()
+        self._wake = Event()
+        self._stop = Event()
+        self._thread = None
+
+    def start(self, name, template, poll=None, duration=0.0, timeout=None, **cmd_dict):
+        """Send a device command and return a `DeviceOperation` without waiting for it.
+
+        Args:
+          name (str): label of the operation.
+          template (HamiltonCmdTemplate): the command to send, with `cmd_dict`.
+          poll (callable): Optional; `poll(ham, operation)` is called from the
+            background thread every `poll_interval` once the start command has been
+            answered and `duration` has passed. It returns `(finished, result)` and
+            may set `operation.status`. Without it the operation is done as soon as
+            both have happened, with the start response as its result.
+          duration (float): Optional; seconds the device is known to be busy after
+            answering, before any status query is worth sending.
+          timeout (float): Optional; fail with `HamiltonTimeoutError` if not done
+            this many seconds after sending.
+        """
+        cmd_id = self.ham.send_command(template, **cmd_dict)
+        operation = DeviceOperation(name, cmd_id, poll, duration, timeout)
+        if self.ham.simulating:
+            operation._finish()
+            return operation
+        with self._lock:
+            self._pending.append(operation)
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return operation
+
+    def pending(self):
+        """Return the operations not done yet."""
+        with self._lock:
+            return list(self._pending)
+
+    def join_all(self, timeout=None):
+        """Join every pending operation and return their results in start order.
+
+        `timeout` bounds the whole call. The first failure is raised once all
+        operations are done.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        operations = self.pending()
+        for operation in operations:
+            operation._done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return [operation.join(0) for operation in operations]
+
+    def stop(self):
+        """Stop the background thread. Operations still pending are left unresolved."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            if exc_type is None:
+                self.join_all()
+        finally:
+            self.stop()
+
+    # Heater shaker
+
+    def hhs_start_shaker_timed(self, device_number, shaking_speed, shaking_time, timeout=None):
+        """Non-blocking `hhs_start_shaker_timed`; done when the shaker has stopped."""
+        def poll(ham, operation):
+            # the timed run is over by now, so this only covers the ramp down
+            self._query(HHS_WAIT_FOR_SHAKER, (), deviceNumber=device_number)
+            return True, operation.response
+        return self.start('HHS_StartShakerTimed:' + str(device_number), HHS_START_SHAKER_TIMED, poll=poll,
+                          duration=shaking_time, timeout=timeout,
+                          deviceNumber=device_number, shakingSpeed=shaking_speed, shakingTime=shaking_time)
+
+    def hhs_start_temp_ctrl(self, device_number, temperature, tolerance=1.0, timeout=None):
+        """Non-blocking `hhs_start_temp_ctrl` with `wait_for_temp_reached`.
+
+        Polls `HHS_GetTemperature` and `HHS_GetTemperatureState`; done, with the
+        measured temperature as result, once it is within `tolerance` degrees of
+        `temperature`. Fails with `TemperatureError` if the device reports a
+        security range violation or a temperature timeout.
+        """
+        def poll(ham, operation):
+            state = self._query(HHS_GET_TEMP_STATE, deviceNumber=device_number)
+            if _as_number(state) in (HHS_TEMP_OUT_OF_SECURITY, HHS_TEMP_TIMEOUT):
+                raise TemperatureError('HHS ' + str(device_number) + ' reported temperature state ' + str(state))
+            operation.status = _as_number(self._query(HHS_GET_TEMP, deviceNumber=device_number))
+            if operation.status is None or abs(operation.status - temperature) > tolerance:
+                return False, None
+            return True, operation.status
+        return self.start('HHS_StartTempCtrl:' + str(device_number), HHS_START_TEMP_CTRL, poll=poll,
+                          timeout=timeout, deviceNumber=device_number, temperature=temperature,
+                          waitForTempReached=0)
+
+    # ODTC
+
+    def odtc_execute_protocol(self, device_id, method_name, priority=1, lock_id='', timeout=None):
+        """Non-blocking `odtc_execute_protocol`.
+
+        Polls `ODTC_GetStatus` until the device is idle again, keeping the last
+        `ODTC_ReadActualTemperature` readings in `operation.status`. The result is
+        the response of `ODTC_ExecuteMethod`.
+        """
+        if not 0 < priority < 10001:
+            raise ValueError('Priority must be between 1 and 10000')
+
+        def poll(ham, operation):
+            operation.status = self._query(ODTC_READ, ['step-return2', 'step-return3'], DeviceID=device_id,
+                                           LockID=lock_id)
+            state = self._query(ODTC_STATUS, DeviceID=device_id)
+            return state == 'idle', operation.response
+        return self.start('ODTC_ExecuteMethod:' + str(device_id), ODTC_EXCT, poll=poll, timeout=timeout,
+                          DeviceID=device_id, LockID=lock_id, MethodName=method_name, Priority=priority)
+
+    # Centrifuge
+
+    def centrifuge_set_run(self, label, array_speed, array_acceleration, array_duration, deceleration,
+                           close_cover, direction, present_position, timeout=300):
+        """Non-blocking `centrifuge_set_run`; done when the run command is answered."""
+        run_params = _centrifuge_run_params(array_speed, array_acceleration, array_duration, deceleration,
+                                            close_cover, direction, present_position)
+        return self.start('Centrifuge_Centrifugation:' + str(label), CENT_CENT, timeout=timeout, Label=label,
+                          **run_params)
+
+    def _query(self, template, return_data=('step-return2',), **cmd_dict):
+        cmd = self.ham.send_command(template, **cmd_dict)
+        response = self.ham.wait_on_response(cmd, raise_first_exception=True, timeout=self.query_timeout,
+                                             return_data=list(return_data) or None)
+        if not return_data:
+            return response
+        return response.return_data[0] if len(return_data) == 1 else response.return_data
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                operations = list(self._pending)
+            if not operations:
+                if self._wake.wait(1.0):
+                    self._wake.clear()
+                continue
+            for operation in operations:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._advance(operation)
+                except Exception as err:
+                    self.logger.warning('device operation ' + operation.name + ' failed: ' + repr(err))
+                    operation._finish(error=err)
+                if operation.done():
+                    with self._lock:
+                        self._pending.remove(operation)
+            self._wake.wait(_TICK)
+            self._wake.clear()
+
+    def _advance(self, operation):
+        now = time.monotonic()
+        if operation.timeout is not None and now - operation.submitted > operation.timeout:
+            if operation.response is None:
+                self.ham.bridge.responses.abandon(operation.cmd_id)
+            raise HamiltonTimeoutError('Device operation ' + operation.name + ' not done after '
+                                       + str(operation.timeout) + ' sec')
+        if operation.response is None:
+            if not self.ham.bridge.response_event(operation.cmd_id).is_set():
+                return
+            operation.response = self.ham.wait_on_response(operation.cmd_id, timeout=0, raise_first_exception=True)
+            operation.started = now
+        if now - operation.started < operation.duration:
+            return
+        if operation._poll is None:
+            operation._finish(operation.response)
+            return
+        if now < operation._next_poll:
+            return
+        finished, result = operation._poll(self.ham, operation)
+        operation._next_poll = time.monotonic() + self.poll_interval
+        if finished:
+            operation._finish(result)
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -1,15 +1,20 @@
 import sys
 import time, json, signal, os, requests, string, logging, subprocess
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from enum import auto, Enum, unique
-from parse import parse
+from parse import parse, compile as compile_parse_format
 from waiter import wait, suppress
 from http import server
-from threading import Thread
+from threading import Lock, Thread, local
 from multiprocessing import Process
 from pyhamilton import OEM_RUN_EXE_PATH, OEM_HSL_PATH
 from .oemerr import * #TODO: specify
 from .defaultcmds import defaults_by_cmd
+from .bridge import Bridge
+from .journal import CommandJournal
+from .timing_model import InstrumentTimingModel
+from .reformatting import quadrant_wells
 from .liquid_class_db import get_liquid_class_volume, get_liquid_class_dispense_mode
 
 def invert_columns(pos_str: str, sep: str = ';') -> str:
@@ -24,6 +29,21 @@ def invert_columns(pos_str: str, sep: str = ';') -> str:
     inverted = cols[::-1]
     return sep.join(item for col in inverted for item in col)
 
+_json_str = json.encoder.encode_basestring_ascii # what json.dumps uses for str
+
+
+def _json_value(value):
+    """`json.dumps(value)`, short-circuiting the common scalar types."""
+    value_type = type(value)
+    if value_type is str:
+        return _json_str(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is float and value - value == 0: # finite
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
 class HamiltonCmdTemplate:
     """
     Formatter object to create valid `pyhamilton` command dicts.
@@ -59,6 +79,27 @@ class HamiltonCmdTemplate:
             self.defaults = {k:v for k, v in default_dict.items() if v is not None}
         else:
             self.defaults = {}
+        self._compile()
+
+    def _compile(self):
+        # Everything assemble_cmd and serialize_cmd would otherwise rebuild on every call
+        self._needs = frozenset(['command', 'id'] + list(self.params_list))
+        self._required = self._needs - {'command', 'id'} - self.defaults.keys()
+        self._default_keys = frozenset(self.defaults)
+        # a default named 'command' or 'id' overrides the fixed fields, and a default outside params_list
+        # makes every command invalid; leave such templates to the dict path and assert_valid_cmd
+        self._compiled = self._default_keys.isdisjoint(('command', 'id')) and self._default_keys <= self._needs
+        self._ordered_keys = frozenset(['command', 'id']) | self._default_keys
+        self._cmd_head = '{"command": ' + json.dumps(self.cmd_name) + ', "id": '
+        self._key_prefixes = {key: ', ' + json.dumps(key) + ': ' for key in self.defaults}
+        self._default_fragments = [self._key_prefixes[key] + json.dumps(value) for key, value in self.defaults.items()]
+        self._fragment_index = {key: i for i, key in enumerate(self.defaults)}
+        self._defaults_json = ''.join(self._default_fragments)
+
+    def _fast_valid(self, kwargs):
+        """True if `kwargs` certainly assemble into a valid command; otherwise `assert_valid_cmd` decides."""
+        keys = kwargs.keys()
+        return self._compiled and self._required <= keys and keys <= self._needs and kwargs.get('command', self.cmd_name) == self.cmd_name
 
     def assemble_cmd(self, *args, **kwargs):
         """
@@ -73,9 +114,48 @@ class HamiltonCmdTemplate:
         assembled_cmd = {'command':self.cmd_name, 'id':HamiltonCmdTemplate.unique_id()}
         assembled_cmd.update(self.defaults)
         assembled_cmd.update(kwargs)
-        self.assert_valid_cmd(assembled_cmd)
+        if not self._fast_valid(kwargs):
+            self.assert_valid_cmd(assembled_cmd)
         return assembled_cmd
 
+    def serialize_cmd(self, *args, **kwargs):
+        """
+        Assemble this command straight to JSON, without building the command dict.
+
+        Returns the same string as `json.dumps(self.assemble_cmd(**kwargs))`, but
+        default values not overridden by `kwargs` are spliced in pre-serialized.
+
+        Args:
+          kwargs (dict): as for `assemble_cmd`
+
+        Returns:
+          tuple `(cmd_id, cmd_json)`
+
+        Raises:
+          ValueError: as `assemble_cmd`.
+        """
+        if args:
+            raise ValueError('serialize_cmd can only take keyword arguments.')
+        if not self._fast_valid(kwargs):
+            # raises with the full key mismatch report, if there is a mismatch
+            assembled_cmd = self.assemble_cmd(**kwargs)
+            return assembled_cmd['id'], json.dumps(assembled_cmd)
+        cmd_id = kwargs['id'] if 'id' in kwargs else HamiltonCmdTemplate.unique_id()
+        overridden = self._default_keys.intersection(kwargs)
+        if overridden:
+            fragments = self._default_fragments.copy()
+            for key in overridden:
+                fragments[self._fragment_index[key]] = self._key_prefixes[key] + _json_value(kwargs[key])
+            defaults_json = ''.join(fragments)
+        else:
+            defaults_json = self._defaults_json
+        parts = [self._cmd_head, _json_value(cmd_id), defaults_json]
+        for key, value in kwargs.items():
+            if key not in self._ordered_keys:
+                parts.append(', ' + _json_str(key) + ': ' + _json_value(value))
+        parts.append('}')
+        return cmd_id, ''.join(parts)
+
     def assert_valid_cmd(self, cmd_dict):
         """Validate a finished command. Do nothing if it is valid.
 
@@ -142,42 +222,29 @@ def _make_new_hamilton_serv_handler(resp_indexing_fn):
     
 
 class HamiltonServerHandler(server.BaseHTTPRequestHandler):
-    _send_queue = []
-    indexed_responses = {}
     MAX_QUEUED_RESPONSES = 1000
+    RESPONSE_TTL = 3600 # seconds an unclaimed response is kept
     
     @classmethod
     def set_indexing_fn(cls, fn):
         cls.indexing_fn = fn
 
+    @property
+    def bridge(self):
+        """The `Bridge` (queue and response store) of the server handling this request."""
+        return self.server.bridge
 
-    @staticmethod
-    def send_str(cmd_str):
-        if not isinstance(cmd_str, b''.__class__):
-            if isinstance(cmd_str, ''.__class__):
-                cmd_str = cmd_str.encode()
-            else:
-                raise ValueError('send_command can only send strings, not ' + str(cmd_str))
-        HamiltonServerHandler._send_queue.append(cmd_str)
-
-    @staticmethod
-    def has_queued_cmds():
-        return bool(HamiltonServerHandler._send_queue)
-
-    @staticmethod
-    def pop_response(idx):
-        ir = HamiltonServerHandler.indexed_responses
-        return None if idx not in ir else ir.pop(idx).decode()
-
-    def _set_headers(self):
+    def _set_headers(self, content_length=0):
         self.send_response(200)
         self.send_header('Content-type', 'text/HTML')
+        # lets HTTP/1.1 clients keep the connection open for the next poll
+        self.send_header('Content-Length', str(content_length))
         self.end_headers()
 
     def do_GET(self):
-        sq = HamiltonServerHandler._send_queue
-        response_to_send = sq.pop(0) if sq else b''
-        self._set_headers()
+        # Interpreters that understand the batch envelope advertise how many commands they take per GET
+        response_to_send = self.bridge.next_payload(int(self.headers.get('X-Batch-Max') or 1))
+        self._set_headers(len(response_to_send))
         self.wfile.write(response_to_send)
 
     def do_HEAD(self):
@@ -186,18 +253,38 @@ class HamiltonServerHandler(server.BaseHTTPRequestHandler):
     def do_POST(self):
         content_len = int(self.headers.get('content-length', 0))
         post_body = self.rfile.read(content_len)
-        self._set_headers()
-        self.wfile.write(b'<html><body><h1>POST!</h1></body></html>')
-        ir = HamiltonServerHandler.indexed_responses
-        index = HamiltonServerHandler.indexing_fn(post_body)
-        if index is None:
-            return
-        ir[index] = post_body
+        reply = b'<html><body><h1>POST!</h1></body></html>'
+        self._set_headers(len(reply))
+        self.wfile.write(reply)
+        if b'"batch-return"' in post_body:
+            try:
+                batch_response = json.loads(post_body)
+            except json.decoder.JSONDecodeError:
+                batch_response = {}
+            if batch_response.get('command') == 'batch-return':
+                # one POST answering a whole batch envelope; file each result under its own id
+                for result in batch_response.get('results', []):
+                    result_body = json.dumps(result).encode()
+                    self.bridge.store_response(HamiltonServerHandler.indexing_fn(result_body), result_body)
+                return
+        self.bridge.store_response(HamiltonServerHandler.indexing_fn(post_body), post_body)
 
     def log_message(self, *args, **kwargs):
         pass
 
 
+class KeepAliveHamiltonServerHandler(HamiltonServerHandler):
+    """HamiltonServerHandler speaking HTTP/1.1, so one connection serves many polls.
+
+    Serves the same per-server `Bridge` state as HamiltonServerHandler.
+    """
+    protocol_version = 'HTTP/1.1'
+    timeout = 60 # close idle keep-alive connections eventually
+    # headers and body go out in separate writes; without this, Nagle plus delayed
+    # ACKs stall every response on a reused connection by ~40 ms
+    disable_nagle_algorithm = True
+
+
 def run_hamilton_process():
     print("RUNNING HAMILTON PROCESS")
     """Start the interpreter in a separate python process.
@@ -249,6 +336,18 @@ class HamiltonResponseStatus(Enum):
     SUCCESS = auto()
     UNKNOWN = auto()
 
+# One compiled grammar per block length, so a block with n comma-separated items
+# parses exactly as `parse` would with the first n field specs
+_STEP_BLOCK_PARSERS = [compile_parse_format(','.join(spec[:n])) for spec in ((
+    "{numField:d}",
+    "{mainErrField:d}",
+    "{slaveErr:d}",
+    "{recoveryBtnId:d}",
+    "{stepData}",
+    "{labwareName:w}",
+    "{labwarePos}"),) for n in range(1, 8)]
+
+
 @dataclass
 class HamiltonResponse:
     """
@@ -262,10 +361,13 @@ class HamiltonResponse:
         Extracted values from specific field response
     moduleID: str
         ID of module from "step-return2" field
-    parsed_return: any
-        Represent "step-return1" field value
+    parsed_return: list[dict]
+        Per-channel blocks parsed from the "step-return1" field value
     raw: any
         Original server response
+    latency: float
+        Seconds between the interpreter picking up the command and posting this
+        response, when known. Not considered for equality.
 
     Methods
     -------
@@ -300,13 +402,17 @@ class HamiltonResponse:
     moduleID: str = ""
     parsed_return: any = None
     raw: any = None
+    latency: float = field(default=None, compare=False)
 
-    def _compute_status(self):
+    def _payload(self):
+        return json.loads(self.raw)
+
+    def _compute_status(self, payload=None):
         is_unknown = 'step-return1' not in self.raw
         if is_unknown:
             return HamiltonResponseStatus.UNKNOWN
 
-        response = json.loads(self.raw)['step-return1']
+        response = (self._payload() if payload is None else payload)['step-return1']
 
         is_success = response == 1 or           \
             (
@@ -339,8 +445,8 @@ class HamiltonResponse:
 
         return HamiltonResponseStatus.UNKNOWN
 
-    def _return_data(self, fields):
-        response = json.loads(self.raw)
+    def _return_data(self, fields, payload=None):
+        response = self._payload() if payload is None else payload
         if not fields or (isinstance(fields, str) and fields not in response):
             return []
         if isinstance(fields, str) and fields in response:
@@ -348,28 +454,19 @@ class HamiltonResponse:
 
         return [response[field] for field in fields if field in response]
 
-    def _moduleID(self):
+    def _moduleID(self, payload=None):
         moduleID_field_name = "step-return2"
         if moduleID_field_name not in self.raw:
             return ""
-        response = json.loads(self.raw)
+        response = self._payload() if payload is None else payload
         return str(response[moduleID_field_name])
 
-    def _parse_return(self):
+    def _parse_return(self, payload=None):
         return_field = "step-return1"
-        field_names = [
-            "{numField:d}",
-            "{mainErrField:d}",
-            "{slaveErr:d}",
-            "{recoveryBtnId:d}",
-            "{stepData}",
-            "{labwareName:w}",
-            "{labwarePos}"
-        ]
         if return_field not in self.raw:
             return None
 
-        response = json.loads(self.raw)[return_field]
+        response = (self._payload() if payload is None else payload)[return_field]
         block_available = isinstance(response, str) and '[' in response and ',' in response
         if not block_available:
             return None
@@ -378,23 +475,21 @@ class HamiltonResponse:
         if not blocks:
             return None
 
+        parsers = _STEP_BLOCK_PARSERS
         parsed = [
-            parse(
-                ",".join(field_names[:block.count(',') + 1]),
+            parsers[min(block.count(','), 6)].parse(
                 ",".join([' ' if item == '' else item for item in block.split(',') ])) for block in blocks
         ]
-        if not parsed:
-            return None
-
         if all([p is None for p in parsed]):
             return None
         return [p.named for p in parsed if p]
 
     def digest(self, fields=None):
-        self.status = self._compute_status()
-        self.return_data = self._return_data(fields=fields)
-        self.moduleID = self._moduleID()
-        self.parsed_return = self._parse_return()
+        payload = self._payload() # decoded once and shared by every field below
+        self.status = self._compute_status(payload)
+        self.return_data = self._return_data(fields=fields, payload=payload)
+        self.moduleID = self._moduleID(payload)
+        self.parsed_return = self._parse_return(payload)
 
     def raise_first_exception(self):
         isSuccessStatus = self.status == HamiltonResponseStatus.SUCCESS and '[' not in self.raw
@@ -442,13 +537,52 @@ class AspirateResult:
     raw: HamiltonResponse # keep the raw object if callers need extras
 
 
+class CommandBatch:
+    """Commands collected inside a `HamiltonInterface.batch()` block.
+
+    Attributes:
+      id (str): Unique id of the batch envelope.
+      commands (list): `(cmd_id, cmd_str)` pairs in the order they were sent.
+      responses (dict): `HamiltonResponse` for each command id, filled in when the
+        block exits.
+    """
+
+    def __init__(self, batch_id):
+        self.id = batch_id
+        self.commands = []
+        self.responses = {}
+        self._ids = set()
+        self._waits = {}
+
+    def add(self, cmd_id, cmd_str):
+        self.commands.append((cmd_id, cmd_str))
+        self._ids.add(cmd_id)
+
+    def __contains__(self, cmd_id):
+        return cmd_id in self._ids
+
+    def __len__(self):
+        return len(self.commands)
+
+
 class HamiltonServerThread(Thread):
-    """Private threaded local HTTP server with graceful shutdown flag."""
+    """Private threaded local HTTP server with graceful shutdown flag.
 
-    def __init__(self, address, port):
+    By default requests are handled one at a time and every connection is closed
+    after its request. With `threaded=True`, each connection gets its own handler
+    thread and is kept alive across requests (HTTP/1.1), so telemetry POSTs from
+    device polling do not queue behind command GETs and clients skip the TCP
+    setup on every poll.
+    """
+
+    def __init__(self, address, port, threaded=False, bridge=None):
         super().__init__()
         self.daemon = True  # CRITICAL: Make this a daemon thread
         self.server_address = (address, port)
+        self.threaded = threaded
+        if bridge is None:
+            bridge = Bridge(HamiltonServerHandler.MAX_QUEUED_RESPONSES, HamiltonServerHandler.RESPONSE_TTL)
+        self.bridge = bridge
         self.should_continue = True
         self.exited = False
 
@@ -467,7 +601,11 @@ class HamiltonServerThread(Thread):
     def run(self):
         self.exited = False
         try:
-            self.httpd = server.HTTPServer(self.server_address, HamiltonServerHandler)
+            if self.threaded:
+                self.httpd = server.ThreadingHTTPServer(self.server_address, KeepAliveHamiltonServerHandler)
+            else:
+                self.httpd = server.HTTPServer(self.server_address, HamiltonServerHandler)
+            self.httpd.bridge = self.bridge
             # Set a short timeout so we don't block forever
             self.httpd.timeout = 0.5
             
@@ -516,15 +654,31 @@ class HamiltonInterface:
           response = ham_int.wait_on_response(cmd_id)
           ...
       ```
+
+    With `simulating=True`, commands return immediately and `timing_model` (an
+    `InstrumentTimingModel`, or pass your own calibrated one) predicts how long
+    they would have taken on the instrument.
+
+    Pass `threaded_server=True` to serve the bridge with one thread per connection
+    and HTTP/1.1 keep-alive instead of the default one-request-at-a-time loop.
+    Pass `external_interpreter=True` to only serve the bridge and leave starting the
+    interpreter to someone else, e.g. `interpreter_standin.InterpreterStandIn` when
+    testing without VENUS.
+
+    Each address and port has its own server thread and `bridge` (send queue,
+    response store and command timings), so one process can drive several
+    instruments with one `HamiltonInterface` per port. Interfaces created for the
+    same address and port share them.
     """
 
     known_templates = _builtin_templates_by_cmd
     default_port = 3221
     default_address = '127.0.0.1' # localhost
-    _global_server_thread = None
+    _server_threads = {} # (address, port) -> HamiltonServerThread, shared by the interfaces on it
+    _server_threads_lock = Lock()
 
 
-    def __init__(self, address=None, port=None, simulating = False, debug=False, windowed = False, server_mode = False, persistent = False, **kwargs):
+    def __init__(self, address=None, port=None, simulating = False, debug=False, windowed = False, server_mode = False, persistent = False, threaded_server = False, external_interpreter = False, timing_model = None, **kwargs):
         if 'simulate' in kwargs:
             raise Exception("The simulate keyword argument is deprecated in favor of windowed. Please use windowed = True")
         self.address = HamiltonInterface.default_address if address is None else address
@@ -533,6 +687,7 @@ class HamiltonInterface:
         self.simulating = simulating
         self.server_mode = server_mode
         self.persistent = persistent
+        self.external_interpreter = external_interpreter
         self.debug = debug
         self.server_thread = None
         self.oem_process = None
@@ -540,18 +695,24 @@ class HamiltonInterface:
         self.logger = None
         self.log_queue = []
         self.json_logger = JSONLogger()
+        self._batch_state = local()  # batch() blocks belong to the thread that opened them
+        # predicts how long simulated commands would take on the instrument
+        self.timing_model = (timing_model or InstrumentTimingModel()) if simulating else timing_model
 
 
-        if self.__class__._global_server_thread is not None and \
-           self.__class__._global_server_thread.is_alive():
-            print("Reusing existing server thread")
-            self.server_thread = self.__class__._global_server_thread
-        else:
-            print("Starting a new server thread")
-            self.server_thread = HamiltonServerThread(self.address, self.port)
-            self.server_thread.start()
-            # Store this new thread as the global server thread
-            self.__class__._global_server_thread = self.server_thread
+        with HamiltonInterface._server_threads_lock:
+            server_thread = HamiltonInterface._server_threads.get((self.address, self.port))
+            if server_thread is not None and server_thread.is_alive():
+                print("Reusing existing server thread")
+                self.server_thread = server_thread
+            else:
+                print("Starting a new server thread")
+                self.server_thread = HamiltonServerThread(self.address, self.port, threaded=threaded_server)
+                self.server_thread.start()
+                # Later interfaces on this port share the thread and its bridge state
+                HamiltonInterface._server_threads[(self.address, self.port)] = self.server_thread
+        self.bridge = self.server_thread.bridge
+        self.bridge.loggers.add(self.json_logger)
 
 
     def _open(self):
@@ -596,6 +757,9 @@ class HamiltonInterface:
         elif self.simulating:
             self.active=True
             self.log('running in simulation mode')
+        elif self.external_interpreter:
+            self.active = True
+            self.log('expecting an externally started interpreter to poll the bridge')
         elif self.server_mode:
             current_directory = os.path.dirname(os.path.abspath(__file__))
             server_script_path = os.path.join(current_directory, 'run_venus_client.py')
@@ -623,7 +787,7 @@ class HamiltonInterface:
             return
         
         try:
-            if self.windowed or self.simulating or self.server_mode:
+            if self.windowed or self.simulating or self.server_mode or self.external_interpreter:
                 self.log('sending end run command to simulator')
                 try:
                     print("Sending end command")
@@ -647,7 +811,9 @@ class HamiltonInterface:
         finally:
             print("Stopping server thread")
             self.active = False
-            
+            self.bridge.command_timer.stop_periodic_dump()
+            self.json_logger.close_journal()
+
             # Don't call disconnect() - it can cause deadlocks
             # Instead, just signal the thread to stop and force close the server
             self.server_thread.should_continue = False
@@ -712,11 +878,40 @@ class HamiltonInterface:
           unique id (str) of the command that can be used to index it later, either
             newly generated or same as originally present in cmd_dict.
         """
+        started = time.perf_counter()
         if not self.is_open():
             self.log_and_raise(RuntimeError('Cannot send a command from a closed HamiltonInterface'))
+        if self.simulating:
+            try:
+                send_cmd_dict = self._assemble_send_cmd(template, cmd_dict)
+            except ValueError as err:
+                self.log_and_raise(err)
+            self.json_logger.log(str(send_cmd_dict))
+            self.json_logger.journal_command(send_cmd_dict['id'], send_cmd_dict)
+            if self.timing_model is not None:
+                self.timing_model.record(send_cmd_dict)
+            return send_cmd_dict['id']
+        try:
+            cmd_id, cmd_name, cmd_str = self._serialize_send_cmd(template, cmd_dict)
+        except ValueError as err:
+            self.log_and_raise(err)
+        self.bridge.command_timer.begin(cmd_id, cmd_name, started)
+        self.json_logger.journal_command(cmd_id, cmd_str)
+        self.bridge.command_timer.mark(cmd_id, 'assembled')
+        if self._open_batch is not None:
+            self._open_batch.add(cmd_id, cmd_str)
+            return cmd_id
+        self.bridge.send_str(cmd_str, cmd_id)
+        if block_until_sent:
+            self._block_until_sq_clear()
+        return cmd_id
+
+    @staticmethod
+    def _assemble_send_cmd(template, cmd_dict):
+        """Build the command dict `send_command` would send. Raises `ValueError` if it is malformed."""
         if template is None:
             if 'command' not in cmd_dict:
-                self.log_and_raise(ValueError('Command dicts from HamiltonInterface must have a \'command\' key'))
+                raise ValueError('Command dicts from HamiltonInterface must have a \'command\' key')
             cmd_name = cmd_dict['command']
             if cmd_name in HamiltonInterface.known_templates:
                 # raises if this is a known command but some fields in cmd_dict are invalid
@@ -726,14 +921,23 @@ class HamiltonInterface:
         else:
             send_cmd_dict = template.assemble_cmd(**cmd_dict)
         if 'id' not in send_cmd_dict:
-            self.log_and_raise(ValueError("Command dicts sent from HamiltonInterface must have a unique id with key 'id'"))
-        if not self.simulating:
-            HamiltonServerHandler.send_str(json.dumps(send_cmd_dict))
-        else:
-            self.json_logger.log(str(send_cmd_dict))
-        if block_until_sent:
-            self._block_until_sq_clear()
-        return send_cmd_dict['id']
+            raise ValueError("Command dicts sent from HamiltonInterface must have a unique id with key 'id'")
+        return send_cmd_dict
+
+    @staticmethod
+    def _serialize_send_cmd(template, cmd_dict):
+        """Return `(id, command name, JSON string)` of the command `send_command` would send.
+
+        Same result as `json.dumps(_assemble_send_cmd(template, cmd_dict))`, through
+        `HamiltonCmdTemplate.serialize_cmd` whenever a template applies.
+        """
+        if template is None:
+            template = HamiltonInterface.known_templates.get(cmd_dict.get('command'))
+        if template is not None:
+            cmd_id, cmd_str = template.serialize_cmd(**cmd_dict)
+            return cmd_id, template.cmd_name, cmd_str
+        send_cmd_dict = HamiltonInterface._assemble_send_cmd(None, cmd_dict)
+        return send_cmd_dict['id'], send_cmd_dict.get('command'), json.dumps(send_cmd_dict)
 
     def wait_on_response(self, id, timeout=60, raise_first_exception=False, return_data=None):
         """Wait and do not return until the response for the specified id comes back.
@@ -756,29 +960,87 @@ class HamiltonInterface:
             field(s) value to extract (e.g: "step-result1")
 
         Returns:
-          HamiltonResponse
+          HamiltonResponse, with `latency` set to the time between the interpreter
+          picking up the command and posting its response.
 
         Raises:
           `HamiltonTimeoutError`: after `timeout` seconds elapse with no response, if
-          `timeout` was specified.
+          `timeout` was specified, or if the response was evicted from the response
+          store before it could be claimed.
         """
         if self.simulating:
             return
-        
-        delays = 1  # sec
-        server_response = None
-        for _ in wait(delays=delays, timeout=timeout):
-            server_response = HamiltonServerHandler.pop_response(id)
-            if server_response is not None:
-                break
-            
-        if server_response is None:
+        if self._open_batch is not None and id in self._open_batch:
+            # the command has not been queued yet; batch() waits for it when the block exits
+            self._open_batch._waits[id] = (timeout, raise_first_exception, return_data)
+            return
+
+        # do_POST sets this event as soon as the response lands, so there is no polling delay
+        if not self.bridge.response_event(id).wait(timeout):
+            self.bridge.responses.abandon(id)
             self.log_and_raise(HamiltonTimeoutError('Timed out after ' + str(timeout) + ' sec while waiting for response id ' + str(id)))
-        
+        server_response, latency = self.bridge.pop_timed_response(id)
+        if server_response is None:
+            # the response arrived, but the store evicted it (max_queued_responses or response_ttl) first
+            self.log_and_raise(HamiltonTimeoutError('Response id ' + str(id) + ' arrived but was evicted from the '
+                                                    'response store before it was claimed'))
+
         if self.debug:
             print(server_response)
-        
-        return self.parse_response(server_response, raise_first_exception, return_data)
+
+        try:
+            response = self.parse_response(server_response, raise_first_exception, return_data)
+        finally:
+            self.bridge.command_timer.mark(id, 'claimed')
+        response.latency = latency
+        return response
+
+    @property
+    def _open_batch(self):
+        # the calling thread's open batch() block, so other threads (e.g. a
+        # DeviceScheduler poller) never have their commands captured by it
+        return getattr(self._batch_state, 'batch', None)
+
+    @_open_batch.setter
+    def _open_batch(self, cmd_batch):
+        self._batch_state.batch = cmd_batch
+
+    @contextmanager
+    def batch(self):
+        """Submit every command sent inside a `with` block to the interpreter together.
+
+        Commands are queued contiguously when the block exits, so an interpreter that
+        sends an `X-Batch-Max` header with its GET receives them in a single batch
+        envelope and answers with one multi-result POST; other interpreters simply
+        pick them up back to back without waiting on Python in between. Inside the
+        block, `wait_on_response` for a batched command returns `None` immediately;
+        the wait (with its timeout and `raise_first_exception` setting) happens on
+        exit, and the parsed responses are available from the yielded batch.
+
+        Only use this for commands whose results are not needed inside the block,
+        such as parameter sets and `set_labware_property` calls. Nested `batch()`
+        blocks join the outermost one. If the block raises, nothing is sent. The
+        block only collects commands sent from the thread that opened it.
+
+        Yields:
+          CommandBatch
+        """
+        if self._open_batch is not None:
+            yield self._open_batch
+            return
+        cmd_batch = CommandBatch(HamiltonCmdTemplate.unique_id())
+        self._open_batch = cmd_batch
+        try:
+            yield cmd_batch
+        finally:
+            self._open_batch = None
+        if not cmd_batch.commands:
+            return
+        self.log('batch: submitting ' + str(len(cmd_batch)) + ' commands as batch ' + cmd_batch.id)
+        self.bridge.send_batch(cmd_batch.commands, cmd_batch.id)
+        for cmd_id, _ in cmd_batch.commands:
+            timeout, raise_first_exception, return_data = cmd_batch._waits.get(cmd_id, (60, False, None))
+            cmd_batch.responses[cmd_id] = self.wait_on_response(cmd_id, timeout, raise_first_exception, return_data)
 
     def parse_response(self, server_response:str, raise_first_exception:bool=False, return_data:"list|str"=None):
         """Parse the server response and return parsed response of type HamiltonResponse.
@@ -802,10 +1064,61 @@ class HamiltonInterface:
         return hamiltonResponse
 
     def _block_until_sq_clear(self):
-        while HamiltonServerHandler.has_queued_cmds():
-            print(HamiltonServerHandler._send_queue)
+        self.bridge.send_queue.wait_drained()
+
+    def queue_metrics(self):
+        """Return depth and throughput counters of the command send queue.
+
+        See `CommandQueue.metrics` for the keys. The queue's `maxsize`, `overflow`
+        and `put_timeout` can be tuned through `self.bridge.send_queue`.
+        """
+        return self.bridge.send_queue.metrics()
+
+    def response_metrics(self):
+        """Return size and eviction/orphan counters of the response store.
+
+        See `ResponseStore.metrics` for the keys.
+        """
+        return self.bridge.responses.metrics()
 
-            pass
+    def record_session(self, path, **journal_kwargs):
+        """Record every command, response and its timing to `path` until `stop()`.
+
+        The recording is a `CommandJournal` (JSON lines), which
+        `pyhamilton.interpreter_standin.SessionReplayer` can serve back to a later
+        run without a robot. Responses are recorded as the interpreter posts
+        them, including those of commands that are never waited on.
+
+        Args:
+          path (str): journal file to write
+          journal_kwargs (dict): forwarded to `CommandJournal`
+        """
+        self.json_logger.set_journal(path, **journal_kwargs)
+
+    def command_timings(self):
+        """Return latency histograms of every command sent so far, per command name and phase.
+
+        Phases are `assembly`, `send_wait`, `queue_wait`, `execution`,
+        `response_pickup` and `total`; see `pyhamilton.command_timing` for what each covers and
+        `LatencyHistogram.summary` for the fields reported.
+
+        Returns:
+          dict like `{'channelAspirate': {'execution': {'count': 12, 'p50': 0.8, ...}, ...}, ...}`
+        """
+        return self.bridge.command_timer.histograms()
+
+    def dump_command_timings(self, path, interval=None):
+        """Write `command_timings()` to a JSON file at `path`.
+
+        Args:
+          path (str): file to write, replaced atomically on every write
+          interval (float): Optional; if given, keep rewriting the file every
+            `interval` seconds until `stop()`. Default is a single write.
+        """
+        if interval is None:
+            self.bridge.command_timer.dump(path)
+        else:
+            self.bridge.command_timer.start_periodic_dump(path, interval)
 
     def set_log_dir(self, log_dir):
         self.logger = logging.getLogger(__name__)
@@ -855,8 +1168,7 @@ class HamiltonInterface:
     @staticmethod
     def _compound_pos_str_96(labware96):
         """Create position string for 96-well commands"""
-        return ';'.join((labware96.layout_name() + ', ' + labware96.position_id(idx) 
-                        for idx in range(96)))
+        return labware96.compound_position_str(range(96))
 
     @staticmethod
     def _assert_parallel_nones(list1, list2):
@@ -1261,13 +1573,7 @@ class HamiltonInterface:
     @staticmethod
     def _compound_pos_str_384_quad(plate384, quadrant):
         """Create position string for 384-well quadrant commands"""
-        def get_384w_quadrant(quadrant):
-            def cells_96_to_384(well, idx):
-                return well*2+idx%2+(idx//2)*16+16*(well//8)
-            return [cells_96_to_384(idx, quadrant) for idx in range(96)]
-        
-        return ';'.join((plate384.layout_name() + ', ' + plate384.position_id(idx) 
-                        for idx in get_384w_quadrant(quadrant)))
+        return plate384.compound_position_str(quadrant_wells(quadrant).tolist())
 
     def move_plate(self, source_plate, target_plate, CmplxGetDict=None, CmplxPlaceDict=None, inversion=None, **more_options):
         """Move a plate from source to target position using iSWAP.
@@ -1526,9 +1832,34 @@ class JSONLogger:
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         self.logger.setLevel(logging.DEBUG)  # Set the default logging level
-    
+        self.journal = None
+
     def log(self, message):
         self.logger.info(message)
+
+    def set_journal(self, path, **kwargs):
+        """Journal every command and response as JSON lines to `path` from a background thread.
+
+        `kwargs` are forwarded to `CommandJournal` (rotation size, buffer size,
+        flush interval, fsync). Replaces any journal already open; a new journal
+        on the same path shares its file lock, so the old one's final write and
+        rotation finish before the new one writes.
+        """
+        self.close_journal()
+        self.journal = CommandJournal(path, **kwargs)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def journal_command(self, cmd_id, cmd):
+        if self.journal is not None:
+            self.journal.record_command(cmd_id, cmd)
+
+    def journal_response(self, cmd_id, response, latency=None):
+        if self.journal is not None:
+            self.journal.record_response(cmd_id, response, latency)
     
     def set_log_dir(self, log_dir):
         hdlr = logging.FileHandler(log_dir)
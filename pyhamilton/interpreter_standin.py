@@ -0,0 +1,265 @@
+"""Pure-Python stand-in for the STAR_OEM HSL interpreter.
+
+The real interpreter (STAR_OEM_noFan.hsl running under HxRun) polls the local
+bridge with GET, executes each command on the instrument and POSTs back a
+`STAR-return` JSON object built by `SendStepReturnToServer`. `InterpreterStandIn`
+does the same over plain HTTP, with configurable per-command delays and error
+injection, so the bridge, `HamiltonInterface` and anything built on them can be
+exercised and benchmarked on any OS without VENUS or a robot.
+
+Typical usage:
+
+    with InterpreterStandIn(delays={'channelAspirate': 0.5}) as standin, \\
+            HamiltonInterface(external_interpreter=True) as ham_int:
+        ham_int.wait_on_response(ham_int.send_command(command='ping', id='1'))
+
+Or from a shell, against a script started with `external_interpreter=True`:
+
+    python -m pyhamilton.interpreter_standin --delay 0.05 --error-rate 0.01
+
+`SessionReplayer` instead serves the responses of a session recorded with
+`HamiltonInterface.record_session`, so a production run can be re-run without
+the instrument:
+
+    python -m pyhamilton.interpreter_standin --replay run.jsonl --time-scale 0
+"""
+import argparse
+import json
+import random
+import time
+from threading import Thread, Event
+
+import requests
+
+from .interface import HamiltonInterface
+from .journal import read_journal
+
+# Commands whose step-return1 carries one error block per channel, like the real toolkit
+CHANNEL_COMMANDS = frozenset(['channelTipPickUp', 'channelTipEject', 'channelAspirate', 'channelDispense'])
+
+
+class InterpreterStandIn(Thread):
+    """Background thread that answers bridge commands the way the HSL interpreter would.
+
+    Args:
+      address (str): Optional; bridge address. Default is `HamiltonInterface.default_address`.
+      port (int): Optional; bridge port. Default is `HamiltonInterface.default_port`.
+      delays (dict): Optional; seconds to "execute" each command name, e.g.
+        `{'channelAspirate': 0.8}`. Values may also be callables taking the command
+        dict and returning seconds.
+      default_delay (float): Optional; execution time of commands not in `delays`.
+        Default is 0.
+      error_rate (float): Optional; probability that any command fails with an error
+        code drawn from `error_codes`. Default is 0.
+      error_codes (list): Optional; codes used for random errors. Default is `[3]`
+        (not executed).
+      batch_max (int): Optional; if > 1, advertise batch support with an
+        `X-Batch-Max` header and answer batch envelopes with one multi-result POST.
+        Default is 1, like the stock interpreter.
+      keep_alive (bool): Optional; reuse one HTTP connection for all polls.
+        Default is True.
+      poll_interval (float): Optional; pause after an empty poll. Default is 1 ms.
+      seed (int): Optional; seed for the error injection random generator.
+    """
+
+    def __init__(self, address=None, port=None, delays=None, default_delay=0.0, error_rate=0.0, error_codes=(3,),
+                 batch_max=1, keep_alive=True, poll_interval=0.001, seed=None):
+        super().__init__(daemon=True)
+        address = HamiltonInterface.default_address if address is None else address
+        port = HamiltonInterface.default_port if port is None else port
+        self.url = 'http://{}:{}'.format(address, port)
+        self.delays = dict(delays or {})
+        self.default_delay = default_delay
+        self.error_rate = error_rate
+        self.error_codes = list(error_codes)
+        self.batch_max = batch_max
+        self.keep_alive = keep_alive
+        self.poll_interval = poll_interval
+        self.handled = {}  # command name -> count
+        self._rng = random.Random(seed)
+        self._scripted_errors = {}
+        self._stop_event = Event()
+
+    def inject_error(self, command, error_code, count=1):
+        """Make the next `count` commands named `command` fail with `error_code`."""
+        self._scripted_errors.setdefault(command, []).extend([error_code] * count)
+
+    def stop(self, timeout=2):
+        self._stop_event.set()
+        self.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+        return False
+
+    def run(self):
+        session = requests.Session() if self.keep_alive else requests
+        headers = {'X-Batch-Max': str(self.batch_max)} if self.batch_max > 1 else {}
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    msg = session.get(self.url, headers=headers).text
+                except requests.ConnectionError:
+                    time.sleep(0.05) # bridge not up yet, or gone
+                    continue
+                if not msg:
+                    if self.poll_interval:
+                        time.sleep(self.poll_interval)
+                    continue
+                cmd = json.loads(msg)
+                if cmd.get('command') == 'batch':
+                    results = [self.execute(sub_cmd) for sub_cmd in cmd['commands']]
+                    body = json.dumps({'command': 'batch-return', 'id': cmd['id'], 'results': results})
+                else:
+                    body = json.dumps(self.execute(cmd))
+                session.post(self.url, data=body)
+                if cmd.get('command') == 'end':
+                    break
+        finally:
+            if self.keep_alive:
+                session.close()
+
+    def execute(self, cmd):
+        """Simulate running one command and return its `STAR-return` response dict."""
+        name = cmd.get('command', '')
+        self.handled[name] = self.handled.get(name, 0) + 1
+        delay = self.delays.get(name, self.default_delay)
+        if callable(delay):
+            delay = delay(cmd)
+        if delay:
+            time.sleep(delay)
+        error_code = self._next_error(name)
+        step_returns = self._step_returns(cmd, error_code)
+        response = {'command': 'STAR-return', 'step-name': name}
+        for i in range(4):
+            response['step-return' + str(i + 1)] = step_returns[i] if i < len(step_returns) else ''
+        response['id'] = cmd.get('id', '')
+        return response
+
+    def _next_error(self, name):
+        scripted = self._scripted_errors.get(name)
+        if scripted:
+            return scripted.pop(0)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self._rng.choice(self.error_codes)
+        return None
+
+    @staticmethod
+    def _channel_positions(cmd):
+        positions = [p.split(',') for p in str(cmd.get('labwarePositions', '')).split(';') if p]
+        channel_var = str(cmd.get('channelVariable', '1' * len(positions)))
+        channels = [i + 1 for i, use in enumerate(channel_var) if use == '1']
+        return [(ch, pos[0].strip(), pos[-1].strip() if len(pos) > 1 else '')
+                for ch, pos in zip(channels, positions)]
+
+    def _step_returns(self, cmd, error_code):
+        name = cmd.get('command', '')
+        if name == 'ping':
+            return ['0']
+        if name not in CHANNEL_COMMANDS:
+            if error_code is not None:
+                return ['1[00,{:02d},00,0'.format(error_code)]
+            return ['1']
+        channels = self._channel_positions(cmd)
+        # an error is reported on the first channel only, the rest succeed
+        blocks = ''.join('[{:02d},{:02d},00,0,,{},{}'.format(ch, error_code if (error_code and i == 0) else 0, lab, pos)
+                         for i, (ch, lab, pos) in enumerate(channels))
+        step_returns = [('1' if error_code else '0') + blocks]
+        if name in ('channelAspirate', 'channelDispense'):
+            volumes = cmd.get('volumes') or []
+            if not isinstance(volumes, list):
+                volumes = [v for v in str(volumes).split(';') if v]
+            step_returns.append(';'.join('5.0' for _ in channels))
+            step_returns.append(';'.join(str(float(v)) for v in volumes) or ';'.join('0.0' for _ in channels))
+        return step_returns
+
+
+class SessionReplayer(InterpreterStandIn):
+    """Stand-in that answers commands with the responses of a recorded session, in order.
+
+    Each incoming command is matched against the next recorded command. If the
+    command names agree, the recorded response is returned under the live
+    command's id, after the recorded execution time multiplied by `time_scale`.
+    Otherwise the command is answered like `InterpreterStandIn` would, the
+    recording is not advanced, and the mismatch is appended to `divergences`.
+
+    Args:
+      journal_path (str): recording made with `HamiltonInterface.record_session`
+        (or any `CommandJournal`). Rotated files next to it are read too.
+      time_scale (float): Optional; 1 replays at the recorded instrument speed,
+        0 as fast as possible. Default is 0.
+      kwargs (dict): forwarded to `InterpreterStandIn`.
+    """
+
+    def __init__(self, journal_path, time_scale=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.time_scale = time_scale
+        self.session = self.load_session(journal_path)
+        self.position = 0
+        self.divergences = []  # (position in session, live command name, recorded command name)
+
+    @staticmethod
+    def load_session(journal_path):
+        """Return the recorded `[command dict, response dict or None, latency or None]` entries in send order."""
+        session = []
+        awaiting_response = {}
+        for record in read_journal(journal_path, include_rotated=True):
+            if record['kind'] == 'command':
+                entry = [record['data'], None, None]
+                session.append(entry)
+                awaiting_response[record['id']] = entry
+            elif record['kind'] == 'response':
+                entry = awaiting_response.pop(record['id'], None)
+                if entry is not None:
+                    entry[1] = record['data']
+                    entry[2] = record.get('latency')
+        return session
+
+    def execute(self, cmd):
+        name = cmd.get('command', '')
+        recorded = self.session[self.position] if self.position < len(self.session) else None
+        recorded_name = recorded[0].get('command') if recorded is not None else None
+        if recorded_name != name:
+            self.divergences.append((self.position, name, recorded_name))
+            return super().execute(cmd)
+        self.position += 1
+        recorded_cmd, response, latency = recorded
+        if response is None:
+            # never claimed in the recorded run
+            return super().execute(cmd)
+        self.handled[name] = self.handled.get(name, 0) + 1
+        if latency and self.time_scale:
+            time.sleep(latency * self.time_scale)
+        return dict(response, id=cmd.get('id', ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Answer pyhamilton bridge commands like the HSL interpreter.')
+    parser.add_argument('--address', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds per command')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--batch-max', type=int, default=1)
+    parser.add_argument('--replay', default=None, help='journal of a recorded session to serve back')
+    parser.add_argument('--time-scale', type=float, default=0.0, help='replay speed; 1 is recorded speed, 0 is flat out')
+    args = parser.parse_args()
+    if args.replay:
+        standin = SessionReplayer(args.replay, args.time_scale, address=args.address, port=args.port,
+                                  batch_max=args.batch_max)
+    else:
+        standin = InterpreterStandIn(args.address, args.port, default_delay=args.delay, error_rate=args.error_rate,
+                                     batch_max=args.batch_max)
+    standin.start()
+    try:
+        while standin.is_alive():
+            standin.join(0.5)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
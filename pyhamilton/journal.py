@@ -0,0 +1,175 @@
+"""JSON-lines journal of commands and responses, written off the command path.
+
+`CommandJournal.record` only appends to an in-memory ring buffer. A background
+thread swaps the buffer for an empty one every `flush_interval` seconds and
+writes everything it took in one `write` + `flush` (group commit), rotating the
+file by size. The swap is the only step that shares a lock with `record`, so
+the command path never waits on the disk.
+
+Each line is one record:
+
+    {"t": 1718000000.123456, "kind": "command", "id": "0x2a", "data": {...}}
+
+where `kind` is `command` (the exact dict sent to the interpreter) or `response`
+(the interpreter's `STAR-return` dict), and `t` is the wall-clock time the record
+was taken. Responses also carry `latency`, the seconds the interpreter spent on
+the command, when it is known. Use `read_journal` to load a journal back, and
+`pyhamilton.interpreter_standin.SessionReplayer` to replay one.
+"""
+from collections import deque
+from threading import Event, Lock, RLock, Thread
+import json
+import logging
+import os
+import time
+
+
+_FILE_LOCKS = {}  # absolute path -> Lock, so journals reopened on one path never interleave writes
+_FILE_LOCKS_LOCK = Lock()
+
+
+def _file_lock(path):
+    with _FILE_LOCKS_LOCK:
+        return _FILE_LOCKS.setdefault(os.path.abspath(path), RLock())
+
+
+class CommandJournal:
+    """Background JSON-lines writer for command and response records.
+
+    Args:
+      path (str): journal file. Appended to if it exists.
+      max_bytes (int): Optional; rotate once the file grows past this size, keeping
+        `backup_count` older files as `path.1` (newest) to `path.<backup_count>`.
+        0 disables rotation. Default is 16 MiB.
+      backup_count (int): Optional; rotated files to keep. Default is 5.
+      buffer_size (int): Optional; records held in memory between flushes. When
+        the writer falls behind, the oldest unwritten records are dropped and
+        counted rather than blocking the command path. Default is 10000.
+      flush_interval (float): Optional; seconds between group commits. Default is 0.2.
+      fsync (bool): Optional; `os.fsync` after every group commit. Default is False.
+    """
+
+    def __init__(self, path, max_bytes=16 * 2 ** 20, backup_count=5, buffer_size=10000, flush_interval=0.2,
+                 fsync=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.logger = logging.getLogger(__name__)
+        self._buffer = deque(maxlen=buffer_size)
+        self._recorded = 0
+        self._taken = 0    # records swapped out of the buffer for writing
+        self._written = 0
+        self._rotations = 0
+        self._write_lock = Lock()  # the buffer and its counters; never held across I/O
+        self._file_lock = _file_lock(path)
+        self._stop = Event()
+        with self._file_lock:
+            self._file = open(path, 'a', encoding='utf-8')
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def record(self, kind, cmd_id, data, latency=None):
+        """Queue a record. `data` is a JSON string or bytes, or any JSON-serializable object.
+
+        Never waits on I/O and does no serialization on the calling thread.
+        """
+        with self._write_lock:
+            self._buffer.append((time.time(), kind, cmd_id, data, latency))
+            self._recorded += 1
+
+    def record_command(self, cmd_id, cmd):
+        self.record('command', cmd_id, cmd)
+
+    def record_response(self, cmd_id, response, latency=None):
+        self.record('response', cmd_id, response, latency)
+
+    def flush(self):
+        """Write out everything recorded so far, from the calling thread."""
+        with self._file_lock:
+            with self._write_lock:
+                records, self._buffer = self._buffer, deque(maxlen=self._buffer.maxlen)
+                self._taken += len(records)
+            if not records:
+                return
+            self._file.write(''.join(self._format(record) for record in records))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._written += len(records)
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def close(self):
+        """Stop the writer thread after a final flush."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        with self._file_lock:
+            self.flush()
+            self._file.close()
+
+    def metrics(self):
+        """Return counters of the journal.
+
+        Keys: `recorded`, `written`, `buffered` (not yet written), `dropped`
+        (overwritten in the ring buffer before they could be written) and `rotations`.
+        """
+        with self._write_lock:
+            buffered = len(self._buffer)
+            return {'recorded': self._recorded, 'written': self._written, 'buffered': buffered,
+                    'dropped': self._recorded - self._taken - buffered, 'rotations': self._rotations}
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                self.logger.exception('command journal: write to ' + str(self.path) + ' failed')
+
+    @staticmethod
+    def _format(record):
+        t, kind, cmd_id, data, latency = record
+        if isinstance(data, (str, bytes)):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                data = data.decode(errors='replace') if isinstance(data, bytes) else data
+        line = {'t': t, 'kind': kind, 'id': cmd_id, 'data': data}
+        if latency is not None:
+            line['latency'] = latency
+        return json.dumps(line) + '\n'
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count:
+            for i in range(self.backup_count - 1, 0, -1):
+                older = '{}.{}'.format(self.path, i)
+                if os.path.exists(older):
+                    os.replace(older, '{}.{}'.format(self.path, i + 1))
+            os.replace(self.path, self.path + '.1')
+        else:
+            os.remove(self.path)
+        self._rotations += 1
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+
+def read_journal(path, include_rotated=False):
+    """Yield the records of a journal file as dicts, oldest first.
+
+    With `include_rotated`, start from the oldest rotated file (`path.N`) that
+    exists and work through to `path`.
+    """
+    paths = [path]
+    if include_rotated:
+        i = 1
+        while os.path.exists('{}.{}'.format(path, i)):
+            paths.insert(0, '{}.{}'.format(path, i))
+            i += 1
+    for journal_path in paths:
+        with open(journal_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
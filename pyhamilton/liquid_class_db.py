@@ -6,8 +6,10 @@ import struct
 from typing import List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
 import collections
+import functools
 import os
 import csv
+import threading
 
 class DispenseMode(Enum):
     # Basic modes
@@ -68,8 +70,24 @@ def _check_access_dialect() -> None:
             "Install with: pip install sqlalchemy-access"
         )
 
+# Process-wide caches, shared by every HamiltonInterface in the process
+_LIQUID_CLASS_ROWS = {}  # (database path, liquid class name, columns) -> (database mtime, row dict)
+_LIQUID_CLASS_ROWS_LOCK = threading.Lock()
+
+def clear_liquid_class_cache() -> None:
+    """Forget cached liquid class rows, e.g. after liquid classes were created or edited."""
+    with _LIQUID_CLASS_ROWS_LOCK:
+        _LIQUID_CLASS_ROWS.clear()
+
+def _database_mtime(mdb_path: str) -> Optional[int]:
+    try:
+        return os.stat(mdb_path).st_mtime_ns
+    except OSError:
+        return None
+
+@functools.lru_cache(maxsize=None)
 def _build_engine(mdb_path: str):
-    """Return a SQLAlchemy Engine for a given Access .mdb/.accdb file."""
+    """Return a SQLAlchemy Engine for a given Access .mdb/.accdb file, one per file per process."""
     _check_access_dialect()
 
     driver = "Microsoft Access Driver (*.mdb, *.accdb)"
@@ -140,16 +158,24 @@ def _get_liquid_class_data(liquid_class_name: str, columns: Union[str, List[str]
         columns: A single column name or a list of column names to retrieve.
         
     Returns:
-        A dictionary of the queried data.
+        A dictionary of the queried data. Rows are cached per process until the
+        database file is modified (e.g. by editing liquid classes in Venus) or
+        `clear_liquid_class_cache()` is called.
         
     Raises:
         ValueError: If the liquid class is not found.
     """
-    cfg = defaults()
-    engine = _build_engine(cfg.liquids_database)
-
     if isinstance(columns, str):
         columns = [columns]
+    cfg = defaults()
+    key = (cfg.liquids_database, liquid_class_name, tuple(columns))
+    mtime = _database_mtime(cfg.liquids_database)
+    with _LIQUID_CLASS_ROWS_LOCK:
+        cached = _LIQUID_CLASS_ROWS.get(key)
+    if cached is not None and mtime is not None and cached[0] == mtime:
+        return dict(cached[1])
+
+    engine = _build_engine(cfg.liquids_database)
 
     select_clause = ", ".join(columns)
     stmt = text(
@@ -163,8 +189,11 @@ def _get_liquid_class_data(liquid_class_name: str, columns: Union[str, List[str]
 
     if row is None:
         raise ValueError(f"No LiquidClass found: {liquid_class_name!r}")
-    
-    return dict(row._mapping)
+
+    data = dict(row._mapping)
+    with _LIQUID_CLASS_ROWS_LOCK:
+        _LIQUID_CLASS_ROWS[key] = (mtime, data)
+    return dict(data)
 
 def check_liquid_class_exists(liquid_class_name: str) -> bool:
     """
@@ -5,7 +5,8 @@ from typing import Dict, Any, Optional, Union
 from .interface import (COPY_LIQ_CLASS, SET_ASP_PARAM, SET_DISP_PARAM, SET_TIP_TYPE, SET_CORR_CURVE,
                         SET_DISP_MODE)
 from .resources.enums import TipType
-from .liquid_class_db import DispenseMode, check_liquid_class_exists, liquid_class_has_parameter, load_liquid_classes
+from .liquid_class_db import (DispenseMode, check_liquid_class_exists, clear_liquid_class_cache, liquid_class_has_parameter,
+                              load_liquid_classes)
 import os
 
 class AspirateParameter(Enum):
@@ -57,6 +58,7 @@ def copy_liquid_class(ham_int, template_liquid_class: str, new_liquid_class: str
                               TemplateLiquidClass=template_liquid_class, 
                               NewLiquidClass=new_liquid_class)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 
 def set_aspirate_parameter(ham_int, liquid_class: str, parameter: AspirateParameter, value: Any):
@@ -66,6 +68,7 @@ def set_aspirate_parameter(ham_int, liquid_class: str, parameter: AspirateParame
                               Parameter=parameter.value, 
                               Value=value)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 
 def set_dispense_parameter(ham_int, liquid_class: str, parameter: DispenseParameter, value: Any):
@@ -75,6 +78,7 @@ def set_dispense_parameter(ham_int, liquid_class: str, parameter: DispenseParame
                               Parameter=parameter.value, 
                               Value=value)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 
 def set_tip_type(ham_int, liquid_class: str, tip_type: int):
@@ -83,6 +87,7 @@ def set_tip_type(ham_int, liquid_class: str, tip_type: int):
                               LiquidClass=liquid_class, 
                               TipType=tip_type)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 def set_dispense_mode(ham_int, liquid_class: str, dispense_mode: int):
     """Set the dispense mode for a liquid class."""
@@ -90,6 +95,7 @@ def set_dispense_mode(ham_int, liquid_class: str, dispense_mode: int):
                               LiquidClass=liquid_class, 
                               DispenseMode=dispense_mode)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 
 def set_correction_curve(ham_int, liquid_class: str, nominal_array: list, corrected_array: list):
@@ -99,6 +105,7 @@ def set_correction_curve(ham_int, liquid_class: str, nominal_array: list, correc
                               NominalArray=nominal_array, 
                               CorrectedArray=corrected_array)
     ham_int.wait_on_response(cid, raise_first_exception=True, timeout=120)
+    clear_liquid_class_cache()
 
 
 
@@ -178,83 +185,88 @@ def create_liquid_class_from_dict(
 
 
 
-    for definition in definitions:
-        new_liquid_class = definition["name"]
+    # Every step below is a fire-and-forget parameter set, so submit them all together
+    # instead of paying a full interpreter round trip per parameter.
+    with ham_int.batch():
+        for definition in definitions:
+            new_liquid_class = definition["name"]
 
-        if not check_liquid_class_exists(new_liquid_class):
-            template_liquid_class = "Tip_50ulFilter_Water_DispenseSurface_Empty"  # default template
-        else:
-            print(f"Liquid class '{new_liquid_class}' already exists. It will be overwritten.")
-            template_liquid_class = new_liquid_class  # overwrite existing
-        parameters = {
-            "aspirate": definition["aspirate"],
-            "dispense": definition["dispense"]
-        }
-        tip_info = definition["tip_type"]
-        dispense_mode_str = definition["dispense_mode"]
-        correction_curve = definition.get("correction_curve")
-
-        # Step 2: Copy the template liquid class
-        copy_liquid_class(ham_int, template_liquid_class, new_liquid_class)
-
-        # Step 3: Set aspirate parameters
-        for param_name, value in parameters["aspirate"].items():
-            try:
-                aspirate_param = AspirateParameter[param_name.upper()]
-                cache_param_name = aspirate_params_to_db.get(param_name.upper())
-                if not liquid_class_has_parameter(new_liquid_class, cache_param_name, value):
-                    set_aspirate_parameter(ham_int, new_liquid_class, aspirate_param, value)
-            except KeyError:
-                print(f"Warning: Unknown aspirate parameter '{param_name}' for '{new_liquid_class}' ignored.")
-
-        # Step 4: Set dispense parameters
-        for param_name, value in parameters["dispense"].items():
-            try:
-                dispense_param = DispenseParameter[param_name.upper()]
-                cache_param_name = dispense_params_to_db.get(param_name.upper())
-                if not liquid_class_has_parameter(new_liquid_class, cache_param_name, value):
-                    set_dispense_parameter(ham_int, new_liquid_class, dispense_param, value)
-            except KeyError:
-                print(f"Warning: Unknown dispense parameter '{param_name}' for '{new_liquid_class}' ignored.")
-
-        # Step 5: Determine and set the tip type
-        volume = tip_info["volume"]
-        has_filter = tip_info["has_filter"]
-
-        selected_tip = None
-        for tip_enum in TipType:
-            if tip_enum.volume == volume:
-                if has_filter == tip_enum.has_filter and not tip_enum.is_needle:
-                    selected_tip = tip_enum
-                    break
-
-        if selected_tip:
-            set_tip_type(ham_int, new_liquid_class, selected_tip.value)
-            print(f"Set tip type to {selected_tip.name} for liquid class '{new_liquid_class}'.")
-        else:
-            raise ValueError(f"Could not find a suitable tip type for volume {volume} with filter={has_filter}.")
-
-        # Step 6: Set dispense mode
-        try:
-            dispense_mode_enum = DispenseMode.from_string(dispense_mode_str)
-            set_dispense_mode(ham_int, new_liquid_class, dispense_mode_enum.to_code())
-            print(f"Set dispense mode to '{dispense_mode_str}' for liquid class '{new_liquid_class}'.")
-        except ValueError as e:
-            raise ValueError(f"Invalid dispense mode for liquid class '{new_liquid_class}': {e}")
-
-        # Step 7: Set correction curve if provided
-        if correction_curve:
-            if "nominal" in correction_curve and "corrected" in correction_curve:
-                set_correction_curve(
-                    ham_int, new_liquid_class,
-                    correction_curve["nominal"],
-                    correction_curve["corrected"]
-                )
-                print(f"Set correction curve for liquid class '{new_liquid_class}'.")
+            if not check_liquid_class_exists(new_liquid_class):
+                template_liquid_class = "Tip_50ulFilter_Water_DispenseSurface_Empty"  # default template
             else:
-                raise ValueError(f"Correction curve for '{new_liquid_class}' requires both 'nominal' and 'corrected' arrays.")
+                print(f"Liquid class '{new_liquid_class}' already exists. It will be overwritten.")
+                template_liquid_class = new_liquid_class  # overwrite existing
+            parameters = {
+                "aspirate": definition["aspirate"],
+                "dispense": definition["dispense"]
+            }
+            tip_info = definition["tip_type"]
+            dispense_mode_str = definition["dispense_mode"]
+            correction_curve = definition.get("correction_curve")
+
+            # Step 2: Copy the template liquid class
+            copy_liquid_class(ham_int, template_liquid_class, new_liquid_class)
+
+            # Step 3: Set aspirate parameters
+            for param_name, value in parameters["aspirate"].items():
+                try:
+                    aspirate_param = AspirateParameter[param_name.upper()]
+                    cache_param_name = aspirate_params_to_db.get(param_name.upper())
+                    if not liquid_class_has_parameter(new_liquid_class, cache_param_name, value):
+                        set_aspirate_parameter(ham_int, new_liquid_class, aspirate_param, value)
+                except KeyError:
+                    print(f"Warning: Unknown aspirate parameter '{param_name}' for '{new_liquid_class}' ignored.")
+
+            # Step 4: Set dispense parameters
+            for param_name, value in parameters["dispense"].items():
+                try:
+                    dispense_param = DispenseParameter[param_name.upper()]
+                    cache_param_name = dispense_params_to_db.get(param_name.upper())
+                    if not liquid_class_has_parameter(new_liquid_class, cache_param_name, value):
+                        set_dispense_parameter(ham_int, new_liquid_class, dispense_param, value)
+                except KeyError:
+                    print(f"Warning: Unknown dispense parameter '{param_name}' for '{new_liquid_class}' ignored.")
+
+            # Step 5: Determine and set the tip type
+            volume = tip_info["volume"]
+            has_filter = tip_info["has_filter"]
+
+            selected_tip = None
+            for tip_enum in TipType:
+                if tip_enum.volume == volume:
+                    if has_filter == tip_enum.has_filter and not tip_enum.is_needle:
+                        selected_tip = tip_enum
+                        break
+
+            if selected_tip:
+                set_tip_type(ham_int, new_liquid_class, selected_tip.value)
+                print(f"Set tip type to {selected_tip.name} for liquid class '{new_liquid_class}'.")
+            else:
+                raise ValueError(f"Could not find a suitable tip type for volume {volume} with filter={has_filter}.")
 
-        print(f"Successfully configured liquid class '{new_liquid_class}' from template '{template_liquid_class}'.")
+            # Step 6: Set dispense mode
+            try:
+                dispense_mode_enum = DispenseMode.from_string(dispense_mode_str)
+                set_dispense_mode(ham_int, new_liquid_class, dispense_mode_enum.to_code())
+                print(f"Set dispense mode to '{dispense_mode_str}' for liquid class '{new_liquid_class}'.")
+            except ValueError as e:
+                raise ValueError(f"Invalid dispense mode for liquid class '{new_liquid_class}': {e}")
+
+            # Step 7: Set correction curve if provided
+            if correction_curve:
+                if "nominal" in correction_curve and "corrected" in correction_curve:
+                    set_correction_curve(
+                        ham_int, new_liquid_class,
+                        correction_curve["nominal"],
+                        correction_curve["corrected"]
+                    )
+                    print(f"Set correction curve for liquid class '{new_liquid_class}'.")
+                else:
+                    raise ValueError(f"Correction curve for '{new_liquid_class}' requires both 'nominal' and 'corrected' arrays.")
+
+            print(f"Successfully configured liquid class '{new_liquid_class}' from template '{template_liquid_class}'.")
+    # the batch has now run; drop rows cached while it was being built
+    clear_liquid_class_cache()
 
 
 def create_liquid_class_from_json(
@@ -11,10 +11,12 @@ from threading import Thread
 from .interface import HamiltonInterface
 from .resources.deckresource import LayoutManager, ResourceType, Plate24, Plate96, Tip96, resource_list_with_prefix, layout_item, DeckResource
 from .oemerr import PositionError
+from .reformatting import QUADRANTS_96_TO_384, QUADRANTS_384_TO_1536, split_wells
 from .interface import (INITIALIZE, PICKUP, EJECT, ASPIRATE, DISPENSE, ISWAP_GET, ISWAP_PLACE, HEPA,
 WASH96_EMPTY, PICKUP96, EJECT96, ASPIRATE96, DISPENSE96, ISWAP_MOVE, MOVE_SEQ, TILT_INIT, TILT_MOVE, GRIP_GET,
 GRIP_MOVE, GRIP_PLACE, SET_ASP_PARAM, SET_DISP_PARAM, COPY_LIQ_CLASS, SET_CORR_CURVE, SET_TIP_TYPE, SET_LABWARE_PROPERTY)
 from .resources.managed_resources import TrackedTips
+from .resources.tip_allocation import get_tip_policy
 from typing import List, Tuple
 from .defaults import defaults
 from .resources.enums import TipType
@@ -32,30 +34,29 @@ def compound_pos_str(pos_tuples):
     return ';'.join((labware_pos_str(labware, idx) for labware, idx in present_pos_tups))
 
 def compound_pos_str_96(labware96):
-    return ';'.join((labware_pos_str(labware96, idx) for idx in range(96)))
+    return labware96.compound_position_str(range(96))
 
 def cells_384_to_1536(well, idx):
-    return (well%16)*2+(well//16)*64+idx%2+(idx//2)*32
+    return int(QUADRANTS_384_TO_1536[idx, well])
 
 def cells_96_to_384(well, idx):
-    return well*2+idx%2+(idx//2)*16+16*(well//8)
+    return int(QUADRANTS_96_TO_384[idx, well])
 
 def wells_384_to_96(x):
-    plate = x%2 + 2*((x//16)%2)
-    well = x//2 - (x//16)*8 + (x//32)*8
-    return plate, well
+    plate, well = split_wells(x)
+    return int(plate), int(well)
 
 def get_cells_from_position_384(well):
-    return [cells_384_to_1536(well, i) for i in range(4)]
+    return QUADRANTS_384_TO_1536[:, well].tolist()
 
 def get_cells_from_position_96(well):
-    return [cells_96_to_384(well, i) for i in range(4)]
+    return QUADRANTS_96_TO_384[:, well].tolist()
 
 def get_384w_quadrant(quadrant):
-    return [cells_96_to_384(idx, quadrant) for idx in range(96)]
+    return QUADRANTS_96_TO_384[quadrant].tolist()
     
 def compound_pos_str_384_quad(labware384, quadrant):
-    return ';'.join((labware_pos_str(labware384, idx) for idx in get_384w_quadrant(quadrant)))
+    return HamiltonInterface._compound_pos_str_384_quad(labware384, quadrant)
 
 
 def initialize(ham, asynch=False):
@@ -249,21 +250,30 @@ def move_plate_using_gripper(ham_int: HamiltonInterface, source: str, destinatio
 
     ham_int.place_plate_gripper_seq(destination, tool_sequence=tool_sequence, ejectToolWhenFinish=ejectToolWhenFinish)
 
-def tracked_tip_pick_up(ham_int: HamiltonInterface, tips_tracker: TrackedTips, n: int) -> List[Tuple[DeckResource, int]]:
+def tracked_tip_pick_up(ham_int: HamiltonInterface, tips_tracker: TrackedTips, n: int, policy=None,
+                        lmgr: LayoutManager = None) -> List[Tuple[DeckResource, int]]:
     """
     Pick up `n` tips from the tracker, marking them as occupied.
     Returns a list of (DeckResource, position_within_rack).
+
+    `policy` chooses the tips: a `FlatOrderPolicy` subclass or instance, or a
+    name in `TIP_POLICIES` ('flat', 'column', 'rack', 'travel'). Default is the
+    tracker's index order. A class or name is instantiated with `lmgr` (by
+    default the tracker's layout) once per tracker, and reused by later calls.
     """
 
 
     if n > tips_tracker.count_remaining():
         raise ValueError(f"Only {tips_tracker.count_remaining()} tips available; {n} requested.")
     
-    tips_poss = tips_tracker.fetch_next(n)
+    if policy is None:
+        tips_poss = tips_tracker.fetch_next(n)
+    else:
+        tips_poss = get_tip_policy(policy, lmgr, tips_tracker).fetch(tips_tracker, n)
     try:
         ham_int.tip_pick_up(tips_poss)
     except Exception as e:
-        tips_tracker.mark_occupied(tips_poss)
+        tips_tracker.replace_tips(tips_poss)
         raise e
     return tips_poss
 
@@ -329,6 +339,7 @@ def normal_logging(ham_int, method_local_dir):
         logging.info(banner_line)
     ham_int.set_log_dir(os.path.join(local_log_dir, 'hamilton.log'))
     ham_int.json_logger.set_log_dir(os.path.join(local_log_dir, 'robot_json.log'))
+    ham_int.json_logger.set_journal(os.path.join(local_log_dir, 'robot_journal.jsonl'))
 
 
 def run_async(funcs):
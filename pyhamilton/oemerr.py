@@ -50,6 +50,12 @@ class HamiltonReturnParseError(HamiltonInterfaceError):
     """
     pass
 
+class HamiltonQueueFullError(HamiltonInterfaceError):
+    """
+    The command send queue stayed full for longer than the backpressure timeout.
+    """
+    pass
+
 ########################################################
 ### BEGIN HAMILTON CODED STEP ERRORS, CODE MAP BELOW ###
 ########################################################
@@ -3,7 +3,7 @@ from ..consumables import tracked_volume_aspirate, tracked_volume_aspirate_96
 import time
 from ..liquid_class_db import get_liquid_class_volume
 from ..interface import HamiltonInterface
-from ..resources import DeckResource, LayoutManager, StackedResources, TrackedTips, TipSupportTracker
+from ..resources import DeckResource, LayoutManager, StackedResources, TrackedTips, TipSupportTracker, get_tip_policy
 from ..liquid_handling_wrappers import normal_logging, tip_support_pickup_columns, tracked_tip_pick_up, tracked_tip_pick_up_96
 from typing import List, Tuple, Iterable, List
 
@@ -159,7 +159,8 @@ def set_parallel_nones(positions, reference):
 def pip_transfer(ham_int: HamiltonInterface, tips: List[Tuple[DeckResource, int]] | TrackedTips, source_positions: List[Tuple[DeckResource, int]], 
                     dispense_positions: List[Tuple[DeckResource, int]], volumes: List[float], liquid_class: str, prewet_cycles=0,
                     mix_cycles=0, prewet_volume=0, vol_mix_dispense=0, aspiration_height=0,
-                    dispense_height=0, submerge_depth=2, liquid_following_aspiration=False, liquid_following_dispense=False):
+                    dispense_height=0, submerge_depth=2, liquid_following_aspiration=False, liquid_following_dispense=False,
+                    tip_policy=None, lmgr: LayoutManager = None):
     '''
     Transfer liquid from source positions to dispense positions using pipetting. Handles pipetting logic for
     unmatched lengths of source and dispense positions.
@@ -176,6 +177,13 @@ def pip_transfer(ham_int: HamiltonInterface, tips: List[Tuple[DeckResource, int]
         Example: [ (dest_plate, 1), (dest_plate, 2), (dest_plate, 3)... ]
 
     - volumes: List of volumes to dispense (should be matched to dispense_positions)
+
+    - tip_policy: Optional tip allocation policy for a TrackedTips instance, as taken by tracked_tip_pick_up
+
+        Example: 'column', or MinimumTravelPolicy(lmgr) to read its move counts afterwards
+
+    - lmgr: Optional LayoutManager the tip racks come from, for a tip_policy given by name or class.
+      Defaults to the layout of the TrackedTips instance.
     '''
 
     liquid_class_vol_capacity = get_liquid_class_volume(liquid_class, nominal=True)  # Fetch the volume for the liquid class
@@ -189,6 +197,9 @@ def pip_transfer(ham_int: HamiltonInterface, tips: List[Tuple[DeckResource, int]
     if len(source_positions) > 8:
         raise ValueError("Source positions cannot exceed 8 with single aspiration.")
 
+    if tip_policy is not None and isinstance(tips, TrackedTips):
+        tip_policy = get_tip_policy(tip_policy, lmgr, tips) # kept on the tracker, so travel and move counts carry over
+
     aspirate_capacitative_LLD = 1 if aspiration_height == 0 else 0
 
     total_volume_needed = 0 # Calculate total volume needed for the transfer
@@ -204,7 +215,7 @@ def pip_transfer(ham_int: HamiltonInterface, tips: List[Tuple[DeckResource, int]
     for column, column_volumes in zip(column_dispense_positions, column_volumes_list):
         if isinstance(tips, TrackedTips):
             num_tips = len([pos for pos in column if pos is not None])
-            tracked_tip_pick_up(ham_int, tips, num_tips)
+            tracked_tip_pick_up(ham_int, tips, num_tips, policy=tip_policy)
         else:
             ham_int.tip_pick_up(tips)
 
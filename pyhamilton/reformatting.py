@@ -0,0 +1,240 @@
+"""Well index maps between 96, 384 and 1536 well plates, and reformatting plans.
+
+Wells are numbered the way `position_id` numbers them: down each column first,
+so well `i` of a plate with `r` rows is in column `i // r`, row `i % r`. A
+384-well plate interleaves four 96-well quadrants. Quadrant `q` holds the wells
+at row offset `q % 2` and column offset `q // 2`, so quadrant 0 starts at A1,
+1 at B1, 2 at A2 and 3 at B2. A 1536-well plate is made of four 384-well
+quadrants in the same way, and of sixteen 96-well slots through both steps.
+
+The maps are NumPy arrays, built once at import and read-only. Plans for many
+plates index into them instead of computing wells one at a time:
+
+    for stamp in compression_plan(plates_96, plates_384):
+        ham_int.wait_on_response(ham_int.send_command(ASPIRATE96,
+            labwarePositions=stamp.source_positions(), aspirateVolume=10, liquidClass=lc))
+        ham_int.wait_on_response(ham_int.send_command(DISPENSE96,
+            labwarePositions=stamp.target_positions(), dispenseVolume=10, liquidClass=lc))
+
+    for step in cherry_pick_plan(sources, targets, volumes):
+        ham_int.aspirate(step.sources, step.volumes, liquidClass=lc)
+        ham_int.dispense(step.targets, step.volumes, liquidClass=lc)
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+FORMATS = {96: (8, 12), 384: (16, 24), 1536: (32, 48)} # wells: (rows, columns)
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def _quadrant_map(small):
+    """`(4, small)` array of the wells of the next larger format that hold each quadrant."""
+    rows, _ = FORMATS[small]
+    column, row = np.divmod(np.arange(small), rows)
+    quadrant = np.arange(4)[:, None]
+    return _read_only((2 * column + quadrant // 2) * (2 * rows) + 2 * row + quadrant % 2)
+
+
+QUADRANTS_96_TO_384 = _quadrant_map(96)
+QUADRANTS_384_TO_1536 = _quadrant_map(384)
+
+# (small, big): (slots, small) array, the big-plate well of each well of the plate in each slot
+_PLACEMENTS = {
+    (96, 384): QUADRANTS_96_TO_384,
+    (384, 1536): QUADRANTS_384_TO_1536,
+    # slot 4 * q1536 + q384
+    (96, 1536): _read_only(QUADRANTS_384_TO_1536[:, QUADRANTS_96_TO_384].reshape(16, 96)),
+}
+
+# wells the 96-head reaches in one step, in channel order, as (steps, 96) arrays
+HEAD_96_STEPS = {
+    96: _read_only(np.arange(96)[None, :]),
+    384: QUADRANTS_96_TO_384,
+    1536: _PLACEMENTS[96, 1536],
+}
+
+
+def _inverse(placement):
+    """The slot and small-plate well of every big-plate well, from a placement map."""
+    slots, small = placement.shape
+    slot_of = np.empty(slots * small, dtype=placement.dtype)
+    well_of = np.empty(slots * small, dtype=placement.dtype)
+    slot_of[placement] = np.arange(slots)[:, None]
+    well_of[placement] = np.arange(small)[None, :]
+    return _read_only(slot_of), _read_only(well_of)
+
+
+_INVERSES = {formats: _inverse(placement) for formats, placement in _PLACEMENTS.items()}
+
+# the big-plate wells of each 96-head step of a small plate in each slot: (slots, steps, 96)
+_STAMPS = {(small, big): _read_only(placement[:, HEAD_96_STEPS[small]])
+           for (small, big), placement in _PLACEMENTS.items()}
+
+
+def _placement(small, big):
+    try:
+        return _PLACEMENTS[small, big]
+    except KeyError:
+        raise ValueError('No well map from ' + str(small) + ' to ' + str(big) + ' well plates') from None
+
+
+def quadrant_wells(quadrant, small=96, big=384):
+    """The wells of a `big`-well plate that hold slot `quadrant` of `small`-well plates.
+
+    Entry `i` is where well `i` of the smaller plate goes. For 96 into 1536 wells
+    the 16 slots are numbered `4 * <1536 quadrant> + <384 quadrant>`.
+    """
+    return _placement(small, big)[quadrant]
+
+
+def split_wells(wells, small=96, big=384):
+    """The `(slots, wells)` of `small`-well plates that wells of a `big`-well plate come from.
+
+    Accepts one well index or an array of them, and returns the same shape.
+    """
+    _placement(small, big)
+    slot_of, well_of = _INVERSES[small, big]
+    return slot_of[wells], well_of[wells]
+
+
+def _format_of(plates):
+    sizes = {plate._num_items for plate in plates}
+    if len(sizes) != 1:
+        raise ValueError('Plates to reformat must all have the same number of wells, not ' + str(sorted(sizes)))
+    return sizes.pop()
+
+
+@dataclass
+class HeadTransfer:
+    """One 96-head aspirate and dispense: `source_wells[i]` goes to `target_wells[i]` on channel `i`."""
+    source: object
+    source_wells: np.ndarray
+    target: object
+    target_wells: np.ndarray
+
+    def source_positions(self):
+        """`labwarePositions` of the aspirate step."""
+        return self.source.compound_position_str(self.source_wells.tolist())
+
+    def target_positions(self):
+        """`labwarePositions` of the dispense step."""
+        return self.target.compound_position_str(self.target_wells.tolist())
+
+
+@dataclass
+class ChannelTransfer:
+    """One aspirate and dispense on the independent channels.
+
+    `sources`, `targets` and `volumes` have one entry per channel, `None` for
+    channels left out, as taken by `HamiltonInterface.aspirate` and `dispense`.
+    """
+    sources: list
+    targets: list
+    volumes: list
+
+
+def compression_plan(sources, targets):
+    """96-head steps that combine smaller plates into larger ones.
+
+    Plate `i` of `sources` goes into slot `i % n` of `targets[i // n]`, where `n`
+    is 4 for 96 into 384 and 384 into 1536 wells, and 16 for 96 into 1536.
+
+    Args:
+      sources (list): plates of one format, e.g. `Plate96`s.
+      targets (list): plates of a larger format, enough to take all `sources`.
+
+    Returns:
+      list of `HeadTransfer`, grouped by source plate.
+    """
+    small, big = _format_of(sources), _format_of(targets)
+    _placement(small, big)
+    stamps = _STAMPS[small, big]
+    slots = stamps.shape[0]
+    if len(sources) > slots * len(targets):
+        raise ValueError(str(len(sources)) + ' plates do not fit in ' + str(len(targets)) + ' target plates')
+    steps = HEAD_96_STEPS[small]
+    return [HeadTransfer(source, steps[step], targets[i // slots], stamps[i % slots, step])
+            for i, source in enumerate(sources) for step in range(len(steps))]
+
+
+def expansion_plan(sources, targets):
+    """96-head steps that split larger plates back into smaller ones; the reverse of `compression_plan`.
+
+    Slot `i % n` of `sources[i // n]` goes to plate `i` of `targets`.
+    """
+    small, big = _format_of(targets), _format_of(sources)
+    _placement(small, big)
+    stamps = _STAMPS[small, big]
+    slots = stamps.shape[0]
+    if len(targets) > slots * len(sources):
+        raise ValueError(str(len(sources)) + ' source plates fill only ' + str(slots * len(sources))
+                         + ' target plates')
+    steps = HEAD_96_STEPS[small]
+    return [HeadTransfer(sources[i // slots], stamps[i % slots, step], target, steps[step])
+            for i, target in enumerate(targets) for step in range(len(steps))]
+
+
+def _column_row(res, idx):
+    try:
+        return res.well_coords(idx)
+    except NotImplementedError:
+        return 0, idx  # labware without a well grid: one column
+
+
+def cherry_pick_plan(source_positions, target_positions, volumes=None, channels=8):
+    """Channel steps for arbitrary well-to-well transfers.
+
+    Transfers are sorted by source plate, column and row, and each source column
+    is taken `channels` wells at a time, so a full 96-well column is one step.
+    A source well listed more than once is aspirated again in a later step, never
+    by two channels of the same step.
+
+    Args:
+      source_positions (list): `(resource, index)` of each transfer's source.
+      target_positions (list): `(resource, index)` of each transfer's target.
+      volumes (list): Optional; volume of each transfer. Default is `None` for all.
+      channels (int): Optional; independent channels to use. Default is 8.
+
+    Returns:
+      list of `ChannelTransfer` with `channels` entries each.
+    """
+    n = len(source_positions)
+    if len(target_positions) != n or (volumes is not None and len(volumes) != n):
+        raise ValueError('Cherry-pick sources, targets and volumes must have the same length')
+    if not n:
+        return []
+    plate_ids = {}
+    plate_of = np.fromiter((plate_ids.setdefault(id(res), len(plate_ids)) for res, _ in source_positions),
+                           dtype=np.intp, count=n)
+    coords = np.array([_column_row(res, idx) for res, idx in source_positions], dtype=np.intp).reshape(n, 2)
+    column, row = coords[:, 0], coords[:, 1]
+    # the k-th transfer listed out of a well goes in the k-th pass over its column
+    by_well = np.lexsort((row, column, plate_of))
+    well = np.stack((plate_of[by_well], column[by_well], row[by_well]))
+    new_well = np.ones(n, dtype=bool)
+    new_well[1:] = np.any(well[:, 1:] != well[:, :-1], axis=0)
+    repeat = np.empty(n, dtype=np.intp)
+    repeat[by_well] = np.arange(n) - np.maximum.accumulate(np.where(new_well, np.arange(n), 0))
+    order = np.lexsort((row, repeat, column, plate_of))
+
+    # restart the channel count at every new source column and pass, and start a new step every `channels` transfers
+    group = np.stack((plate_of[order], column[order], repeat[order]))
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = np.any(group[:, 1:] != group[:, :-1], axis=0)
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(n), 0))
+    channel = (np.arange(n) - group_start) % channels
+    new_step = new_group | (channel == 0)
+    step = np.cumsum(new_step) - 1
+
+    plan = [ChannelTransfer([None] * channels, [None] * channels, [None] * channels)
+            for _ in range(int(step[-1]) + 1)]
+    for i, s, ch in zip(order.tolist(), step.tolist(), channel.tolist()):
+        plan[s].sources[ch] = source_positions[i]
+        plan[s].targets[ch] = target_positions[i]
+        plan[s].volumes[ch] = None if volumes is None else volumes[i]
+    return plan
@@ -1,3 +1,4 @@
 from .enums import *
 from .managed_resources import *
-from .deckresource import *
\ No newline at end of file
+from .deckresource import *
+from .tip_allocation import *
\ No newline at end of file
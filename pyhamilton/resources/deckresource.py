@@ -5,8 +5,11 @@ Module `pyhamilton.deckresource` provides convenience classes and methods for in
 """
 import string, shutil, os, string, re
 from datetime import datetime
+from functools import cached_property
 from pyhamilton import OEM_LAY_PATH, LAY_BACKUP_DIR
 from ..oemerr import ResourceUnavailableError
+from .layout_cache import LayoutCache
+from .layout_model import LayoutModel
 from typing import List, Tuple, Union
 
 
@@ -48,13 +51,19 @@ class ResourceType:
     def __init__(self, resource_class, *args):
         self.resource_class = resource_class
         self.not_found_msg = None
+        # set when LayoutManager can look matches up in its indexes instead of testing every line
+        self.name = None
+        self.prefix = None
         try:
             specific_name, = args
             self.test = lambda line: specific_name in re.split(r'\W', line)
             self.extract_name = lambda line: specific_name
+            self.name = specific_name
             self.not_found_msg = 'No exact match for name "' + specific_name + '" to assign a resource of type ' + resource_class.__name__
         except ValueError:
             self.test, self.extract_name = args
+            if self.extract_name is LayoutManager.name_from_line:
+                self.prefix = getattr(self.test, 'prefix', None)
 
 
 class LayoutManager:
@@ -129,41 +138,61 @@ class LayoutManager:
     def line_has_prefixed_name(prefix):
         def has_prefix(line):
             return LayoutManager.field_starts_with(LayoutManager.name_from_line(line), prefix)
+        has_prefix.prefix = prefix
         return has_prefix
 
+    # bytes that are not 7-bit ASCII are dropped from layout files, as are the
+    # partial characters they would otherwise decode to
+    _NON_ASCII_BYTES = bytes(range(0x80, 0x100))
+    _LAYFILE_DELIMITERS = re.compile('[\n\r\t]')
+
     @staticmethod
     def _read_layfile_lines(layfile_path):
-        buff = ''
-        lines = []
+        """Return the text lines of a layout file, split at every newline, carriage return and tab.
+
+        Lines are stripped of surrounding whitespace, except the unterminated last one.
+        """
         with open(layfile_path, 'rb') as f:
-            for c in f.read():
-                try:
-                    c = bytes([c]).decode('utf-8')
-                except UnicodeDecodeError:
-                    continue
-                buff += c
-                if c in '\n\r\t':
-                    lines.append(buff.strip())
-                    buff = ''
-        if buff:
-            lines.append(buff)
+            text = f.read().translate(None, LayoutManager._NON_ASCII_BYTES).decode('ascii')
+        parts = LayoutManager._LAYFILE_DELIMITERS.split(text)
+        lines = [part.strip() for part in parts[:-1]]
+        if parts[-1]:
+            lines.append(parts[-1])
         return lines
 
     @staticmethod
-    def _layfile_checksum(layfile_path):
-        lay_lines = LayoutManager._read_layfile_lines(layfile_path)
+    def _checksum_from_lines(lay_lines):
         return lay_lines[-1].split('checksum=')[1].split('$$')[0]
 
+    @staticmethod
+    def _layfile_checksum(layfile_path):
+        # the checksum is on the last line, so only the end of the file is read when possible
+        with open(layfile_path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 4096))
+            tail = f.read()
+        parts = LayoutManager._LAYFILE_DELIMITERS.split(
+                tail.translate(None, LayoutManager._NON_ASCII_BYTES).decode('ascii'))
+        if len(tail) < size and (len(parts) < 2 or len(parts) < 3 and not parts[-1]):
+            return LayoutManager._checksum_from_lines(LayoutManager._read_layfile_lines(layfile_path))
+        return LayoutManager._checksum_from_lines([parts[-1] or parts[-2].strip()])
+
     @staticmethod
     def layfiles_equal(lay_path_1, lay_path_2):
         return LayoutManager._layfile_checksum(lay_path_1) == LayoutManager._layfile_checksum(lay_path_2)
 
-    def __init__(self, layfile_path, install=True):
-        self.lines = self._read_layfile_lines(layfile_path)
-        self.resources = {}
+    def __init__(self, layfile_path, install=True, use_cache=True):
         self.checksum = self._layfile_checksum(layfile_path)
+        self._cache = LayoutCache(self.checksum, os.path.getsize(layfile_path)) if use_cache else None
+        self.lines = self._cache.load() if use_cache else None
+        if self.lines is None:
+            self.lines = self._read_layfile_lines(layfile_path)
+            if use_cache:
+                self._cache.store(self.lines)
+        self.model = LayoutModel(self.lines, LayoutManager.name_from_line)
+        self.resources = {}
         self._managers[self.checksum] = self
-        if install and not LayoutManager.layfiles_equal(layfile_path, OEM_LAY_PATH):
+        if install and self.checksum != LayoutManager._layfile_checksum(OEM_LAY_PATH):
                 print('BACKING UP AND INSTALLING NEW LAYFILE')
                 shutil.copy2(layfile_path, os.path.join(LAY_BACKUP_DIR, datetime.today().strftime('%Y%m%d_%H%M%S_') + os.path.basename(layfile_path)))
                 shutil.copy2(layfile_path, OEM_LAY_PATH)
@@ -191,13 +220,8 @@ class LayoutManager:
             order_key = lambda r: r.layout_name()
         if not isinstance(restype, ResourceType):
             raise TypeError('Must provide a ResourceType to be assigned')
-        matching_ress = []
-        for line in self.lines:
-            if restype.test(line):
-                match_name = restype.extract_name(line)
-                if match_name in self.resources:
-                    continue
-                matching_ress.append(restype.resource_class(match_name))
+        matching_ress = [restype.resource_class(match_name) for match_name in self._matching_names(restype)
+                         if match_name not in self.resources]
         if not matching_ress:
             msg = restype.not_found_msg or 'No unassigned resource of type ' + restype.resource_class.__name__ + ' available'
             raise ResourceUnavailableError(msg)
@@ -215,6 +239,25 @@ class LayoutManager:
         self.resources[new_res.layout_name()] = new_res
         return new_res
 
+    def has_name(self, name):
+        """Return `True` if `name` appears anywhere in the layout file.
+
+        A quick existence check for names used without assigning a resource,
+        e.g. the members of a `StackedResources` stack; uses the layout's word
+        index rather than scanning every line.
+        """
+        return self.model.contains(name)
+
+    def _matching_names(self, restype):
+        """Names matched by `restype`, without repeats, in the order of their first matching line."""
+        if restype.name is not None:
+            return [restype.name] if self.model.has_word(restype.name) else []
+        if restype.prefix is not None:
+            matches = (name for _, name in self.model.names_with_prefix(restype.prefix))
+        else:
+            matches = (restype.extract_name(line) for line in self.lines if restype.test(line))
+        return list(dict.fromkeys(matches))
+
     def verify_position_ids(self, resource):
         """Verify that position IDs in layout file match resource.position_id() output.
         
@@ -236,15 +279,12 @@ class LayoutManager:
             # These exceptions are fine - just means there are positions, we'll verify them
             pass
         
-        # Find the line with this resource
-        target_line = self._find_resource_line(layout_name)
+        # Position IDs of this resource in the layout file, None if it has no line
+        layout_pos_ids = self._layout_position_ids(layout_name)
         
-        if not target_line:
+        if layout_pos_ids is None:
             return False, [f"No layout line found for resource {layout_name}"]
         
-        # Extract position IDs from the line
-        layout_pos_ids = self._extract_position_ids_from_line(target_line, layout_name)
-        
         # Generate expected position IDs from the resource
         expected_pos_ids = []
         if hasattr(resource, '_num_items'):
@@ -276,40 +316,22 @@ class LayoutManager:
         
         return True, []
 
+    def _layout_position_ids(self, layout_name):
+        """Return the position IDs listed for `layout_name`, from the layout cache if there."""
+        if self._cache is not None and layout_name in self._cache.position_ids:
+            return self._cache.position_ids[layout_name]
+        target_line = self._find_resource_line(layout_name)
+        pos_ids = self._extract_position_ids_from_line(target_line, layout_name) if target_line else None
+        if self._cache is not None:
+            self._cache.add_position_ids(layout_name, pos_ids)
+        return pos_ids
+
     def _find_resource_line(self, resource_name):
         """Find the line(s) containing position IDs for a given resource name."""
-        
-        matching_lines = []
-        
-        # Pattern 1: ObjId and name on same line (most common case)
-        obj_pattern = rf"ObjId[\s\x00-\x1f]*{re.escape(resource_name)}(?:[\s\x00-\x1f]|Seq)"
-        for i, line in enumerate(self.lines):
-            if re.search(obj_pattern, line):
-                matching_lines.append(line)
-        
-        # Pattern 2: Line starts with resource name (tab-split case)
-        # The resource name is at the start because tab split it from "ObjId" on previous line
-        start_pattern = rf"^{re.escape(resource_name)}[\s\x00-\x1f]"
-        for i, line in enumerate(self.lines):
-            if re.search(start_pattern, line) and 'PosId' in line:
-                matching_lines.append(line)
-        
-        if matching_lines:
-            if len(matching_lines) == 1:
-                return matching_lines[0]
-            else:
-                # Multiple lines - concatenate
-                merged = ''.join(matching_lines)
-                return merged
-        
-        # Fallback: Name pattern
-        name_pattern = rf"Seq\.\d+\.Name[\s\x00-\x1f]*{re.escape(resource_name)}(?:[\s\x00-\x1f]+|(?=Seq))"
-        for i, line in enumerate(self.lines):
-            if re.search(name_pattern, line):
-                return line
-        
-        print(f"No matching patterns found!")
-        return None
+        line = self.model.find_resource_line(resource_name)
+        if line is None:
+            print(f"No matching patterns found!")
+        return line
 
     @staticmethod
     def _extract_position_ids_from_line(line, obj_id):
@@ -368,6 +390,21 @@ class Vessel(ResourceIterItem):
         return sum((ml if direction == Vessel.ADD else -ml) for direction, ml, _ in self.history)
 
 
+def _grid_tables(num_items, rows, row_labels=None):
+    """Lookup tables for labware whose positions fill down columns of `rows` positions.
+
+    Returns `(well_coords, position_ids)`: the `(column, row)` of every index, and
+    its id, letter-number like `'A1'` if `row_labels` are given, else `'1'`, `'2'`, ...
+    Built once per class and shared by all its instances.
+    """
+    well_coords = tuple((i // rows, i % rows) for i in range(num_items))
+    if row_labels is None:
+        position_ids = tuple(str(i + 1) for i in range(num_items))
+    else:
+        position_ids = tuple(row_labels[y] + str(x + 1) for x, y in well_coords)
+    return well_coords, position_ids
+
+
 class DeckResource:
 
     class align:
@@ -377,11 +414,24 @@ class DeckResource:
     class types:
         TIP, VESSEL = range(2)
 
+    # class-level tables from _grid_tables; None for labware without positions
+    _WELL_COORDS = None
+    _POSITION_IDS = None
+
     def __init__(self, layout_name):
         raise NotImplementedError()
 
-    def _alignment_delta(self, int_start, int_end):
-        raise NotImplementedError() # (delta x, delta y, alignment properties list)
+    @cached_property
+    def _items(self):
+        # built on first use, so unused labware does not hold one object per position
+        item_class = Tip if self.resource_type == DeckResource.types.TIP else Vessel
+        return [item_class(self, i) for i in range(self._num_items)]
+
+    def _alignment_delta(self, start, end):
+        [self._assert_idx_in_range(p) for p in (start, end)]
+        xs, ys = self.well_coords(start)
+        xe, ye = self.well_coords(end)
+        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
 
     def _assert_idx_in_range(self, idx_or_vessel):
         if isinstance(idx_or_vessel, Vessel):
@@ -399,6 +449,12 @@ class DeckResource:
         """
         return self._layout_name # default; override if needed. (str) 
 
+    def well_coords(self, idx):
+        if self._WELL_COORDS is None:
+            raise NotImplementedError()
+        self._assert_idx_in_range(idx)
+        return self._WELL_COORDS[int(idx)]
+
     def position_id(self, idx):
         """The identifier used for one of a sequence of positions inside this labware.
 
@@ -418,7 +474,23 @@ class DeckResource:
         Raises:
           NotImplementedError: The deck resource does not have positions.
         """
-        raise NotImplementedError()
+        if self._POSITION_IDS is None:
+            raise NotImplementedError()
+        self._assert_idx_in_range(idx)
+        return self._POSITION_IDS[int(idx)]
+
+    def compound_position_str(self, idxs):
+        """The position string of commands that address positions `idxs` of this resource.
+
+        Entries are `'<layout name>, <position id>'` joined with `';'`. Strings are
+        cached per index set, so e.g. 96-head commands do not rebuild them.
+        """
+        name = self.layout_name()
+        key = name, tuple(idxs)
+        cache = self.__dict__.setdefault('_compound_pos_strs', {})
+        if key not in cache:
+            cache[key] = ';'.join(name + ', ' + self.position_id(idx) for idx in key[1])
+        return cache[key]
 
     def alignment_delta(self, start, end):
         args = {'start':start, 'end':end}
@@ -450,10 +522,8 @@ class DeckResource:
 class Standard96(DeckResource):
     """Labware types with 96 positions that use a letter-number id scheme like `'A1'`.
     """
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//8, int(idx)%8
+    _num_items = 96
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(96, 8, 'ABCDEFGH')
 
     def _alignment_delta(self, start, end):
         [self._assert_idx_in_range(p) for p in (start, end)]
@@ -462,47 +532,28 @@ class Standard96(DeckResource):
         return (xe - xs, ye - ys, [DeckResource.align.STD_96]
                                   + ([DeckResource.align.VERTICAL] if xs == xe and ys != ye else []))
 
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        return 'ABCDEFGH'[y] + str(x + 1)
-
 
 class Tip96(Standard96):
+    # tips use 1-indexed int ids descending columns first
+    _POSITION_IDS = _grid_tables(96, 8)[1]
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 96
         self.resource_type = DeckResource.types.TIP
-        self._items = [Tip(self, i) for i in range(self._num_items)]
-
-    def position_id(self, idx): # tips use 1-indexed int ids descending columns first
-        self._assert_idx_in_range(idx)
-        return str(idx + 1) # switch to standard advance through row first
 
 # tips = lmgr.layout_item(Tip96, 'tips_0')
 
 def resource_list_with_prefix(layout_manager:LayoutManager, prefix:str, res_class:DeckResource, num_ress:int, order_key=None, reverse=False):
-    def name_from_line(line):
-        field = LayoutManager.layline_objid(line)
-        if field:
-            return field
-        return LayoutManager.layline_first_field(line)
-    layline_test = lambda line: LayoutManager.field_starts_with(name_from_line(line), prefix)
-    res_type = ResourceType(res_class, layline_test, name_from_line)
+    res_type = ResourceType(res_class, LayoutManager.line_has_prefixed_name(prefix), LayoutManager.name_from_line)
     res_list = [layout_manager.assign_unused_resource(res_type, order_key=order_key, reverse=reverse) for _ in range(num_ress)]
     return res_list
 
 class BulkReagentPlate(Standard96):
+    _POSITION_IDS = _grid_tables(96, 8)[1]
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 96
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def position_id(self, idx):
-        self._assert_idx_in_range(idx)
-        return str(idx + 1)
 
 
 class Waste96(BulkReagentPlate):
@@ -514,207 +565,95 @@ class Plate96(Standard96):
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 96
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
 
 
 class Plate24(DeckResource):
+    _num_items = 24
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(24, 4, 'ABCD')
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 24
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//4, int(idx)%4
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
-
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        return 'ABCD'[y] + str(x + 1)
 
 
 class Plate12(DeckResource):
+    _num_items = 12
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(12, 3, 'ABC')
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 12
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//3, int(idx)%3
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
-
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        return 'ABC'[y] + str(x + 1)
 
 class Plate6(DeckResource):
+    _num_items = 6
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(6, 2, 'AB')
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 6
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//2, int(idx)%2
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
-
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        return 'AB'[y] + str(x + 1)
 
 
 class Plate384(DeckResource):
+    _num_items = 384
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(384, 16, 'ABCDEFGHIJKLMNOP')
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 384
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//16, int(idx)%16
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
-
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        return 'ABCDEFGHIJKLMNOP'[y] + str(x + 1)
 
 class Plate1536(DeckResource):
+    _num_items = 1536
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(1536, 32, list('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                                               + ['AA', 'AB', 'AC', 'AD', 'AE', 'AF'])
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 1536
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//32, int(idx)%32
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
-
-    def position_id(self, idx):
-        x, y = self.well_coords(idx)
-        row_letters = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ') + ['AA', 'AB', 'AC', 'AD', 'AE', 'AF']
-        return row_letters[y] + str(x + 1)
 
 class Reservoir60mL(DeckResource):
+    _num_items = 8
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(8, 8)
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 8
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//8, int(idx)%8
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
 
     def position_id(self, idx):
-        return '12345678'[idx]
+        return self._POSITION_IDS[idx]
 
 class LVKBalanceVial(DeckResource):
+    _num_items = 1
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(1, 1)
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 1
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return (0, 0)
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [])
 
     def position_id(self, idx):
         return '1'
 
 class EppiCarrier32(DeckResource):
+    _num_items = 32
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(32, 32)
+    positions = _POSITION_IDS
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 32
-        self.positions = [str(i+1) for i in range(self._num_items)]
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//32, int(idx)%32
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
 
     def position_id(self, idx):
         return self.positions[idx]
 
 
 class FalconCarrier24(DeckResource):
+    _num_items = 24
+    _WELL_COORDS, _POSITION_IDS = _grid_tables(24, 24)
+    positions = _POSITION_IDS
 
     def __init__(self, layout_name):
         self._layout_name = layout_name
-        self._num_items = 24
-        self.positions = [str(i+1) for i in range(self._num_items)]
         self.resource_type = DeckResource.types.VESSEL
-        self._items = [Vessel(self, i) for i in range(self._num_items)]
-
-    def well_coords(self, idx):
-        self._assert_idx_in_range(idx)
-        return int(idx)//24, int(idx)%24
-
-    def _alignment_delta(self, start, end):
-        [self._assert_idx_in_range(p) for p in (start, end)]
-        xs, ys = self.well_coords(start)
-        xe, ye = self.well_coords(end)
-        return (xe - xs, ye - ys, [DeckResource.align.VERTICAL] if xs == xe and ys != ye else [])
 
     def position_id(self, idx):
         return self.positions[idx]
@@ -0,0 +1,80 @@
+"""On-disk cache of parsed layout files, keyed by layout checksum.
+
+Venus writes a checksum at the end of every `.lay` file, so a layout that
+changes gets a new cache file and stale entries are never read. A cache file is
+JSON lines: the first line holds the parsed layout, and every later line adds
+results computed against it since, such as the position ids of a resource
+checked by `LayoutManager.verify_position_ids`. Appending keeps each update
+O(1) no matter how large the layout is.
+"""
+import json
+import logging
+import os
+from pathlib import Path
+
+_DOTDIR = Path.home() / ".pyhamilton"
+LAYOUT_CACHE_DIR = _DOTDIR / "layout_cache"
+_CACHE_FORMAT = 1
+
+logger = logging.getLogger(__name__)
+
+
+class LayoutCache:
+    """Parsed layout and derived lookups for one layout checksum.
+
+    Args:
+      checksum (str): the layout file's checksum.
+      size (int): the layout file's size in bytes, checked on load as a guard
+        against checksum collisions.
+      cache_dir (str): Optional; directory of the cache files. Default is
+        `~/.pyhamilton/layout_cache`.
+    """
+
+    def __init__(self, checksum, size, cache_dir=None):
+        self.checksum = checksum
+        self.size = size
+        self.path = Path(cache_dir or LAYOUT_CACHE_DIR) / (checksum + '.jsonl')
+        self.position_ids = {}
+
+    def load(self):
+        """Return the cached layout lines, or `None` if there is no valid cache."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if (header.get('format') != _CACHE_FORMAT or header.get('checksum') != self.checksum
+                        or header.get('size') != self.size):
+                    return None
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # partial line from an interrupted append
+                    self.position_ids.update(entry.get('position_ids', {}))
+        except (OSError, ValueError):
+            return None
+        return header['lines']
+
+    def store(self, lines):
+        """Write a new cache file for `lines`, replacing any existing one."""
+        header = {'format': _CACHE_FORMAT, 'checksum': self.checksum, 'size': self.size, 'lines': lines}
+        self.position_ids = {}
+        tmp_path = self.path.with_suffix('.tmp' + str(os.getpid()))
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header) + '\n')
+            os.replace(tmp_path, self.path)
+        except OSError as err:
+            logger.warning('could not write layout cache ' + str(self.path) + ': ' + str(err))
+
+    def add_position_ids(self, name, pos_ids):
+        """Record the position ids found for `name` (`None` if it has none)."""
+        self.position_ids[name] = pos_ids
+        self._append({'position_ids': {name: pos_ids}})
+
+    def _append(self, entry):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+        except OSError as err:
+            logger.warning('could not update layout cache ' + str(self.path) + ': ' + str(err))
@@ -0,0 +1,181 @@
+"""Indexes over the lines of a Hamilton layout (`.lay`) file.
+
+`LayoutManager` finds labware by matching names against layout lines. Doing
+that line by line costs O(lines) per lookup, and O(lines x resources) for a
+deck. `LayoutModel` parses the lines once into the lookups those matches need:
+
+- the words in the layout, for exact-name `ResourceType`s and for checking
+  that a resource name appears in the layout at all;
+- the name of each line (`LayoutManager.name_from_line`), sorted, for prefix
+  `ResourceType`s and `resource_list_with_prefix`;
+- the names following `ObjId` and `Seq.<n>.Name` fields and at the start of
+  position lines, for finding the position ids of a labware item;
+- the deck position (`TForm.3.X`, `TForm.3.Y`) of each labware item by `Id`.
+
+Each index is built on first use. Lookups return the same lines, in the same
+order, as the line-by-line rules they replace.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+_CONTROL = r'[\s\x00-\x1f]'
+_WORD = re.compile(r'\w+')
+# ASCII characters that are not in \w, as spaces; `str.split` then gives the words of ASCII text
+_ASCII_NON_WORD = str.maketrans({chr(c): ' ' for c in range(128) if not re.match(r'\w', chr(c))})
+_OBJID_FIELD = re.compile(r'ObjId' + _CONTROL + '*')
+_SEQ_NAME_FIELD = re.compile(r'Seq\.\d+\.Name' + _CONTROL + '*')
+_RUN_END = re.compile(_CONTROL)
+# a labware field and the length prefix of its value
+_LABWARE_FIELD = re.compile(r'Labware\.(\d+)\.(Id|TForm\.3\.X|TForm\.3\.Y)(.)', re.DOTALL)
+
+
+def _run_at(line, start):
+    """The text of `line` from `start` up to the next whitespace or control character."""
+    end = _RUN_END.search(line, start)
+    return line[start:end.start() if end else len(line)]
+
+
+class _RunIndex:
+    """Lines by the name that follows a field, for `<field><name>(<control>|Seq)` lookups."""
+
+    def __init__(self, entries):
+        self._entries = sorted(entries)
+
+    def lines_for(self, name):
+        # the name is the whole run, or the run continues straight into the next 'Seq...' field
+        found = set()
+        for key in (name, name + 'Seq'):
+            i = bisect_left(self._entries, (key,))
+            while i < len(self._entries) and self._entries[i][0].startswith(key):
+                if key != name or self._entries[i][0] == name:
+                    found.add(self._entries[i][1])
+                i += 1
+        return sorted(found)
+
+
+class LayoutModel:
+    """Name and position-id indexes over the lines of a layout file.
+
+    Args:
+      lines (list): layout lines, as read by `LayoutManager._read_layfile_lines`.
+      name_from_line (callable): the function giving the name of a line,
+        `LayoutManager.name_from_line`.
+    """
+
+    def __init__(self, lines, name_from_line):
+        self.lines = lines
+        self._name_from_line = name_from_line
+        self._text = None
+        self._words = None
+        self._sorted_names = None
+        self._objid_index = None
+        self._seq_name_index = None
+        self._first_runs = None
+        self._labware_xy = None
+
+    def has_word(self, name):
+        """`True` if `name` is in `re.split(r'\\W', line)` for some line."""
+        if name == '':
+            return any(word == '' for line in self.lines for word in re.split(r'\W', line))
+        return name in self._word_set()
+
+    def contains(self, text):
+        """`True` if `text` is part of some line, as `any(text in line for line in lines)`.
+
+        Whole words are looked up in the word index. Other text, and words
+        that only occur run together with other word characters, take one
+        scan of the layout.
+        """
+        if text in self._word_set():
+            return True
+        if '\n' in text or not self.lines:
+            return False  # lines never contain newlines
+        return text in self._joined()
+
+    def _joined(self):
+        if self._text is None:
+            self._text = '\n'.join(self.lines)
+        return self._text
+
+    def _word_set(self):
+        if self._words is None:
+            text = self._joined()
+            # layout files are read as ASCII; translating is several times faster than the regex
+            self._words = set(text.translate(_ASCII_NON_WORD).split() if text.isascii() else _WORD.findall(text))
+        return self._words
+
+    def names_with_prefix(self, prefix):
+        """Return `(line index, name)` of every line whose name starts with `prefix`, in line order."""
+        if self._sorted_names is None:
+            self._sorted_names = sorted((self._name_from_line(line), i) for i, line in enumerate(self.lines))
+        found = []
+        i = bisect_left(self._sorted_names, (prefix,))
+        while i < len(self._sorted_names) and self._sorted_names[i][0].startswith(prefix):
+            found.append((self._sorted_names[i][1], self._sorted_names[i][0]))
+            i += 1
+        return sorted(found)
+
+    def find_resource_line(self, resource_name):
+        """The line(s) containing position IDs for `resource_name`, or `None`.
+
+        Same result as matching the `ObjId` pattern, then the line-start pattern,
+        then the `Seq.<n>.Name` pattern against every line, which is what it does
+        for names that contain whitespace or control characters.
+        """
+        name = re.escape(resource_name)
+        obj_pattern = re.compile(rf"ObjId{_CONTROL}*{name}(?:{_CONTROL}|Seq)")
+        start_pattern = re.compile(rf"^{name}{_CONTROL}")
+        name_pattern = re.compile(rf"Seq\.\d+\.Name{_CONTROL}*{name}(?:{_CONTROL}+|(?=Seq))")
+        indexed = bool(resource_name) and not _RUN_END.search(resource_name)
+        if indexed:
+            self._build_position_indexes()
+            obj_lines = self._objid_index.lines_for(resource_name)
+            start_lines = self._first_runs.get(resource_name, [])
+        else:
+            obj_lines = start_lines = range(len(self.lines))
+
+        matching_lines = [self.lines[i] for i in obj_lines if obj_pattern.search(self.lines[i])]
+        matching_lines += [self.lines[i] for i in start_lines
+                           if start_pattern.search(self.lines[i]) and 'PosId' in self.lines[i]]
+        if matching_lines:
+            return ''.join(matching_lines)
+
+        name_lines = self._seq_name_index.lines_for(resource_name) if indexed else range(len(self.lines))
+        for i in name_lines:
+            if name_pattern.search(self.lines[i]):
+                return self.lines[i]
+        return None
+
+    def labware_xy(self, name):
+        """The deck `(x, y)` in mm of the labware item with Id `name`, or `None` if not in the layout."""
+        if self._labware_xy is None:
+            fields = defaultdict(dict)
+            for line in self.lines:
+                if 'Labware.' not in line:
+                    continue
+                for m in _LABWARE_FIELD.finditer(line):
+                    fields[m.group(1)][m.group(2)] = line[m.end():m.end() + ord(m.group(3))]
+            self._labware_xy = {}
+            for item in fields.values():
+                try:
+                    self._labware_xy[item['Id']] = (float(item['TForm.3.X']), float(item['TForm.3.Y']))
+                except (KeyError, ValueError):
+                    continue
+        return self._labware_xy.get(name)
+
+    def _build_position_indexes(self):
+        if self._objid_index is not None:
+            return
+        objid_entries, seq_name_entries = [], []
+        first_runs = defaultdict(list)
+        for i, line in enumerate(self.lines):
+            if 'ObjId' in line:
+                objid_entries.extend((_run_at(line, m.end()), i) for m in _OBJID_FIELD.finditer(line))
+            if '.Name' in line:
+                seq_name_entries.extend((_run_at(line, m.end()), i) for m in _SEQ_NAME_FIELD.finditer(line))
+            if 'PosId' in line:
+                first_runs[_run_at(line, 0)].append(i)
+        self._objid_index = _RunIndex(objid_entries)
+        self._seq_name_index = _RunIndex(seq_name_entries)
+        self._first_runs = dict(first_runs)
@@ -6,10 +6,15 @@ from __future__ import annotations
 import string, shutil, os, string, re
 from datetime import datetime
 
+import hashlib
+import json
 import sqlite3
+import time
+import weakref
 from pathlib import Path
 from contextlib import contextmanager
-from collections import defaultdict
+from bisect import bisect_right
+from threading import Lock, RLock, Timer
 from typing import List, Tuple, Optional, Dict, TypeVar, Type
 
 # ────────────────────────── HAMILTON imports ──────────────────────────
@@ -27,38 +32,290 @@ _DOTDIR   = Path.home() / ".pyhamilton"
 _DOTDIR.mkdir(parents=True, exist_ok=True)
 _DB_PATH  = _DOTDIR / "tip_tracker.db"
 
-@contextmanager
-def _get_conn():
-    """Yield a SQLite connection with WAL enabled and autocommit on exit."""
-    conn = sqlite3.connect(_DB_PATH)
-    conn.execute("PRAGMA journal_mode=WAL;")
+_TIPS_SCHEMA = """
+  CREATE TABLE IF NOT EXISTS tips(
+      tracker_id     TEXT,
+      position_idx   INTEGER,
+      rack_name      TEXT,
+      occupied       INTEGER,
+      PRIMARY KEY (tracker_id, position_idx)
+  )
+"""
+
+
+def _write_and_close(conn, pending) -> None:
     try:
-        yield conn
-        conn.commit()
+        if pending:
+            with conn:
+                for sql, rows in pending:
+                    conn.executemany(sql, rows)
     finally:
         conn.close()
 
-def _ensure_table() -> None:
-    with _get_conn() as conn:
-        conn.execute("""
-          CREATE TABLE IF NOT EXISTS tips(
-              tracker_id     TEXT,
-              position_idx   INTEGER,
-              rack_name      TEXT,
-              occupied       INTEGER,
-              PRIMARY KEY (tracker_id, position_idx)
-          )
-        """)
 
-_ensure_table()  # one‑time at import
+
+
+class _TrackerDB:
+    """
+    Long-lived SQLite connection to one tracker database file.
+
+    Get it with `_tracker_db`, which keeps one per file, shared by every
+    `TrackedTips` and `StackedResources` stored there; it is closed once the
+    last of them is gone. `sqlite3` caches the prepared statements of a
+    connection, so repeated row updates are not parsed again. Row writes are
+    buffered in memory and written in one short transaction when the outermost
+    `transaction()` block exits, so a multi-tip operation is one commit (and
+    one fsync) however many rows it touches. Writes with a `commit_interval`
+    are grouped further: held in memory for up to that long, then written by a
+    timer thread if no later write, `flush()` or interpreter exit wrote them
+    first. The database is never left with an open transaction between
+    operations, so other connections to it are not locked out. A crash loses
+    at most the last interval of updates.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.commits = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._schemas = set()
+        self._lock = RLock()
+        self._depth = 0
+        self._pending: List[Tuple[str, list]] = []   # (statement, parameter rows) not yet written
+        self._due = float('inf')                     # when the pending rows must be written
+        self._timer = None                           # writes the pending rows at `_due`
+        self._finalizer = weakref.finalize(self, _write_and_close, self._conn, self._pending)
+
+    def create(self, schema: str) -> None:
+        """Run a `CREATE TABLE IF NOT EXISTS` statement once per connection."""
+        with self._lock:
+            if schema not in self._schemas:
+                self._conn.execute(schema)
+                self._conn.commit()
+                self._schemas.add(schema)
+
+    @contextmanager
+    def transaction(self):
+        """Group the writes made inside; commit (if they are due) when the outermost block exits."""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                # commit even on error: the in-memory state already holds whatever was written
+                self._depth -= 1
+                if self._depth == 0:
+                    self._commit(force=False)
+                    self._schedule()
+
+    def write(self, sql: str, rows: list, commit_interval: float | None = None) -> None:
+        """Run `sql` once per parameter row in `rows`, within `commit_interval` seconds."""
+        with self.transaction():
+            self._pending.append((sql, rows))
+            self._due = min(self._due, time.monotonic() + (commit_interval or 0))
+
+    def read(self, sql: str, params: tuple = ()) -> list:
+        """Return the rows of a query, after writing any pending rows it could miss."""
+        with self._lock:
+            self._commit(force=True)
+            return self._conn.execute(sql, params).fetchall()
+
+    def flush(self) -> None:
+        """Commit any grouped writes now."""
+        with self._lock:
+            self._commit(force=True)
+
+    def _commit(self, force: bool) -> None:
+        if not self._pending or not force and time.monotonic() < self._due:
+            return
+        with self._conn:  # one transaction, rolled back if a statement fails
+            for sql, rows in self._pending:
+                self._conn.executemany(sql, rows)
+        self._pending.clear()
+        self._due = float('inf')
+        self.commits += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule(self) -> None:
+        # caller holds self._lock; write held-back rows when they fall due, even if nothing else is written
+        if not self._pending or self._timer is not None and self._timer.due <= self._due:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = Timer(max(0.0, self._due - time.monotonic()), _write_when_due, (weakref.ref(self),))
+        self._timer.due = self._due
+        self._timer.daemon = True
+        self._timer.start()
+
+
+def _write_when_due(db_ref) -> None:
+    db = db_ref()
+    if db is None:
+        return
+    with db._lock:
+        db._timer = None
+        db._commit(force=False)
+        db._schedule()  # in case the timer fired a little early
+
+
+_DATABASES = weakref.WeakValueDictionary()   # absolute path -> _TrackerDB
+_DATABASES_LOCK = Lock()
+
+
+def _tracker_db(path: Path, schema: str) -> _TrackerDB:
+    """The shared `_TrackerDB` of `path`, with the table of `schema` created."""
+    key = os.path.abspath(path)
+    with _DATABASES_LOCK:
+        db = _DATABASES.get(key)
+        if db is None:
+            db = _DATABASES[key] = _TrackerDB(path)
+    db.create(schema)
+    return db
+
+
+_COMPACT_EVERY = 1000              # journal records between compactions into SQLite
+
+
+def _journal_path(db_path: Path, tracker_id: str) -> Path:
+    """Write-behind journal of one tracker, next to its database."""
+    digest = hashlib.sha1(tracker_id.encode()).hexdigest()[:16]
+    return db_path.with_name(f"{db_path.stem}-{digest}.journal")
+
+
+def _sync_and_close(fd: int) -> None:
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Journal:
+    """
+    Append-only journal of the row writes of one tracker, for `write_behind`.
+
+    Each record is one JSON line, the row's key columns then its value, and is
+    in the file (so it survives the Python process crashing) once `append`
+    returns. The file is fsynced once per outermost `group()` block, or once
+    per `sync_interval`, so an operation on many tips costs one fsync; a power
+    loss loses at most the last unsynced group. Every `compact_every` records,
+    `compact` hands the latest record of each row to `write_rows`, which stores
+    them in SQLite in one transaction, and empties the journal. Records set
+    rows to absolute values, so replaying records that were compacted just
+    before a crash gives the same state again.
+    """
+
+    def __init__(self, path: Path, write_rows, sync_interval: float | None = None,
+                 compact_every: int = _COMPACT_EVERY):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self.syncs = 0
+        self.compactions = 0
+        self._write_rows = write_rows
+        self._pending: Dict[tuple, list] = {}   # row key -> latest record not yet in SQLite
+        self._records = 0                       # records written since the last compaction
+        self._unsynced = False
+        self._lock = RLock()
+        self._depth = 0
+        self._last_sync = time.monotonic()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        # on exit the journal is synced, not compacted; the next hydration replays it
+        self._finalizer = weakref.finalize(self, _sync_and_close, self._fd)
+
+    @contextmanager
+    def group(self):
+        """Sync (subject to `sync_interval`) once, when the outermost block exits."""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end_group()
+
+    def append(self, record: tuple) -> None:
+        with self._lock:
+            os.write(self._fd, (json.dumps(record) + "\n").encode())
+            self._pending[tuple(record[:-1])] = list(record)
+            self._records += 1
+            self._unsynced = True
+            if self._depth == 0:
+                self._end_group()
+
+    def replay(self) -> List[list]:
+        """
+        The records in the journal, oldest first, as left by a previous run.
+        They count as pending, so the next `compact` stores them. A line torn
+        by a crash is skipped.
+        """
+        with self._lock:
+            records = []
+            for line in self.path.read_bytes().split(b"\n")[:-1]:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records.append(record)
+                self._pending[tuple(record[:-1])] = record
+            self._records += len(records)
+            return records
+
+    def compact(self) -> None:
+        """Store the pending records in the database, then empty the journal."""
+        with self._lock:
+            if self._pending:
+                self._write_rows(list(self._pending.values()))
+            os.ftruncate(self._fd, 0)
+            self._pending.clear()
+            self._records = 0
+            self._unsynced = False
+            self.compactions += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._finalizer.alive:
+                self.compact()
+            self._finalizer()
+
+    def _end_group(self) -> None:
+        now = time.monotonic()
+        if self._unsynced and (not self.sync_interval or now - self._last_sync >= self.sync_interval):
+            os.fsync(self._fd)
+            self._unsynced = False
+            self._last_sync = now
+            self.syncs += 1
+        if self._records >= self.compact_every:
+            self.compact()
 
 # ────────────────────────── TrackedTips ──────────────────────────
+_COLUMN = 8                        # tips per rack column
+_COLUMN_MASK = (1 << _COLUMN) - 1
+
+
+def _lowest_bit(mask: int) -> int:
+    """Index of the lowest set bit of a nonzero mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+def _popcount(mask: int) -> int:
+    """Number of set bits of a mask; `int.bit_count` needs Python 3.10."""
+    return bin(mask).count('1')
+
+
 class TrackedTips:
     """
     Persistently tracks individual tips across one or more DeckResources.
 
-    State lives both in-memory (`self.occupancy`) and on disk
-    (`~/.pyhamilton/tip_tracker.db`).  All mutating operations sync to disk.
+    State lives both in-memory (one bitmask per rack, with per-rack summaries
+    of complete columns so lookups do not scan tips) and on disk
+    (`~/.pyhamilton/tip_tracker.db`).  All mutating operations sync to disk,
+    in one commit per operation (or per `commit_interval`). With
+    `write_behind`, they are appended to a journal file next to the database
+    instead, which is compacted into the database every so often (see
+    `_Journal`) and replayed by `reset=False` after a crash.
     """
 
     # ------------------------------------------------------------------
@@ -67,6 +324,9 @@ class TrackedTips:
                  volume_capacity: int,
                  tracker_id: str | None = None,
                  reset: bool = True,
+                 commit_interval: float | None = None,
+                 write_behind: bool = False,
+                 lmgr: LayoutManager | None = None,
                  ):
         """
         Parameters
@@ -76,15 +336,45 @@ class TrackedTips:
         tracker_id : str, optional
             Identifier used as the namespace inside the shared DB.
             Defaults to a deterministic hash of rack layout names.
+        commit_interval : float, optional
+            Group commits to at most one per this many seconds. By default
+            every operation commits as soon as it is done. With
+            `write_behind`, groups the journal's fsyncs instead.
+        write_behind : bool, optional
+            Journal changes to an append-only file, fsynced once per
+            operation, and store them in the database only every
+            `_COMPACT_EVERY` tips, on `flush()` and on `close()`.
+        lmgr : LayoutManager, optional
+            Layout the racks come from, for the rack positions used by tip
+            allocation policies.
         """
         self.tip_racks   : List[DeckResource] = tip_racks
+        self.lmgr = lmgr
+        self._tip_policies: Dict[type, object] = {}   # policy class -> instance, see get_tip_policy
         self.tracker_id  : str = tracker_id or "|".join(r.layout_name() for r in tip_racks)
         self.volume_capacity: int = volume_capacity
+        self.commit_interval = commit_interval
+        self._db = _tracker_db(_DB_PATH, _TIPS_SCHEMA)
+        self._journal = (_Journal(_journal_path(_DB_PATH, self.tracker_id), self._write_rows, commit_interval)
+                         if write_behind else None)
 
-        # Build default in‑RAM state (all tips occupied).
-        self.occupancy: List[Tuple[DeckResource, bool]] = []
+        # Build default in‑RAM state (all tips occupied), one bitmask per rack.
+        self._rack_starts: List[int] = []
+        offset = 0
         for rack in tip_racks:
-            self.occupancy.extend([(rack, True) for _ in range(rack._num_items)])
+            self._rack_starts.append(offset)
+            offset += rack._num_items
+        self._total = offset
+        self._rack_index = {id(rack): r for r, rack in enumerate(tip_racks)}
+        self._masks: List[int] = [0] * len(tip_racks)           # bit i: tip i of the rack is present
+        self._column_masks: List[int] = [0] * len(tip_racks)    # bit c: column c of the rack is complete
+        self._remaining = 0
+        self._racks_nonempty = 0                                # bit r: rack r has a tip
+        self._racks_full = 0                                    # bit r: rack r is complete
+        max_columns = max((rack._num_items // _COLUMN for rack in tip_racks), default=0)
+        self._racks_by_columns: List[int] = [0] * (max_columns + 1)  # [k] bit r: rack r has >= k complete columns
+        for r, rack in enumerate(tip_racks):
+            self._set_rack_mask(r, (1 << rack._num_items) - 1)
 
         # Reconcile with on‑disk data (or seed the DB if brand‑new).
         if reset:           # optional hard‑reset switch
@@ -102,81 +392,119 @@ class TrackedTips:
                     count    : int,
                     lmgr     : LayoutManager,
                     tip_type : ResourceType = Tip96,
-                    reset    : bool = True) -> TrackedTips:
+                    reset    : bool = True,
+                    commit_interval: float | None = None,
+                    write_behind: bool = False) -> TrackedTips:
         """
         Allocate `count` racks named f"{prefix}_{i:04d}" via `lmgr`,
         then return a new TrackedTips instance managing them.
+        Raises `ResourceUnavailableError`, before assigning any rack, if
+        some of the names are not in the layout.
         """
-        resources = [
-            lmgr.assign_unused_resource(ResourceType(tip_type, f"{prefix}_{i:04d}"))
-            for i in range(1, count + 1)
-        ]
-        return cls(resources, volume_capacity=volume_capacity, tracker_id=tracker_id, reset=reset)
+        names = [f"{prefix}_{i:04d}" for i in range(1, count + 1)]
+        missing = [name for name in names if not lmgr.has_name(name)]
+        if missing:
+            raise ResourceUnavailableError(f"Tip racks not found in layout: {', '.join(missing)}")
+        resources = [lmgr.assign_unused_resource(ResourceType(tip_type, name)) for name in names]
+        return cls(resources, volume_capacity=volume_capacity, tracker_id=tracker_id, reset=reset,
+                   commit_interval=commit_interval, write_behind=write_behind, lmgr=lmgr)
 
     # ------------------------ Public API ------------------------------
+    def batch(self):
+        """
+        Context manager that commits every change made inside it at once.
+
+        >>> with tracker.batch():
+        ...     for idx in used:
+        ...         tracker.mark_unoccupied(idx)
+        """
+        return self._db.transaction() if self._journal is None else self._journal.group()
+
+    def flush(self) -> None:
+        """Commit changes held back by `commit_interval` or in the write-behind journal."""
+        if self._journal is not None:
+            self._journal.compact()
+        self._db.flush()
+
+    def close(self) -> None:
+        """Commit pending changes. The database connection, shared with the other
+        trackers stored in the same file, is closed once the last of them is gone."""
+        if self._journal is not None:
+            self._journal.close()
+        self._db.flush()
+
     def mark_occupied(self, index: int) -> None:
-        rack, _ = self.occupancy[index]
-        self.occupancy[index] = (rack, True)
+        self._set_tip(index, True)
         self._update_row(index, True)
 
     def mark_unoccupied(self, index: int) -> None:
-        rack, _ = self.occupancy[index]
-        self.occupancy[index] = (rack, False)
+        self._set_tip(index, False)
         self._update_row(index, False)
 
     def is_occupied(self, index: int) -> bool:
-        return self.occupancy[index][1]
+        r, pos = self._locate(index)
+        return bool(self._masks[r] >> pos & 1)
 
     def count_remaining(self) -> int:
-        return sum(1 for _, occ in self.occupancy if occ)
+        return self._remaining
 
     def total_tips(self) -> int:
-        return len(self.occupancy)
+        return self._total
+
+    @property
+    def occupancy(self) -> List[Tuple[DeckResource, bool]]:
+        """`(rack, present)` for every tip, in absolute index order. Built on each access."""
+        return [(rack, bool(self._masks[r] >> pos & 1))
+                for r, rack in enumerate(self.tip_racks) for pos in range(rack._num_items)]
 
     def fetch_next(self, n: int) -> List[Tuple[DeckResource, int]]:
         """
         Return and mark unoccupied the next `n` available tips.
         Output format: (DeckResource, position_within_rack).
         """
-        fetched: List[Tuple[int, DeckResource, int]] = []
-
-        for idx, (rack, occ) in enumerate(self.occupancy):
-            if not occ:
-                continue
-
-            # Correct position inside this rack (0‑based)
-            pos_in_rack = idx % rack._num_items      # works for any rack size
-
-            fetched.append((idx, rack, pos_in_rack))
-            if len(fetched) == n:
-                break
-
-        if len(fetched) < n:
+        if n > self._remaining:
             raise ValueError(
-                f"Only {len(fetched)} tips available; {n} requested."
+                f"Only {self._remaining} tips available; {n} requested."
             )
 
-        # Mark the returned tips as used and sync to DB
-        for idx, _, _ in fetched:
-            self.mark_unoccupied(idx)
+        fetched: List[Tuple[DeckResource, int]] = []
+        with self.batch():
+            while len(fetched) < n:
+                r = _lowest_bit(self._racks_nonempty)
+                pos = _lowest_bit(self._masks[r])
+                self.mark_unoccupied(self._rack_starts[r] + pos)
+                fetched.append((self.tip_racks[r], pos))
+        return fetched
 
-        # Strip the internal absolute index before returning
-        return [(rack, pos) for _, rack, pos in fetched]
+    def fetch_indices(self, indices: List[int]) -> List[Tuple[DeckResource, int]]:
+        """
+        Mark the tips at absolute `indices` unoccupied, in one commit, and return
+        them as (DeckResource, position_within_rack). Used by allocation policies
+        that choose tips themselves.
+        """
+        if len(set(indices)) != len(indices):
+            raise ValueError("Tip indices to fetch must be distinct.")
+        positions = [self._locate(idx) for idx in indices]
+        for r, pos in positions:
+            if not self._masks[r] >> pos & 1:
+                raise ValueError(f"Tip at {self.tip_racks[r].layout_name()}[{pos}] is not available.")
+        with self.batch():
+            for idx in indices:
+                self.mark_unoccupied(idx)
+        return [(self.tip_racks[r], pos) for r, pos in positions]
 
     def fetch_rack(self) -> Optional[DeckResource]:
         """
         If an entire rack of 96 still‑occupied tips exists, return that rack
         and mark its tips unoccupied. Otherwise return None.
         """
-        by_rack: Dict[DeckResource, List[int]] = defaultdict(list)
-        for idx, (rack, occ) in enumerate(self.occupancy):
-            by_rack[rack].append(idx if occ else -1)  # -1 for used
-
-        for rack, indices in by_rack.items():
-            if len(indices) == 96 and all(i >= 0 for i in indices):
-                for idx in indices:
-                    self.mark_unoccupied(idx)        # syncs each tip
-                return rack
+        full = self._racks_full
+        while full:
+            r = _lowest_bit(full)
+            full &= full - 1
+            if self.tip_racks[r]._num_items == 96:
+                self._empty_rack(r)
+                return self.tip_racks[r]
         return None
 
     def fetch_rack_with_min_columns(self, min_columns: int) -> Optional[Tuple[DeckResource, List[int]]]:
@@ -199,31 +527,16 @@ class TrackedTips:
         Optional[Tuple[DeckResource, List[int]]]
             (rack, occupancy_map) if found; otherwise None.
         """
-        # Build rack → starting absolute index map once
-        rack_start_indices = {rack: sum(r._num_items for r in self.tip_racks[:i])
-                            for i, rack in enumerate(self.tip_racks)}
-
-        for rack in self.tip_racks:
-            rack_start = rack_start_indices[rack]
-            # Snapshot occupancy for this rack (booleans, length 96 expected)
-            occupancy_bools = [self.occupancy[rack_start + i][1] for i in range(96)]
-            # Count full columns (12 columns × 8 rows layout assumed)
-            full_columns = sum(
-                1 for col in range(12)
-                if all(occupancy_bools[col * 8 + row] for row in range(8))
-            )
+        candidates = self._racks_by_columns[max(min_columns, 0)] if min_columns < len(self._racks_by_columns) else 0
+        if not candidates:
+            raise Exception(f"No rack found with at least {min_columns} full columns.")
 
-            if full_columns >= min_columns:
-                # Convert to 1/0 map BEFORE mutating state
-                occupancy_map = [1 if b else 0 for b in occupancy_bools]
-
-                # Mark all tips as unoccupied (persisted via mark_unoccupied)
-                for i in range(96):
-                    self.mark_unoccupied(rack_start + i)
-
-                return rack, occupancy_map
-
-        raise Exception(f"No rack found with at least {min_columns} full columns.")
+        r = _lowest_bit(candidates)
+        mask = self._masks[r]
+        # Convert to 1/0 map BEFORE mutating state
+        occupancy_map = [mask >> i & 1 for i in range(self.tip_racks[r]._num_items)]
+        self._empty_rack(r)
+        return self.tip_racks[r], occupancy_map
 
     def reset_all(self) -> None:
         """
@@ -238,9 +551,9 @@ class TrackedTips:
         -------
         >>> tracker.reset_all()      # all tips are now 'full' again
         """
-        # 1) Update the in-memory occupancy list
-        for i, (rack, _) in enumerate(self.occupancy):
-            self.occupancy[i] = (rack, True)
+        # 1) Update the in-memory occupancy masks
+        for r, rack in enumerate(self.tip_racks):
+            self._set_rack_mask(r, (1 << rack._num_items) - 1)
 
         # 2) Push the fresh state to disk in one shot
         self._flush_entire_state()
@@ -262,26 +575,20 @@ class TrackedTips:
             • If the position is out of range for that rack  
             • If the tip at that location is already occupied
         """
-        # Build a mapping of rack → starting absolute index once
-        rack_starts: Dict[DeckResource, int] = {}
-        offset = 0
-        for rack in self.tip_racks:
-            rack_starts[rack] = offset
-            offset += rack._num_items
-
-        for rack, pos_in_rack in positions:
-            if rack not in rack_starts:
-                raise ValueError(f"Rack {rack.layout_name()} not managed by this tracker.")
-            if not (0 <= pos_in_rack < rack._num_items):
-                raise ValueError(f"Position {pos_in_rack} out of range for rack {rack.layout_name()}.")
+        with self.batch():
+            for rack, pos_in_rack in positions:
+                if id(rack) not in self._rack_index:
+                    raise ValueError(f"Rack {rack.layout_name()} not managed by this tracker.")
+                if not (0 <= pos_in_rack < rack._num_items):
+                    raise ValueError(f"Position {pos_in_rack} out of range for rack {rack.layout_name()}.")
 
-            abs_idx = rack_starts[rack] + pos_in_rack
+                abs_idx = self._rack_starts[self._rack_index[id(rack)]] + pos_in_rack
 
-            if self.is_occupied(abs_idx):
-                raise ValueError(f"Tip at {rack.layout_name()}[{pos_in_rack}] is already occupied.")
+                if self.is_occupied(abs_idx):
+                    raise ValueError(f"Tip at {rack.layout_name()}[{pos_in_rack}] is already occupied.")
 
-            # Persistently mark the tip as available again
-            self.mark_occupied(abs_idx)
+                # Persistently mark the tip as available again
+                self.mark_occupied(abs_idx)
 
     def fill_rack_from_occupancy_map(self, rack: DeckResource, occupancy_map: List[int]) -> None:
         """
@@ -326,100 +633,141 @@ class TrackedTips:
             raise ValueError("Occupancy map must contain only 0 (unoccupied) or 1 (occupied) values.")
         
         # Find the starting absolute index for this rack
-        rack_start_idx = 0
-        for r in self.tip_racks:
-            if r == rack:
-                break
-            rack_start_idx += r._num_items
-        else:
-            # This shouldn't happen given our first check, but just in case
-            raise ValueError(f"Rack {rack.layout_name()} not found in tip_racks.")
-        
-        # Update each position in the rack according to the occupancy map
-        for pos_in_rack, should_be_occupied in enumerate(occupancy_map):
-            abs_idx = rack_start_idx + pos_in_rack
-            
-            if should_be_occupied == 1:
-                # Should be occupied/available
-                if not self.is_occupied(abs_idx):
-                    self.mark_occupied(abs_idx)
+        rack_start_idx = self._rack_starts[self.tip_racks.index(rack)]
+
+
+        # Update each position in the rack according to the occupancy map, in one commit
+        with self.batch():
+            for pos_in_rack, should_be_occupied in enumerate(occupancy_map):
+                abs_idx = rack_start_idx + pos_in_rack
+
+                if should_be_occupied == 1:
+                    # Should be occupied/available
+                    if not self.is_occupied(abs_idx):
+                        self.mark_occupied(abs_idx)
+                else:
+                    # Should be unoccupied/used
+                    if self.is_occupied(abs_idx):
+                        self.mark_unoccupied(abs_idx)
+
+    # ------------------- Occupancy internals --------------------------
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """(rack number, position in rack) of an absolute tip index."""
+        if not 0 <= index < self._total:
+            raise IndexError(f"Tip index {index} out of range for {self._total} tips.")
+        r = bisect_right(self._rack_starts, index) - 1
+        return r, index - self._rack_starts[r]
+
+    def _set_tip(self, index: int, present: bool) -> None:
+        r, pos = self._locate(index)
+        mask = self._masks[r] | (1 << pos) if present else self._masks[r] & ~(1 << pos)
+        self._set_rack_mask(r, mask, pos // _COLUMN)
+
+    def _set_rack_mask(self, r: int, mask: int, column: int | None = None) -> None:
+        """Store rack `r`'s bitmask and update the summaries; only `column` changed, if given."""
+        size = self.tip_racks[r]._num_items
+        self._remaining += _popcount(mask) - _popcount(self._masks[r])
+        self._masks[r] = mask
+        columns = range(size // _COLUMN) if column is None else (column,) if column < size // _COLUMN else ()
+        for c in columns:
+            if mask >> (c * _COLUMN) & _COLUMN_MASK == _COLUMN_MASK:
+                self._column_masks[r] |= 1 << c
             else:
-                # Should be unoccupied/used
-                if self.is_occupied(abs_idx):
-                    self.mark_unoccupied(abs_idx)
+                self._column_masks[r] &= ~(1 << c)
+        bit = 1 << r
+        self._racks_nonempty = self._racks_nonempty | bit if mask else self._racks_nonempty & ~bit
+        full = mask == (1 << size) - 1
+        self._racks_full = self._racks_full | bit if full else self._racks_full & ~bit
+        complete = _popcount(self._column_masks[r])
+        for k in range(len(self._racks_by_columns)):
+            if k <= complete:
+                self._racks_by_columns[k] |= bit
+            else:
+                self._racks_by_columns[k] &= ~bit
+
+    def _empty_rack(self, r: int) -> None:
+        """Mark every tip of rack `r` unoccupied, in one commit."""
+        with self.batch():
+            start = self._rack_starts[r]
+            for pos in range(self.tip_racks[r]._num_items):
+                self.mark_unoccupied(start + pos)
 
     # ------------------- Persistence internals ------------------------
     def _hydrate_from_db(self) -> bool:
-        with _get_conn() as conn:
-            cur = conn.execute(
+        with self._db.transaction():
+            rows = self._db.read(
                 "SELECT position_idx, rack_name, occupied "
                 "FROM tips WHERE tracker_id = ?;",
                 (self.tracker_id,)
             )
-            rows = cur.fetchall()
+            if self._journal is not None:
+                rows += self._journal.replay()  # changes not yet compacted when the last run stopped
 
             if not rows:  # first‑time tracker → seed DB
                 self._flush_entire_state()
                 return False
 
             # overwrite default RAM state with DB contents
-            rack_map = {r.layout_name(): r for r in self.tip_racks}
+            masks = list(self._masks)
             for pos, rack_name, occ_int in rows:
-                rack = rack_map.get(rack_name)
-                if rack is None:
+                if not 0 <= pos < self._total:
+                    continue  # stale DB row; ignore
+                r, pos_in_rack = self._locate(pos)
+                if self.tip_racks[r].layout_name() != rack_name:
                     continue  # stale DB row; ignore
-                self.occupancy[pos] = (rack, bool(occ_int))
+                if occ_int:
+                    masks[r] |= 1 << pos_in_rack
+                else:
+                    masks[r] &= ~(1 << pos_in_rack)
+            for r, mask in enumerate(masks):
+                self._set_rack_mask(r, mask)
+            if self._journal is not None:
+                self._journal.compact()
 
             return True
 
     def _update_row(self, position_idx: int, occupied: bool) -> None:
-        rack = self.occupancy[position_idx][0]
-        with _get_conn() as conn:
-            conn.execute("""INSERT OR REPLACE INTO tips
-                               (tracker_id, position_idx, rack_name, occupied)
-                            VALUES (?,?,?,?);""",
-                         (self.tracker_id,
-                          position_idx,
-                          rack.layout_name(),
-                          int(occupied)))
+        rack = self.tip_racks[self._locate(position_idx)[0]]
+        row = (position_idx, rack.layout_name(), int(occupied))
+        if self._journal is not None:
+            self._journal.append(row)
+            return
+        self._db.write("""INSERT OR REPLACE INTO tips
+                             (tracker_id, position_idx, rack_name, occupied)
+                          VALUES (?,?,?,?);""",
+                       [(self.tracker_id, *row)], self.commit_interval)
+
+    def _write_rows(self, rows: List[tuple]) -> None:
+        """Store `(position_idx, rack_name, occupied)` rows in one commit."""
+        self._db.write("""INSERT OR REPLACE INTO tips
+                             (tracker_id, position_idx, rack_name, occupied)
+                          VALUES (?,?,?,?);""",
+                       [(self.tracker_id, *row) for row in rows])
+        self._db.flush()  # whole-state writes and compactions are rare; never hold them back
 
     def _flush_entire_state(self) -> None:
-        with _get_conn() as conn:
-            conn.executemany("""INSERT OR REPLACE INTO tips
-                                   (tracker_id, position_idx, rack_name, occupied)
-                                VALUES (?,?,?,?);""",
-                             [(self.tracker_id,
-                               idx,
-                               rack.layout_name(),
-                               int(occ))
-                              for idx, (rack, occ) in enumerate(self.occupancy)])
+        rows = [(idx, rack.layout_name(), int(occ)) for idx, (rack, occ) in enumerate(self.occupancy)]
+        if self._journal is None:
+            self._write_rows(rows)
+            return
+        # through the journal, so older journal records cannot be replayed over this state
+        with self._journal.group():
+            for row in rows:
+                self._journal.append(row)
+        self._journal.compact()
 
 # ────────────────────────── StackedResources ──────────────────────────
 _STACKED_DB = _DOTDIR / "stacked_resources.db"   # separate file so schemas stay tidy
 
-
-def _get_stacked_conn():
-    """SQLite connection for stacked‑resource tracking (WAL enabled)."""
-    conn = sqlite3.connect(_STACKED_DB)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    return conn
-
-
-def _ensure_stacked_table() -> None:
-    with _get_stacked_conn() as conn:
-        conn.execute("""
-          CREATE TABLE IF NOT EXISTS stacked(
-              tracker_id   TEXT,
-              rack_name    TEXT,
-              slot_idx     INTEGER,
-              available    INTEGER,
-              PRIMARY KEY (tracker_id, rack_name, slot_idx)
-          )
-        """)
-        conn.commit()
-
-
-_ensure_stacked_table()          # run at import time
+_STACKED_SCHEMA = """
+  CREATE TABLE IF NOT EXISTS stacked(
+      tracker_id   TEXT,
+      rack_name    TEXT,
+      slot_idx     INTEGER,
+      available    INTEGER,
+      PRIMARY KEY (tracker_id, rack_name, slot_idx)
+  )
+"""
 
 T = TypeVar('T', bound='DeckResource')
 
@@ -427,6 +775,12 @@ class StackedResources:
     """
     A persistent stack of named resources (as strings), supporting
     top-of-stack-first access and database-backed availability tracking.
+    Stacks share one database connection per file (see `_TrackerDB`), and
+    commit once per operation (or per `commit_interval`).
+
+    With `write_behind`, changes go to a journal file as for `TrackedTips`,
+    fsynced once per change (or per `commit_interval`), and are compacted
+    into the database every so often, on `flush()` and on `close()`.
     """
 
     def __init__(self,
@@ -434,7 +788,9 @@ class StackedResources:
                  tracker_id: Optional[str],
                  lmgr: Optional[LayoutManager],
                  resource_type: Type[T],
-                 reset: bool = True):
+                 reset: bool = True,
+                 commit_interval: float | None = None,
+                 write_behind: bool = False):
         
         self.resource_names = list(resource_names)  # fixed order definition
         self.tracker_id     = tracker_id or "|".join(resource_names)
@@ -444,16 +800,17 @@ class StackedResources:
         self.lmgr = lmgr
         if lmgr is not None:
             for rname in resource_names:
-                resource_present_in_layfile = any([rname in line for line in lmgr.lines])
-                if not resource_present_in_layfile:
+                if not lmgr.has_name(rname):
                     raise ValueError(f"Resource '{rname}' not found in LayoutManager.")
 
+        self.commit_interval = commit_interval
+        self._db = _tracker_db(_STACKED_DB, _STACKED_SCHEMA)
+        self._journal = (_Journal(_journal_path(_STACKED_DB, self.tracker_id), self._write_rows, commit_interval)
+                         if write_behind else None)
+
         if reset:
             # Hard reset: clear any prior rows for this tracker_id and seed to "full"
-            with _get_stacked_conn() as conn:
-                conn.execute("DELETE FROM stacked WHERE tracker_id = ?;", (self.tracker_id,))
-                self._flush_entire_state(conn)
-                conn.commit()
+            self._reset_rows()
         else:
             # Rehydrate from DB if present; otherwise seed to full
             self._hydrate_from_db()
@@ -465,14 +822,17 @@ class StackedResources:
                     count     : int,
                     lmgr      : LayoutManager,
                     resource_type: Type[T],
-                    reset     : bool = True) -> StackedResources:
+                    reset     : bool = True,
+                    commit_interval: float | None = None,
+                    write_behind: bool = False) -> StackedResources:
         """
         Create a stack with HIGHEST index at the TOP (fetched first).
         Example: count=4 → top: prefix_0004, prefix_0003, prefix_0002, prefix_0001
         """
         ascending = [f"{prefix}_{i:04d}" for i in range(1, count + 1)]
         top_first = list(reversed(ascending))
-        return cls(top_first, tracker_id=tracker_id, lmgr=lmgr, resource_type=resource_type, reset=reset)
+        return cls(top_first, tracker_id=tracker_id, lmgr=lmgr, resource_type=resource_type, reset=reset,
+                   commit_interval=commit_interval, write_behind=write_behind)
 
     def get_stacked(self) -> List[str]:
         """Return the current list of available resources (top-first)."""
@@ -482,6 +842,23 @@ class StackedResources:
         """Return the number of available resources."""
         return len(self._stacked)
 
+    def batch(self):
+        """Context manager that commits every change made inside it at once."""
+        return self._db.transaction() if self._journal is None else self._journal.group()
+
+    def flush(self) -> None:
+        """Commit changes held back by `commit_interval` or in the write-behind journal."""
+        if self._journal is not None:
+            self._journal.compact()
+        self._db.flush()
+
+    def close(self) -> None:
+        """Commit pending changes. The database connection, shared with the other
+        trackers stored in the same file, is closed once the last of them is gone."""
+        if self._journal is not None:
+            self._journal.close()
+        self._db.flush()
+
     def fetch_next(self) -> str:
         """
         Pop and return the next resource from the top of the stack.
@@ -536,47 +913,68 @@ class StackedResources:
         self._stacked = list(self.resource_names)
         
         # 2) Push the fresh state to disk in one shot
-        with _get_stacked_conn() as conn:
-            # Clear existing entries for this tracker
-            conn.execute("DELETE FROM stacked WHERE tracker_id = ?;", (self.tracker_id,))
-            # Write all resources as available
-            self._flush_entire_state(conn)
-            conn.commit()
+        self._reset_rows()
 
     # ---------------------- Persistence Helpers ----------------------
 
     def _hydrate_from_db(self) -> None:
         """Restore from DB or seed from initial list if new."""
-        with _get_stacked_conn() as conn:
-            cur = conn.execute(
+        with self._db.transaction():
+            rows = self._db.read(
                 "SELECT rack_name, available FROM stacked WHERE tracker_id = ?;",
                 (self.tracker_id,))
-            rows = cur.fetchall()
+            if self._journal is not None:
+                rows += self._journal.replay()  # changes not yet compacted when the last run stopped
 
             if not rows:
-                self._flush_entire_state(conn)
-                conn.commit()
+                self._flush_entire_state()
+                self._db.flush()
                 return
 
             valid_names = set(self.resource_names)
             availability = {r: bool(a) for r, a in rows if r in valid_names}
             self._stacked = [r for r in self.resource_names if availability.get(r, False)]
+        if self._journal is not None:
+            self._journal.compact()
+
+    def _reset_rows(self) -> None:
+        """Replace this tracker's rows with the current stack."""
+        if self._journal is not None:
+            # journal the reset first, so older journal records cannot be replayed over it
+            with self._journal.group():
+                for rname in self._stacked:
+                    self._journal.append((rname, 1))
+        with self._db.transaction():
+            self._db.write("DELETE FROM stacked WHERE tracker_id = ?;", [(self.tracker_id,)])
+            self._flush_entire_state()
+        self._db.flush()  # resets are rare; never hold them back
+        if self._journal is not None:
+            self._journal.compact()
 
     def _update_row(self, rname: str, *, available: bool) -> None:
         """Insert or update a single row in the DB."""
-        with _get_stacked_conn() as conn:
-            conn.execute("""INSERT OR REPLACE INTO stacked
-                               (tracker_id, rack_name, slot_idx, available)
-                            VALUES (?,?,NULL,?);""",
-                         (self.tracker_id, rname, int(available)))
-            conn.commit()
-
-    def _flush_entire_state(self, conn) -> None:
+        if self._journal is not None:
+            self._journal.append((rname, int(available)))
+            return
+        self._db.write("""INSERT OR REPLACE INTO stacked
+                             (tracker_id, rack_name, slot_idx, available)
+                          VALUES (?,?,NULL,?);""",
+                       [(self.tracker_id, rname, int(available))], self.commit_interval)
+
+    def _write_rows(self, rows: List[tuple]) -> None:
+        """Store `(rack_name, available)` rows in one commit."""
+        self._db.write("""INSERT OR REPLACE INTO stacked
+                             (tracker_id, rack_name, slot_idx, available)
+                          VALUES (?,?,NULL,?);""",
+                       [(self.tracker_id, *row) for row in rows])
+        self._db.flush()
+
+    def _flush_entire_state(self) -> None:
         """Write the full available list to the DB."""
-        conn.executemany("""INSERT OR REPLACE INTO stacked
-                               (tracker_id, rack_name, slot_idx, available)
-                            VALUES (?,?,NULL,?);""",
-                         [(self.tracker_id, rname, 1) for rname in self._stacked])
+        self._db.write("""INSERT OR REPLACE INTO stacked
+                             (tracker_id, rack_name, slot_idx, available)
+                          VALUES (?,?,NULL,?);""",
+                       [(self.tracker_id, rname, 1) for rname in self._stacked])
 
 
 class TipSupportTracker:
@@ -0,0 +1,232 @@
+"""Policies that choose which tips of a `TrackedTips` the independent channels pick up.
+
+`TrackedTips.fetch_next(n)` takes the first `n` free tips in index order. Such
+a pickup can straddle columns or racks, and every extra column is another move
+of the channel arm. A policy chooses the tips from the tracker's rack bitmasks
+instead:
+
+  FlatOrderPolicy          index order, the same tips as `fetch_next`
+  ContiguousColumnPolicy   `n` adjacent free tips in one column, taken from the
+                           column that fits best, so full columns stay whole
+  SameRackPolicy           all tips from one rack, in as few columns as possible
+  MinimumTravelPolicy      the column nearest to the last pickup, using the rack
+                           positions in the layout
+
+Each policy counts the arm moves its pickups take, one per distinct column
+position. It also counts how many moves it saved compared with index order
+from the same tracker state:
+
+    policy = MinimumTravelPolicy(lmgr)
+    pip_transfer(ham_int, tips, ..., tip_policy=policy)
+    print(policy.moves, policy.moves_saved)
+
+Policies given by name or class are kept per tracker, see `get_tip_policy`.
+"""
+from .managed_resources import _COLUMN, _lowest_bit, _popcount
+
+TIP_PITCH = 9.0 # mm between rack columns
+_RACK_SPAN = 200.0 # stand-in x distance between racks with no layout position
+
+
+def _rack_numbers(racks_mask):
+    while racks_mask:
+        r = _lowest_bit(racks_mask)
+        racks_mask &= racks_mask - 1
+        yield r
+
+
+def _bits(mask):
+    while mask:
+        b = _lowest_bit(mask)
+        mask &= mask - 1
+        yield b
+
+
+def _run_start(bits, n):
+    """The lowest bit that starts `n` consecutive set bits of `bits`, or `None`."""
+    run = bits
+    for k in range(1, n):
+        run &= bits >> k
+    return _lowest_bit(run) if run else None
+
+
+def _columns(tracker, racks=None):
+    """`(rack number, column, free tip bits)` of every column with a free tip."""
+    for r in _rack_numbers(tracker._racks_nonempty) if racks is None else racks:
+        mask = tracker._masks[r]
+        for c in range(-(-tracker.tip_racks[r]._num_items // _COLUMN)):
+            bits = mask >> (c * _COLUMN) & ((1 << _COLUMN) - 1)
+            if bits:
+                yield r, c, bits
+
+
+def _flat_order(tracker, n):
+    indices = []
+    for r in _rack_numbers(tracker._racks_nonempty):
+        for pos in _bits(tracker._masks[r]):
+            indices.append(tracker._rack_starts[r] + pos)
+            if len(indices) == n:
+                return indices
+    return indices
+
+
+class FlatOrderPolicy:
+    """Tips in index order, as `TrackedTips.fetch_next` takes them; the baseline the others are measured against.
+
+    Args:
+      lmgr (LayoutManager): Optional; layout the racks come from. Their deck
+        positions let racks on one carrier share arm moves.
+      rack_positions (dict): Optional; deck `(x, y)` in mm of racks by layout
+        name, for racks `lmgr` does not know.
+    """
+    name = 'flat'
+
+    def __init__(self, lmgr=None, rack_positions=None):
+        self.lmgr = lmgr
+        self.rack_positions = dict(rack_positions or {})
+        self.pickups = 0
+        self.moves = 0
+        self.moves_saved = 0
+
+    def fetch(self, tracker, n):
+        """Choose `n` free tips of `tracker`, mark them used, and return them as `(rack, position)`."""
+        if n > tracker.count_remaining():
+            raise ValueError(f"Only {tracker.count_remaining()} tips available; {n} requested.")
+        chosen = sorted(self.select(tracker, n))
+        moves = self.count_moves(tracker, chosen)
+        self.pickups += 1
+        self.moves += moves
+        self.moves_saved += self.count_moves(tracker, _flat_order(tracker, n)) - moves
+        self._picked(tracker, chosen)
+        return tracker.fetch_indices(chosen)
+
+    def select(self, tracker, n):
+        """Absolute indices of the `n` free tips to pick up."""
+        return _flat_order(tracker, n)
+
+    def count_moves(self, tracker, indices):
+        """Arm moves to pick up the tips at `indices`: one per distinct column position."""
+        columns = set()
+        for idx in indices:
+            r, pos = tracker._locate(idx)
+            columns.add(round(self.column_x(tracker, r, pos // _COLUMN), 1))
+        return len(columns)
+
+    def column_x(self, tracker, r, c):
+        """Deck x in mm of column `c` of rack number `r`."""
+        xy = self.rack_xy(tracker.tip_racks[r])
+        return (r * _RACK_SPAN if xy is None else xy[0]) + c * TIP_PITCH
+
+    def rack_xy(self, rack):
+        name = rack.layout_name()
+        if name not in self.rack_positions and self.lmgr is not None:
+            self.rack_positions[name] = self.lmgr.model.labware_xy(name)
+        return self.rack_positions.get(name)
+
+    def _picked(self, tracker, indices):
+        pass
+
+    def _in_one_column(self, tracker, n, racks=None, cost=None):
+        """`n` tips from a single column, or `None` if no column has `n` free tips.
+
+        Columns are ranked by `cost(r, c)`, then adjacent free tips before
+        scattered ones, then fewest free tips, so fuller columns are kept.
+        """
+        if n > _COLUMN:
+            return None
+        best = None
+        for r, c, bits in _columns(tracker, racks):
+            free = _popcount(bits)
+            if free < n:
+                continue
+            start = _run_start(bits, n)
+            key = (0 if cost is None else cost(r, c), start is None, free)
+            if best is None or key < best[0]:
+                rows = range(start, start + n) if start is not None else list(_bits(bits))[:n]
+                best = key, [tracker._rack_starts[r] + c * _COLUMN + row for row in rows]
+        return None if best is None else best[1]
+
+    def _fewest_columns(self, tracker, n, racks=None, cost=None):
+        """`n` tips from the fewest columns: fullest first, or cheapest first with `cost`."""
+        ranked = sorted(_columns(tracker, racks),
+                        key=lambda col: (0 if cost is None else cost(col[0], col[1]), -_popcount(col[2])))
+        indices = []
+        for r, c, bits in ranked:
+            for row in _bits(bits):
+                indices.append(tracker._rack_starts[r] + c * _COLUMN + row)
+                if len(indices) == n:
+                    return indices
+        return indices
+
+
+class ContiguousColumnPolicy(FlatOrderPolicy):
+    """`n` adjacent tips in one column where possible, from the column with the fewest free tips."""
+    name = 'column'
+
+    def select(self, tracker, n):
+        return self._in_one_column(tracker, n) or self._fewest_columns(tracker, n)
+
+
+class SameRackPolicy(FlatOrderPolicy):
+    """All tips of a pickup from the first rack that has enough, in as few columns as possible.
+
+    Raises `ValueError` if no single rack has `n` free tips.
+    """
+    name = 'rack'
+
+    def select(self, tracker, n):
+        for r in _rack_numbers(tracker._racks_nonempty):
+            if _popcount(tracker._masks[r]) >= n:
+                return self._in_one_column(tracker, n, [r]) or self._fewest_columns(tracker, n, [r])
+        raise ValueError(f"No single tip rack has {n} tips available.")
+
+
+class MinimumTravelPolicy(FlatOrderPolicy):
+    """Tips from the column nearest, in x, to the previous pickup; one column where possible.
+
+    Rack positions come from `lmgr` or `rack_positions`. The first pickup starts
+    from `start_x`, by default the left of the deck.
+    """
+    name = 'travel'
+
+    def __init__(self, lmgr=None, rack_positions=None, start_x=0.0):
+        super().__init__(lmgr, rack_positions)
+        self.arm_x = start_x
+
+    def select(self, tracker, n):
+        def distance(r, c):
+            return abs(self.column_x(tracker, r, c) - self.arm_x)
+        return self._in_one_column(tracker, n, cost=distance) or self._fewest_columns(tracker, n, cost=distance)
+
+    def _picked(self, tracker, indices):
+        r, pos = tracker._locate(indices[-1])
+        self.arm_x = self.column_x(tracker, r, pos // _COLUMN)
+
+
+TIP_POLICIES = {policy.name: policy for policy in
+                (FlatOrderPolicy, ContiguousColumnPolicy, SameRackPolicy, MinimumTravelPolicy)}
+
+
+def get_tip_policy(policy, lmgr=None, tracker=None):
+    """A policy instance from a policy, a policy class, or one of the names in `TIP_POLICIES`.
+
+    Classes and names are instantiated with `lmgr`, by default the layout of
+    `tracker`. With a `tracker`, the instance is kept on it and returned again
+    for the same class and layout, so the arm position and move counts carry
+    over from one pickup to the next.
+    """
+    if isinstance(policy, str):
+        try:
+            policy = TIP_POLICIES[policy]
+        except KeyError:
+            raise ValueError(f"Unknown tip policy {policy!r}; choose from {sorted(TIP_POLICIES)}") from None
+    if not isinstance(policy, type):
+        return policy
+    if lmgr is None and tracker is not None:
+        lmgr = tracker.lmgr
+    if tracker is None:
+        return policy(lmgr)
+    instance = tracker._tip_policies.get(policy)
+    if instance is None or instance.lmgr is not lmgr:
+        instance = tracker._tip_policies[policy] = policy(lmgr)
+    return instance
@@ -0,0 +1,323 @@
+"""Virtual instrument clock for `HamiltonInterface(simulating=True)`.
+
+In simulation every command returns immediately. `InstrumentTimingModel` takes
+each simulated command dict and estimates how long the real instrument would
+take for it:
+
+  channel and 96-head steps  a fixed move time, plus liquid handling at the flow
+                             rates and settling times of the command's liquid
+                             class (read from the liquid class database when it
+                             is available)
+  iSWAP and gripper steps    fixed transport times
+  device steps               timed operations (`HHS_StartShakerTimed`,
+                             `HiG_Spin`, `Centrifuge_Start`, `MPE2_Evaporate`,
+                             `ODTC_ExecuteMethod`, ...) keep their device busy in
+                             the background, and the matching waits and status
+                             queries (`HHS_WaitForShaker`, `ODTC_GetStatus`,
+                             `Centrifuge_Stop`, `HiG_IsSpinning`, ...) advance
+                             the clock until the device is done
+
+The result is a predicted timeline of `TimelineEntry` objects, so protocol
+variants can be compared for throughput without the robot:
+
+    with HamiltonInterface(simulating=True) as ham_int:
+        run_protocol(ham_int)
+        print(ham_int.timing_model.total_time(), ham_int.timing_model.summary())
+
+The constants below are rough figures for a STAR; override them on a subclass or
+instance, or pass per-command `durations`, to calibrate against a real run (for
+example from `HamiltonInterface.command_timings()`).
+"""
+from dataclasses import dataclass
+
+from .liquid_class_db import _get_liquid_class_data
+
+
+@dataclass
+class TimelineEntry:
+    """One command on the predicted timeline. Times are seconds since the model started."""
+    id: str
+    command: str
+    resource: str
+    start: float
+    end: float
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+def _volumes(value):
+    """Numbers (volumes, durations) from a command field: a number, a list, or a ';'-separated string."""
+    if value in (None, ''):
+        return []
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    if isinstance(value, str):
+        value = value.split(';')
+    numbers = []
+    for v in value:
+        try:
+            numbers.append(float(v))
+        except (TypeError, ValueError):
+            pass
+    return numbers
+
+
+def _seconds(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class InstrumentTimingModel:
+    """Accumulates estimated durations of simulated commands on a virtual clock.
+
+    Args:
+      durations (dict): Optional; seconds for specific command names, overriding
+        the built-in estimate. Values may also be callables taking the command
+        dict and returning seconds, e.g. `{'HiG_Spin': 330}`. For timed device
+        commands this is how long the device runs in the background.
+      odtc_methods (dict): Optional; run time in seconds of ODTC methods by
+        `MethodName`, e.g. `{'PCR_12_cycles': 2700}`. Other methods take
+        `ODTC_METHOD`.
+    """
+
+    INITIALIZE = 60.0
+    CHANNEL_MOVE = 2.0          # travel to the labware and back up to traverse height
+    LLD_SEARCH = 1.0            # liquid level detection descent, if enabled
+    TIP_PICK_UP = 6.0
+    TIP_EJECT = 5.0
+    MPH96_MOVE = 3.0
+    MPH96_TIP_PICK_UP = 10.0
+    MPH96_TIP_EJECT = 9.0
+    ISWAP_GET = 12.0
+    ISWAP_PLACE = 12.0
+    ISWAP_MOVE = 6.0
+    GRIPPER_GET = 10.0
+    GRIPPER_PLACE = 10.0
+    GRIPPER_MOVE = 5.0
+    CARRIER_LOAD = 20.0
+    DEFAULT_FLOW_RATE = 100.0   # uL/s
+    DEFAULT_SETTLING_TIME = 0.5
+    HEATING_RATE = 0.2          # degC/s for heater shakers
+    AMBIENT_TEMPERATURE = 22.0
+    ODTC_METHOD = 3600.0        # a thermocycler method whose run time is not given
+    OTHER = 0.2                 # parameter sets, queries and other bookkeeping steps
+
+    # command -> (step, resource)
+    _STEPS = {
+        'initialize': ('initialize', 'arm'),
+        'channelTipPickUp': ('tip_pick_up', 'channels'),
+        'channelTipEject': ('tip_eject', 'channels'),
+        'channelAspirate': ('aspirate', 'channels'),
+        'channelDispense': ('dispense', 'channels'),
+        'mph96TipPickUp': ('mph96_tip_pick_up', 'mph96'),
+        'mph96TipEject': ('mph96_tip_eject', 'mph96'),
+        'mph96Aspirate': ('mph96_aspirate', 'mph96'),
+        'mph96Dispense': ('mph96_dispense', 'mph96'),
+        'iSwapGet': ('iswap_get', 'iswap'),
+        'iSwapPlace': ('iswap_place', 'iswap'),
+        'iSwapMove': ('iswap_move', 'iswap'),
+        'gripGet': ('gripper_get', 'gripper'),
+        'gripPlace': ('gripper_place', 'gripper'),
+        'gripMove': ('gripper_move', 'gripper'),
+        'moveSequence': ('channel_move', 'channels'),
+        'loadCarrier': ('carrier', 'autoload'),
+        'unloadCarrier': ('carrier', 'autoload'),
+    }
+
+    # timed device commands: command -> (device label field, duration field)
+    _BACKGROUND = {
+        'HHS_StartShakerTimed': ('deviceNumber', 'shakingTime'),
+        'HHS_StartAllShakerTimed': (None, 'shakingTime'),
+        'HiG_Spin': (None, 'TimeSeconds'),
+        'Centrifuge_Start': ('Label', 'MaxRunTime'),
+        'MPE2_Evaporate': ('DeviceID', 'EvaporateTime'),
+        'MPE2_EvaporateWithRate': ('DeviceID', 'EvaporateTime'),
+        'ODTC_ExecuteMethod': ('DeviceID', None),  # run time from `odtc_methods`
+    }
+    # blocking device commands: command -> (device label field, duration field)
+    _FOREGROUND = {
+        'HiG_SpinAndWait': (None, 'TimeSeconds'),
+        'Centrifuge_Centrifuge': ('Label', 'ArrayDuration'),
+    }
+    # waits: command -> (device prefix, device label field)
+    _WAITS = {
+        'HHS_WaitForShaker': ('HHS_shaker', 'deviceNumber'),
+        'HHS_WaitForTempCtrl': ('HHS_temp', 'deviceNumber'),
+        'MPE2_EvaporateEnd': ('MPE2', 'DeviceID'),
+        'ODTC_GetStatus': ('ODTC', 'DeviceID'),  # polled until idle
+        'Centrifuge_GetStatus': ('Centrifuge', 'Label'),
+        'Centrifuge_Stop': ('Centrifuge', 'Label'),
+        'HiG_IsSpinning': ('HiG', None),
+        'HiG_AbortSpin': ('HiG', None),
+    }
+
+    def __init__(self, durations=None, odtc_methods=None):
+        self.durations = dict(durations or {})
+        self.odtc_methods = dict(odtc_methods or {})
+        self.reset()
+
+    def reset(self):
+        """Clear the timeline and rewind the clock to 0."""
+        self.clock = 0.0
+        self.timeline = []
+        self._busy_until = {}  # device resource -> clock time it finishes
+        self._liquid_classes = {}
+
+    def record(self, cmd):
+        """Add a simulated command dict to the timeline and return its `TimelineEntry`."""
+        name = cmd.get('command', '')
+        cmd_id = cmd.get('id', '')
+        if name in self._BACKGROUND:
+            label_field, time_field = self._BACKGROUND[name]
+            resource = self._device(name.split('_')[0] + ('_shaker' if name.startswith('HHS') else ''), cmd,
+                                    label_field)
+            entry = self._advance(cmd_id, name, 'devices', self.OTHER)
+            self._run_in_background(cmd_id, name, resource, self._run_time(name, cmd, time_field))
+            return entry
+        if name in self.durations:
+            return self._advance(cmd_id, name, self._STEPS.get(name, (None, 'other'))[1], self._override(name, cmd))
+        if name in self._STEPS:
+            step, resource = self._STEPS[name]
+            return self._advance(cmd_id, name, resource, getattr(self, '_' + step)(cmd))
+        if name in self._FOREGROUND:
+            label_field, time_field = self._FOREGROUND[name]
+            return self._advance(cmd_id, name, self._device(name.split('_')[0], cmd, label_field),
+                                 sum(_volumes(cmd.get(time_field))))
+        if name == 'HHS_StartTempCtrl':
+            resource = self._device('HHS_temp', cmd, 'deviceNumber')
+            heat_time = abs(_seconds(cmd.get('temperature'), self.AMBIENT_TEMPERATURE)
+                            - self.AMBIENT_TEMPERATURE) / self.HEATING_RATE
+            if str(cmd.get('waitForTempReached')) in ('1', 'True', 'true'):
+                return self._advance(cmd_id, name, resource, heat_time)
+            entry = self._advance(cmd_id, name, 'devices', self.OTHER)
+            self._run_in_background(cmd_id, name, resource, heat_time)
+            return entry
+        if name in self._WAITS:
+            prefix, label_field = self._WAITS[name]
+            resource = self._device(prefix, cmd, label_field)
+            # a device is also busy while an all-devices operation (no label) runs
+            busy_until = max(self._busy_until.get(resource, 0.0), self._busy_until.get(prefix, 0.0))
+            return self._advance(cmd_id, name, resource, max(0.0, busy_until - self.clock) + self.OTHER)
+        return self._advance(cmd_id, name, 'other', self.OTHER)
+
+    def total_time(self):
+        """Predicted seconds from the first command to the end of the last step, background work included."""
+        return max([self.clock] + list(self._busy_until.values()))
+
+    def summary(self):
+        """Return `{command name: {'count': n, 'seconds': total}}` over the timeline."""
+        summary = {}
+        for entry in self.timeline:
+            totals = summary.setdefault(entry.command, {'count': 0, 'seconds': 0.0})
+            totals['count'] += 1
+            totals['seconds'] += entry.duration
+        return summary
+
+    def _advance(self, cmd_id, name, resource, duration):
+        entry = TimelineEntry(cmd_id, name, resource, self.clock, self.clock + duration)
+        self.timeline.append(entry)
+        self.clock = entry.end
+        return entry
+
+    def _override(self, name, cmd):
+        duration = self.durations[name]
+        return duration(cmd) if callable(duration) else duration
+
+    def _run_time(self, name, cmd, time_field):
+        """Seconds a timed device command keeps its device busy."""
+        if name in self.durations:
+            return self._override(name, cmd)
+        if name == 'ODTC_ExecuteMethod':
+            return self.odtc_methods.get(cmd.get('MethodName'), self.ODTC_METHOD)
+        return sum(_volumes(cmd.get(time_field)))
+
+    def _run_in_background(self, cmd_id, name, resource, duration):
+        start = max(self.clock, self._busy_until.get(resource, 0.0))
+        self._busy_until[resource] = start + duration
+        self.timeline.append(TimelineEntry(cmd_id, name, resource, start, start + duration))
+
+    @staticmethod
+    def _device(prefix, cmd, label_field):
+        if label_field is None:
+            return prefix
+        return prefix + ':' + str(cmd.get(label_field, ''))
+
+    def _liquid_class(self, name):
+        """Flow rates and settling times of a liquid class, with defaults if the database is unavailable."""
+        if name not in self._liquid_classes:
+            fields = ['AsFlowRate', 'AsMixFlowRate', 'AsSettlingTime', 'DsFlowRate', 'DsMixFlowRate', 'DsSettlingTime']
+            try:
+                data = _get_liquid_class_data(name, fields)
+            except Exception: # no database on this machine, no Access driver, unknown class...
+                data = {}
+            self._liquid_classes[name] = {
+                field: _seconds(data.get(field), self.DEFAULT_SETTLING_TIME if field.endswith('SettlingTime')
+                                else self.DEFAULT_FLOW_RATE) or self.DEFAULT_FLOW_RATE
+                for field in fields}
+        return self._liquid_classes[name]
+
+    def _liquid_time(self, cmd, volume, prefix):
+        lc = self._liquid_class(cmd.get('liquidClass'))
+        seconds = volume / lc[prefix + 'FlowRate'] + lc[prefix + 'SettlingTime']
+        mix_cycles = int(_seconds(cmd.get('mixCycles')))
+        if mix_cycles:
+            seconds += 2 * mix_cycles * _seconds(cmd.get('mixVolume')) / lc[prefix + 'MixFlowRate']
+        if _seconds(cmd.get('capacitiveLLD')) or _seconds(cmd.get('pressureLLD')):
+            seconds += self.LLD_SEARCH
+        return seconds
+
+    def _initialize(self, cmd):
+        return self.INITIALIZE
+
+    def _channel_move(self, cmd):
+        return self.CHANNEL_MOVE
+
+    def _tip_pick_up(self, cmd):
+        return self.TIP_PICK_UP
+
+    def _tip_eject(self, cmd):
+        return self.TIP_EJECT
+
+    def _aspirate(self, cmd):
+        # channels work in parallel, so the largest volume sets the pace
+        return self.CHANNEL_MOVE + self._liquid_time(cmd, max(_volumes(cmd.get('volumes')) or [0.0]), 'As')
+
+    def _dispense(self, cmd):
+        return self.CHANNEL_MOVE + self._liquid_time(cmd, max(_volumes(cmd.get('volumes')) or [0.0]), 'Ds')
+
+    def _mph96_tip_pick_up(self, cmd):
+        return self.MPH96_TIP_PICK_UP
+
+    def _mph96_tip_eject(self, cmd):
+        return self.MPH96_TIP_EJECT
+
+    def _mph96_aspirate(self, cmd):
+        return self.MPH96_MOVE + self._liquid_time(cmd, _seconds(cmd.get('aspirateVolume')), 'As')
+
+    def _mph96_dispense(self, cmd):
+        return self.MPH96_MOVE + self._liquid_time(cmd, _seconds(cmd.get('dispenseVolume')), 'Ds')
+
+    def _iswap_get(self, cmd):
+        return self.ISWAP_GET
+
+    def _iswap_place(self, cmd):
+        return self.ISWAP_PLACE
+
+    def _iswap_move(self, cmd):
+        return self.ISWAP_MOVE
+
+    def _gripper_get(self, cmd):
+        return self.GRIPPER_GET
+
+    def _gripper_place(self, cmd):
+        return self.GRIPPER_PLACE
+
+    def _gripper_move(self, cmd):
+        return self.GRIPPER_MOVE
+
+    def _carrier(self, cmd):
+        return self.CARRIER_LOAD
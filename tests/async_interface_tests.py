@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+import requests
+
+from pyhamilton.async_interface import AsyncHamiltonInterface
+from pyhamilton.interface import HamiltonTimeoutError
+
+RESPONSE_TEMPLATE = '{{"command": "STAR-return", "step-name": "command-1", "step-return1": 1, "id": "{}" }}'
+PORT = 3231
+
+
+def _interpret(url, count):
+    """Play the HSL interpreter over one keep-alive connection: GET `count` commands, POST each response."""
+    with requests.Session() as session:
+        answered = 0
+        while answered < count:
+            cmd = session.get(url).text
+            if not cmd:
+                continue
+            session.post(url, data=RESPONSE_TEMPLATE.format(json.loads(cmd)['id']))
+            answered += 1
+
+
+@pytest.fixture
+def no_oem_process(mocker):
+    process = mocker.patch("pyhamilton.async_interface.Process")
+    kill = mocker.patch("os.kill")  # a mocked pid must never reach a real signal
+    yield process.return_value
+    kill.assert_not_called()
+
+
+class Test_AsyncHamiltonInterface:
+    def test_concurrent_commands_resolve(self, no_oem_process):
+        async def scenario():
+            async with AsyncHamiltonInterface(port=PORT) as ham:
+                pending = [ham.send_command(command='ping', id='async-' + str(i)) for i in range(3)]
+                interpreter = asyncio.get_running_loop().run_in_executor(
+                    None, _interpret, 'http://{}:{}'.format(ham.address, ham.port), 3)
+                responses = await asyncio.gather(*(ham.wait_on_response(p, timeout=5) for p in pending))
+                await interpreter
+                return responses
+
+        responses = asyncio.run(scenario())
+        assert [json.loads(r.raw)['id'] for r in responses] == ['async-0', 'async-1', 'async-2']
+        no_oem_process.terminate.assert_called_once_with()
+
+    def test_wait_on_response_times_out(self, no_oem_process):
+        async def scenario():
+            async with AsyncHamiltonInterface(port=PORT) as ham:
+                with pytest.raises(HamiltonTimeoutError):
+                    await ham.wait_on_response(ham.send_command(command='ping', id='async-timeout'), timeout=0.1)
+                await asyncio.sleep(0)
+                return dict(ham._pending)
+
+        assert asyncio.run(scenario()) == {}  # the timed-out command is not kept waiting
+
+    def test_simulating_resolves_immediately(self):
+        async def scenario():
+            async with AsyncHamiltonInterface(simulating=True) as ham:
+                return await ham.wait_on_response(ham.send_command(command='ping', id='async-sim'))
+
+        assert asyncio.run(scenario()) is None
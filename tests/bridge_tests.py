@@ -0,0 +1,294 @@
+import http.client
+import json
+import time
+from threading import Thread
+
+import pytest
+import requests
+
+from pyhamilton.bridge import Bridge, CommandQueue, ResponseStore
+from pyhamilton.command_timing import LatencyHistogram
+from pyhamilton.interface import (
+    HamiltonInterface,
+    HamiltonServerThread,
+    HamiltonTimeoutError,
+)
+from pyhamilton.interpreter_standin import InterpreterStandIn
+from pyhamilton.oemerr import HamiltonQueueFullError, NotExecutedError, NoTipError
+
+RESPONSE_TEMPLATE = '{{"command": "STAR-return", "step-name": "command-1", "step-return1": 1, "id": "{}" }}'
+
+
+@pytest.fixture
+def ham_int(mocker):
+    mocker.patch("pyhamilton.interface.HamiltonInterface.start", return_value=None)
+    mocker.patch("pyhamilton.interface.HamiltonInterface.stop", return_value=None)
+    ham_int = HamiltonInterface()
+    ham_int.active = True
+    yield ham_int
+    ham_int.active = False
+
+
+def _interpret_one(url, delay=0.0):
+    """Play the HSL interpreter: GET one command, then POST its response."""
+    while True:
+        cmd = requests.get(url).text
+        if cmd:
+            break
+    time.sleep(delay)
+    cmd_id = json.loads(cmd)['id']
+    requests.post(url, data=RESPONSE_TEMPLATE.format(cmd_id))
+
+
+class Test_BridgeResponses:
+    def test_wait_on_response_wakes_when_response_is_posted(self, ham_int):
+        url = 'http://{}:{}'.format(ham_int.address, ham_int.port)
+        cmd_id = ham_int.send_command(command='ping', id='evt-wake')
+        interpreter = Thread(target=_interpret_one, args=(url, 0.05), daemon=True)
+        interpreter.start()
+
+        start = time.perf_counter()
+        response = ham_int.wait_on_response(cmd_id, timeout=5)
+        elapsed = time.perf_counter() - start
+        interpreter.join()
+
+        assert json.loads(response.raw)['id'] == cmd_id
+        assert elapsed < 0.5
+        assert response.latency is not None and response.latency >= 0.05
+
+    def test_wait_on_response_times_out(self, ham_int):
+        cmd_id = 'evt-timeout'
+        with pytest.raises(HamiltonTimeoutError):
+            ham_int.wait_on_response(cmd_id, timeout=0.1)
+        assert ham_int.bridge.pop_response(cmd_id) is None
+
+    def test_response_evicted_before_claim_raises_timeout(self, ham_int, mocker):
+        store = ham_int.bridge.responses
+        mocker.patch.object(store, 'maxsize', 1)  # the store is shared by every interface on this port
+        # the waiter holds the event when the response lands, then a newer response evicts it
+        event = ham_int.bridge.response_event('evicted')
+        store.put('evicted', RESPONSE_TEMPLATE.format('evicted').encode())
+        store.put('newer', RESPONSE_TEMPLATE.format('newer').encode())
+        mocker.patch.object(ham_int.bridge, 'response_event', return_value=event)
+        with pytest.raises(HamiltonTimeoutError, match='evicted'):
+            ham_int.wait_on_response('evicted', timeout=1)
+
+
+def _interpret_batch(url, batch_max=16):
+    """Play a batch-aware interpreter: GET one envelope, answer all of it in one POST."""
+    while True:
+        cmd = requests.get(url, headers={'X-Batch-Max': str(batch_max)}).text
+        if cmd:
+            break
+    envelope = json.loads(cmd)
+    results = [json.loads(RESPONSE_TEMPLATE.format(c['id'])) for c in envelope['commands']]
+    requests.post(url, data=json.dumps({'command': 'batch-return', 'id': envelope['id'], 'results': results}))
+    return envelope
+
+
+class Test_BridgeBatching:
+    def test_batch_is_sent_in_one_envelope(self, ham_int):
+        url = 'http://{}:{}'.format(ham_int.address, ham_int.port)
+        envelopes = []
+        interpreter = Thread(target=lambda: envelopes.append(_interpret_batch(url)), daemon=True)
+        interpreter.start()
+
+        with ham_int.batch() as batch:
+            cmd_ids = [ham_int.send_command(command='ping', id='batch-' + str(i)) for i in range(3)]
+            # deferred until the block exits
+            assert ham_int.wait_on_response(cmd_ids[0], raise_first_exception=True) is None
+        interpreter.join()
+
+        assert [c['id'] for c in envelopes[0]['commands']] == cmd_ids
+        assert [json.loads(batch.responses[i].raw)['id'] for i in cmd_ids] == cmd_ids
+
+    def test_batch_falls_back_to_one_command_per_get(self, ham_int):
+        url = 'http://{}:{}'.format(ham_int.address, ham_int.port)
+        interpreter = Thread(target=lambda: [_interpret_one(url) for _ in range(2)], daemon=True)
+        interpreter.start()
+
+        with ham_int.batch() as batch:
+            cmd_ids = [ham_int.send_command(command='ping', id='unbatched-' + str(i)) for i in range(2)]
+        interpreter.join()
+
+        assert sorted(batch.responses) == sorted(cmd_ids)
+
+
+class Test_ThreadedServer:
+    def test_connection_is_kept_alive_across_polls(self):
+        server_thread = HamiltonServerThread('127.0.0.1', 3241, threaded=True)
+        server_thread.start()
+        try:
+            time.sleep(0.2)
+            server_thread.bridge.send_str('{"command": "ping", "id": "keep-alive"}', 'keep-alive')
+            conn = http.client.HTTPConnection('127.0.0.1', 3241, timeout=5)
+            conn.request('GET', '/')
+            assert json.loads(conn.getresponse().read())['id'] == 'keep-alive'
+            conn.request('POST', '/', body=RESPONSE_TEMPLATE.format('keep-alive'))
+            assert conn.getresponse().status == 200
+            conn.close()
+            assert server_thread.bridge.response_event('keep-alive').wait(2)
+            assert server_thread.bridge.pop_response('keep-alive') is not None
+        finally:
+            server_thread.should_continue = False
+            server_thread.join(timeout=2)
+
+
+class Test_CommandQueue:
+    def test_full_queue_raises_or_times_out(self):
+        queue = CommandQueue(maxsize=2, overflow='raise')
+        queue.put('a', b'a')
+        queue.put('b', b'b')
+        with pytest.raises(HamiltonQueueFullError):
+            queue.put('c', b'c')
+        queue = CommandQueue(maxsize=1, put_timeout=0.05)
+        queue.put('a', b'a')
+        with pytest.raises(HamiltonQueueFullError):
+            queue.put('b', b'b')
+        assert queue.metrics()['rejected'] == 1 and queue.metrics()['blocked_puts'] == 1
+        assert CommandQueue().put_timeout is not None
+
+    def test_rejected_send_leaves_no_waiter(self):
+        bridge = Bridge()
+        bridge.send_queue = CommandQueue(maxsize=1, overflow='raise')
+        bridge.send_str('{}', 'queued')
+        with pytest.raises(HamiltonQueueFullError):
+            bridge.send_str('{}', 'rejected')
+        with pytest.raises(HamiltonQueueFullError):
+            bridge.send_batch([('b1', '{}'), ('b2', '{}')], 'batch')
+        assert bridge.responses.metrics()['waiting'] == 1
+
+    def test_blocked_put_resumes_when_interpreter_polls(self):
+        queue = CommandQueue(maxsize=1, put_timeout=2)
+        queue.put('a', b'a')
+        Thread(target=lambda: (time.sleep(0.05), queue.pop()), daemon=True).start()
+        queue.put('b', b'b')
+        assert [cmd_id for cmd_id, _, _ in queue.pop()] == ['b']
+
+    def test_wait_drained_wakes_on_last_pop(self):
+        queue = CommandQueue()
+        queue.put_many([('a', b'a'), ('b', b'b')], batch_id='batch')
+        Thread(target=lambda: (time.sleep(0.05), queue.pop(batch_max=8)), daemon=True).start()
+        assert queue.wait_drained(timeout=2)
+        metrics = queue.metrics()
+        assert (metrics['depth'], metrics['max_depth'], metrics['dequeued']) == (0, 2, 2)
+
+
+class Test_ResponseStore:
+    def test_size_and_ttl_eviction(self):
+        store = ResponseStore(maxsize=2, ttl=None)
+        for idx in 'abc':
+            store.expect(idx)
+            store.put(idx, idx.encode())
+        assert 'a' not in store and len(store) == 2
+        store = ResponseStore(maxsize=10, ttl=0.05)
+        store.put('old', b'old')
+        time.sleep(0.1)
+        store.put('new', b'new')
+        assert 'old' not in store and 'new' in store
+        assert store.metrics()['expired'] == 1
+
+    def test_orphans_are_counted(self):
+        store = ResponseStore(maxsize=2)
+        store.expect('late')
+        store.abandon('late')
+        store.put('late', b'late')
+        assert store.pop('late') == (b'late', None)
+        assert store.pop('late') == (None, None)
+        for idx in ('fire', 'and', 'forget'):
+            store.expect(idx)  # as send_str does for every command
+            store.put(idx, idx.encode())
+        assert store.metrics()['orphaned'] == 1  # 'fire', dropped before anyone claimed it
+
+    def test_unanswered_waiters_expire(self):
+        store = ResponseStore(ttl=0.05)
+        store.expect('lost')
+        store.mark_picked_up('lost', time.perf_counter())
+        time.sleep(0.1)
+        store.expect('next')
+        metrics = store.metrics()
+        assert (metrics['waiting'], metrics['unanswered']) == (1, 1)
+        assert 'lost' not in store._events and 'lost' not in store._pickup_times
+
+
+class Test_InterpreterStandIn:
+    def test_responses_and_injected_errors(self, ham_int):
+        positions = 'Tips_0001, A1;Tips_0001, B1'
+        with InterpreterStandIn(port=ham_int.port) as standin:
+            standin.inject_error('channelTipPickUp', 8)
+            with pytest.raises(NoTipError):
+                ham_int.wait_on_response(ham_int.send_command(
+                    command='channelTipPickUp', labwarePositions=positions, channelVariable='11' + '0' * 14),
+                    timeout=5, raise_first_exception=True)
+            response = ham_int.wait_on_response(ham_int.send_command(
+                command='channelTipPickUp', labwarePositions=positions, channelVariable='11' + '0' * 14),
+                timeout=5, raise_first_exception=True)
+            assert [block['labwarePos'] for block in response.parsed_return] == ['A1', 'B1']
+            standin.inject_error('HHS_StartShaker', 3)
+            with pytest.raises(NotExecutedError):
+                ham_int.wait_on_response(ham_int.send_command(command='HHS_StartShaker', deviceNumber=1,
+                    shakingSpeed=800), timeout=5, raise_first_exception=True)
+        assert standin.handled == {'channelTipPickUp': 2, 'HHS_StartShaker': 1}
+
+
+class Test_CommandTimer:
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for seconds in [0.001] * 90 + [1.0] * 10:
+            histogram.add(seconds)
+        summary = histogram.summary()
+        assert summary['count'] == 100 and summary['max'] == 1.0
+        assert 0.001 <= summary['p50'] < 0.002
+        assert 0.5 < summary['p99'] <= 1.0
+
+    def test_phases_per_command(self, ham_int, tmp_path):
+        ham_int.bridge.command_timer.reset()
+        with InterpreterStandIn(port=ham_int.port, delays={'channelAspirate': 0.02}):
+            ham_int.wait_on_response(ham_int.send_command(command='ping', id='timed-ping'), timeout=5)
+            ham_int.wait_on_response(ham_int.send_command(
+                command='channelAspirate', labwarePositions='Plate_0001, A1', channelVariable='1' + '0' * 15,
+                volumes=[10.0], liquidClass='HighVolume_Water_DispenseJet_Empty'), timeout=5)
+        timings = ham_int.command_timings()
+        assert set(timings) == {'ping', 'channelAspirate'}
+        aspirate = timings['channelAspirate']
+        assert set(aspirate) == {'assembly', 'send_wait', 'queue_wait', 'execution', 'response_pickup', 'total'}
+        assert aspirate['execution']['count'] == 1 and aspirate['execution']['min'] >= 0.02
+        assert aspirate['total']['min'] >= aspirate['execution']['min']
+        dump_path = tmp_path / 'timings.json'
+        ham_int.dump_command_timings(str(dump_path))
+        assert json.loads(dump_path.read_text())['commands'] == json.loads(json.dumps(timings))
+
+    def test_open_batch_counts_as_send_wait(self, ham_int):
+        ham_int.bridge.command_timer.reset()
+        with InterpreterStandIn(port=ham_int.port):
+            with ham_int.batch():
+                ham_int.send_command(command='ping', id='held-ping')
+                time.sleep(0.1)
+        ping = ham_int.command_timings()['ping']
+        assert ping['assembly']['max'] < 0.05 and ping['send_wait']['min'] >= 0.1
+
+
+class Test_MultipleInstruments:
+    def test_interfaces_on_different_ports_are_independent(self, mocker):
+        mocker.patch("pyhamilton.interface.HamiltonInterface.start", return_value=None)
+        mocker.patch("pyhamilton.interface.HamiltonInterface.stop", return_value=None)
+        first, second = HamiltonInterface(port=3281), HamiltonInterface(port=3282)
+        assert HamiltonInterface(port=3281).bridge is first.bridge
+        assert first.bridge is not second.bridge
+        first.active = second.active = True
+        with InterpreterStandIn(port=3281) as first_standin, InterpreterStandIn(port=3282) as second_standin:
+            first_id = first.send_command(command='HHS_GetTemperature', deviceNumber=1, id='same-id')
+            second_id = second.send_command(command='ping', id='same-id')
+            assert json.loads(first.wait_on_response(first_id, timeout=5).raw)['step-name'] == 'HHS_GetTemperature'
+            assert json.loads(second.wait_on_response(second_id, timeout=5).raw)['step-name'] == 'ping'
+        assert first_standin.handled == {'HHS_GetTemperature': 1}
+        assert second_standin.handled == {'ping': 1}
+        assert first.queue_metrics()['enqueued'] == second.queue_metrics()['enqueued'] == 1
+
+    def test_interfaces_on_different_addresses_are_independent(self, mocker):
+        mocker.patch("pyhamilton.interface.HamiltonInterface.start", return_value=None)
+        mocker.patch("pyhamilton.interface.HamiltonInterface.stop", return_value=None)
+        first = HamiltonInterface(address='127.0.0.1', port=3283)
+        second = HamiltonInterface(address='127.0.0.2', port=3283)
+        assert HamiltonInterface(address='127.0.0.2', port=3283).bridge is second.bridge
+        assert first.bridge is not second.bridge
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from pyhamilton.devices import DeviceScheduler
+from pyhamilton.interface import HamiltonInterface, HamiltonTimeoutError
+from pyhamilton.interpreter_standin import InterpreterStandIn
+from pyhamilton.oemerr import TemperatureError
+
+
+@pytest.fixture
+def ham_int(mocker):
+    mocker.patch("pyhamilton.interface.HamiltonInterface.start", return_value=None)
+    mocker.patch("pyhamilton.interface.HamiltonInterface.stop", return_value=None)
+    ham_int = HamiltonInterface()
+    ham_int.active = True
+    yield ham_int
+    ham_int.active = False
+
+
+class DeviceStandIn(InterpreterStandIn):
+    """Stand-in whose status commands report scripted values, one per query."""
+
+    def __init__(self, readings, **kwargs):
+        super().__init__(**kwargs)
+        self.readings = {name: list(values) for name, values in readings.items()}
+
+    def execute(self, cmd):
+        response = super().execute(cmd)
+        values = self.readings.get(cmd['command'])
+        if values:
+            response['step-return2'] = values.pop(0) if len(values) > 1 else values[0]
+        return response
+
+
+class Test_DeviceScheduler:
+    def test_pipetting_continues_while_shaking(self, ham_int):
+        with InterpreterStandIn(port=ham_int.port) as standin, DeviceScheduler(ham_int, poll_interval=0.05) as devices:
+            shake = devices.hhs_start_shaker_timed(1, 800, 0.3)
+            started = time.monotonic()
+            ham_int.wait_on_response(ham_int.send_command(command='HHS_GetTemperature', deviceNumber=1), timeout=5)
+            assert time.monotonic() - started < 0.3 and not shake.done()
+            with pytest.raises(HamiltonTimeoutError):
+                shake.join(timeout=0.01)
+            assert shake.join(timeout=5).raw is not None
+            assert shake.elapsed() >= 0.3
+        assert standin.handled['HHS_WaitForShaker'] == 1
+
+    def test_odtc_polls_until_idle(self, ham_int):
+        readings = {'ODTC_GetStatus': ['busy', 'busy', 'idle'], 'ODTC_ReadActualTemperature': ['95.0', '4.0']}
+        with DeviceStandIn(readings, port=ham_int.port) as standin:
+            devices = DeviceScheduler(ham_int, poll_interval=0.01)
+            cycle = devices.odtc_execute_protocol(1, 'bead_binding')
+            assert devices.join_all(timeout=5) == [cycle.response]
+            devices.stop()
+        assert standin.handled['ODTC_GetStatus'] == 3
+        assert cycle.status[0] == '4.0' and devices.pending() == []
+
+    def test_temperature_control(self, ham_int):
+        readings = {'HHS_GetTemperature': ['25.0', '33.0', '36.6'], 'HHS_GetTemperatureState': ['0']}
+        with DeviceStandIn(readings, port=ham_int.port), DeviceScheduler(ham_int, poll_interval=0.01) as devices:
+            assert devices.hhs_start_temp_ctrl(1, 37, tolerance=0.5).join(timeout=5) == 36.6
+
+    def test_temperature_fault_fails_operation(self, ham_int):
+        readings = {'HHS_GetTemperatureState': ['3']}
+        with DeviceStandIn(readings, port=ham_int.port), DeviceScheduler(ham_int, poll_interval=0.01) as devices:
+            heat = devices.hhs_start_temp_ctrl(1, 37)
+            with pytest.raises(TemperatureError):
+                heat.join(timeout=5)
+
+    def test_polls_are_not_captured_by_a_batch_on_another_thread(self, ham_int):
+        readings = {'ODTC_GetStatus': ['busy', 'idle'], 'ODTC_ReadActualTemperature': ['4.0']}
+        with DeviceStandIn(readings, port=ham_int.port) as standin, \
+                DeviceScheduler(ham_int, poll_interval=0.01) as devices:
+            cycle = devices.odtc_execute_protocol(1, 'bead_binding')
+            with ham_int.batch() as cmd_batch:
+                ham_int.send_command(command='ping', id='batched-ping')
+                assert cycle.join(timeout=5) == cycle.response
+            assert [cmd_id for cmd_id, _ in cmd_batch.commands] == ['batched-ping']
+        assert standin.handled['ODTC_GetStatus'] == 2
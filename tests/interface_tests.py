@@ -1,8 +1,10 @@
+import json
 from collections import namedtuple
 
 import pytest
 
 from pyhamilton.interface import (
+    HamiltonCmdTemplate,
     HamiltonInterface,
     HamiltonResponse,
     HamiltonResponseStatus,
@@ -396,6 +398,9 @@ class Test_HamiltonInterface:
         hamiltonInterface = HamiltonInterface()
         response = hamiltonInterface.parse_response(server_response=server_response)
         assert response == expected_response
+        # callers check isinstance(block, dict) and json.dumps the blocks
+        assert all(type(block) is dict for block in response.parsed_return or [])
+        json.dumps(response.parsed_return)
 
     @pytest.mark.parametrize(
         "server_response,expected_exception",
@@ -446,3 +451,48 @@ class Test_HamiltonInterface:
         hamiltonInterface = HamiltonInterface()
         with pytest.raises(expected_exception):
             hamiltonInterface.parse_response(server_response=server_response, raise_first_exception=True)
+
+
+class Test_HamiltonCmdTemplate:
+    VALUES = ['value;1', 'caf\u00e9 "x"', 3, 2.5, -0.0, float('nan'), float('inf'), True, None, [25.0, 'A1', 1]]
+
+    @staticmethod
+    def _kwargs(template, override_defaults):
+        kwargs = {'id': '0x1234'}
+        for i, key in enumerate(template.params_list):
+            if key not in template.defaults or (override_defaults and i % 2):
+                kwargs[key] = Test_HamiltonCmdTemplate.VALUES[i % len(Test_HamiltonCmdTemplate.VALUES)]
+        return kwargs
+
+    @pytest.mark.parametrize("override_defaults", [False, True])
+    def test_serialize_cmd_matches_assemble_cmd(self, override_defaults):
+        for template in HamiltonInterface.known_templates.values():
+            kwargs = self._kwargs(template, override_defaults)
+            try:
+                expected = ('0x1234', json.dumps(template.assemble_cmd(**kwargs)))
+            except ValueError:
+                # e.g. a default named 'command' that clobbers the command name
+                with pytest.raises(ValueError):
+                    template.serialize_cmd(**kwargs)
+                continue
+            assert template.serialize_cmd(**kwargs) == expected
+
+    def test_serialize_cmd_reports_mismatch_like_assemble_cmd(self):
+        template = HamiltonInterface.known_templates['channelAspirate']
+        for kwargs in ({'id': '1', 'notAField': 1}, {'id': '1', 'command': 'channelDispense'}, {'id': '1'}):
+            with pytest.raises(ValueError) as assembled:
+                template.assemble_cmd(**kwargs)
+            with pytest.raises(ValueError) as serialized:
+                template.serialize_cmd(**kwargs)
+            assert str(serialized.value) == str(assembled.value)
+
+    def test_defaults_outside_params_list_are_rejected(self):
+        # a user-built template that leaves out keys its command's defaults fill in
+        template = HamiltonCmdTemplate('channelAspirate', ['channelVariable', 'labwarePositions', 'volumes'])
+        assert not template.defaults.keys() <= set(template.params_list)
+        kwargs = {'id': '1', 'channelVariable': '1' + '0' * 15, 'labwarePositions': 'P, A1', 'volumes': [10]}
+        with pytest.raises(ValueError) as assembled:
+            template.assemble_cmd(**kwargs)
+        with pytest.raises(ValueError) as serialized:
+            template.serialize_cmd(**kwargs)
+        assert str(serialized.value) == str(assembled.value)
@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+
+import pytest
+
+from pyhamilton.interface import HamiltonInterface
+from pyhamilton.interpreter_standin import InterpreterStandIn, SessionReplayer
+from pyhamilton.journal import CommandJournal, read_journal
+from pyhamilton.oemerr import NoTipError
+
+
+@pytest.fixture
+def ham_int(mocker):
+    mocker.patch("pyhamilton.interface.HamiltonInterface.start", return_value=None)
+    mocker.patch("pyhamilton.interface.HamiltonInterface.stop", return_value=None)
+    ham_int = HamiltonInterface()
+    ham_int.active = True
+    yield ham_int
+    ham_int.active = False
+    ham_int.json_logger.close_journal()
+
+
+class Test_CommandJournal:
+    def test_records_are_json_lines(self, tmp_path):
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CommandJournal(path, flush_interval=60)
+        journal.record_command('1', json.dumps({'command': 'ping', 'id': '1'}))
+        journal.record_response('1', b'{"command": "STAR-return", "id": "1"}')
+        journal.record_response('2', 'not json')
+        journal.close()
+        records = list(read_journal(path))
+        assert [(r['kind'], r['id'], r['data']) for r in records] == [
+            ('command', '1', {'command': 'ping', 'id': '1'}),
+            ('response', '1', {'command': 'STAR-return', 'id': '1'}),
+            ('response', '2', 'not json')]
+        assert records[0]['t'] <= records[1]['t']
+        assert journal.metrics() == {'recorded': 3, 'written': 3, 'buffered': 0, 'dropped': 0, 'rotations': 0}
+
+    def test_rotation(self, tmp_path):
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CommandJournal(path, max_bytes=200, backup_count=2, flush_interval=60)
+        for i in range(5):
+            journal.record_command(str(i), {'command': 'ping', 'id': str(i), 'pad': 'x' * 200})
+            journal.flush()
+        journal.close()
+        assert journal.metrics()['rotations'] == 5
+        assert [r['id'] for r in read_journal(path + '.1')] == ['4']
+        assert [r['id'] for r in read_journal(path + '.2')] == ['3']
+        assert not (tmp_path / 'journal.jsonl.3').exists()
+
+    def test_record_does_not_wait_for_a_slow_write(self, tmp_path, mocker):
+        journal = CommandJournal(str(tmp_path / 'journal.jsonl'), flush_interval=60)
+        writing, release = threading.Event(), threading.Event()
+
+        def slow_write(text):
+            writing.set()
+            release.wait(5)
+        mocker.patch.object(journal, '_file', mocker.Mock(write=slow_write, tell=lambda: 0))
+        journal.record_command('1', {'id': '1'})
+        flusher = threading.Thread(target=journal.flush)
+        flusher.start()
+        assert writing.wait(5)
+        started = time.perf_counter()
+        journal.record_command('2', {'id': '2'})
+        assert time.perf_counter() - started < 0.1
+        assert journal.metrics()['buffered'] == 1 and journal.metrics()['dropped'] == 0
+        release.set()
+        flusher.join()
+        assert journal.metrics()['written'] == 1
+        journal.close()
+
+    def test_full_buffer_drops_oldest(self, tmp_path):
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CommandJournal(path, buffer_size=3, flush_interval=60)
+        for i in range(5):
+            journal.record_command(str(i), {'id': str(i)})
+        journal.close()
+        assert [r['id'] for r in read_journal(path)] == ['2', '3', '4']
+        assert journal.metrics()['dropped'] == 2
+
+    def test_interface_journals_commands_and_responses(self, ham_int, tmp_path):
+        path = str(tmp_path / 'journal.jsonl')
+        ham_int.json_logger.set_journal(path, flush_interval=0.01)
+        with InterpreterStandIn(port=ham_int.port):
+            ham_int.wait_on_response(ham_int.send_command(command='HHS_GetTemperature', deviceNumber=1, id='j1'),
+                                     timeout=5)
+        ham_int.json_logger.close_journal()
+        records = list(read_journal(path))
+        assert [(r['kind'], r['id']) for r in records] == [('command', 'j1'), ('response', 'j1')]
+        assert records[0]['data']['command'] == 'HHS_GetTemperature'
+        assert records[1]['data']['step-name'] == 'HHS_GetTemperature'
+
+    def test_interface_journals_responses_nobody_waits_on(self, ham_int, tmp_path):
+        path = str(tmp_path / 'journal.jsonl')
+        ham_int.record_session(path, flush_interval=0.01)
+        with InterpreterStandIn(port=ham_int.port):
+            ham_int.send_command(command='HHS_GetTemperature', deviceNumber=1, id='j2')
+            assert ham_int.bridge.response_event('j2').wait(5)
+        ham_int.json_logger.close_journal()
+        assert [(r['kind'], r['id']) for r in read_journal(path)] == [('command', 'j2'), ('response', 'j2')]
+
+
+class Test_SessionReplay:
+    POSITIONS = 'Tips_0001, A1;Tips_0001, B1'
+
+    def _run_protocol(self, ham_int):
+        ham_int.wait_on_response(ham_int.send_command(command='HHS_GetTemperature', deviceNumber=1), timeout=5)
+        with pytest.raises(NoTipError):
+            ham_int.wait_on_response(ham_int.send_command(
+                command='channelTipPickUp', labwarePositions=self.POSITIONS, channelVariable='11' + '0' * 14),
+                timeout=5, raise_first_exception=True)
+        return ham_int.wait_on_response(ham_int.send_command(
+            command='channelTipPickUp', labwarePositions=self.POSITIONS, channelVariable='11' + '0' * 14),
+            timeout=5, raise_first_exception=True)
+
+    def test_replay_serves_recorded_responses(self, ham_int, tmp_path):
+        path = str(tmp_path / 'session.jsonl')
+        ham_int.record_session(path, flush_interval=0.01)
+        with InterpreterStandIn(port=ham_int.port, delays={'HHS_GetTemperature': 0.2}) as standin:
+            standin.inject_error('channelTipPickUp', 8)
+            self._run_protocol(ham_int)
+        ham_int.json_logger.close_journal()
+
+        session = SessionReplayer.load_session(path)
+        assert [entry[0]['command'] for entry in session] == ['HHS_GetTemperature'] + ['channelTipPickUp'] * 2
+        assert session[0][2] >= 0.2
+        with SessionReplayer(path, port=ham_int.port) as replayer:
+            response = self._run_protocol(ham_int)
+            # diverge from the recording: answered by the plain stand-in
+            ham_int.wait_on_response(ham_int.send_command(command='HHS_GetTemperature', deviceNumber=1), timeout=5)
+        assert [block['labwarePos'] for block in response.parsed_return] == ['A1', 'B1']
+        assert replayer.position == 3
+        assert replayer.divergences == [(3, 'HHS_GetTemperature', None)]
+        # replayed flat out, not at the recorded 0.2 s
+        assert ham_int.command_timings()['HHS_GetTemperature']['execution']['min'] < 0.1
@@ -0,0 +1,175 @@
+import os
+import re
+
+import pytest
+
+from pyhamilton.interface import HamiltonInterface
+from pyhamilton.resources import (LayoutManager, Plate96, Plate384, Plate1536, Reservoir60mL, ResourceType, Tip96,
+    Vessel, resource_list_with_prefix)
+from pyhamilton.resources import layout_cache
+
+NGS_LAYOUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'pyhamilton', 'ngs', 'tests', 'PacBio_MultiPlexLibraryPrepDeck_v1.2.lay')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(layout_cache, 'LAYOUT_CACHE_DIR', tmp_path / 'layout_cache')
+    return tmp_path / 'layout_cache'
+
+
+def byte_by_byte_lines(data):
+    """Reference splitting: the layout reader's output, one byte at a time."""
+    buff, lines = '', []
+    for c in data:
+        if c >= 0x80:
+            continue
+        buff += chr(c)
+        if chr(c) in '\n\r\t':
+            lines.append(buff.strip())
+            buff = ''
+    if buff:
+        lines.append(buff)
+    return lines
+
+
+class Test_LayoutReader:
+    @pytest.mark.parametrize('data', [
+        b'',
+        b'HxPars,3\r\n ObjId\tplate_0001 \r\n\t\n',
+        b'caf\xc3\xa9\tna\xefve\x00name  \n  trailing  ',
+        b'\t\t\r\r\n\nlast\n',
+    ])
+    def test_matches_byte_by_byte(self, tmp_path, data):
+        path = tmp_path / 'deck.lay'
+        path.write_bytes(data)
+        assert LayoutManager._read_layfile_lines(str(path)) == byte_by_byte_lines(data)
+
+    def test_ngs_layout(self):
+        with open(NGS_LAYOUT, 'rb') as f:
+            expected = byte_by_byte_lines(f.read())
+        lmgr = LayoutManager(NGS_LAYOUT, install=False)
+        assert lmgr.lines == expected
+        assert lmgr.checksum == expected[-1].split('checksum=')[1].split('$$')[0]
+        assert LayoutManager.layfiles_equal(NGS_LAYOUT, NGS_LAYOUT)
+
+    @pytest.mark.parametrize('ending', [b'', b'  ', b'\n'])
+    def test_checksum_from_file_end(self, tmp_path, ending):
+        path = tmp_path / 'deck.lay'
+        path.write_bytes(b'x' * 5000 + b'\n' + b'y\xa7' * 3000 + b'$$checksum=0badf00d$$length=090$$' + ending)
+        assert LayoutManager._layfile_checksum(str(path)) == '0badf00d'
+        path.write_bytes(b'\n* $$checksum=1234abcd$$' + ending)
+        assert LayoutManager._layfile_checksum(str(path)) == '1234abcd'
+
+
+class Test_LayoutCache:
+    def test_cache_is_reused(self, cache_dir, mocker):
+        lmgr = LayoutManager(NGS_LAYOUT, install=False)
+        lmgr.assign_unused_resource(ResourceType(Plate96, 'HHS1_HSP'))
+        assert (cache_dir / (lmgr.checksum + '.jsonl')).exists()
+
+        read = mocker.patch.object(LayoutManager, '_read_layfile_lines')
+        find = mocker.patch.object(LayoutManager, '_find_resource_line')
+        cached = LayoutManager(NGS_LAYOUT, install=False)
+        assert cached.lines == lmgr.lines
+        assert cached.verify_position_ids(Plate96('HHS1_HSP')) == (True, [])
+        read.assert_not_called()
+        find.assert_not_called()
+
+    def test_changed_layout_is_reparsed(self, tmp_path):
+        with open(NGS_LAYOUT, 'rb') as f:
+            data = f.read()
+        edited = tmp_path / 'edited.lay'
+        edited.write_bytes(data.replace(b'HHS1_HSP', b'HHS9_HSP').replace(b'checksum=9788589a', b'checksum=0000beef'))
+        original = LayoutManager(NGS_LAYOUT, install=False)
+        lmgr = LayoutManager(str(edited), install=False)
+        assert lmgr.checksum == '0000beef'
+        assert lmgr.lines != original.lines
+        assert lmgr.assign_unused_resource(ResourceType(Plate96, 'HHS9_HSP')).layout_name() == 'HHS9_HSP'
+
+    def test_no_cache(self, cache_dir):
+        assert LayoutManager(NGS_LAYOUT, install=False, use_cache=False).lines
+        assert not cache_dir.exists()
+
+
+def scan_resource_line(lines, resource_name):
+    """Reference lookup: the position-id line rules applied to every line."""
+    name = re.escape(resource_name)
+    matching = [line for line in lines if re.search(rf"ObjId[\s\x00-\x1f]*{name}(?:[\s\x00-\x1f]|Seq)", line)]
+    matching += [line for line in lines if re.search(rf"^{name}[\s\x00-\x1f]", line) and 'PosId' in line]
+    if matching:
+        return ''.join(matching)
+    return next((line for line in lines
+                 if re.search(rf"Seq\.\d+\.Name[\s\x00-\x1f]*{name}(?:[\s\x00-\x1f]+|(?=Seq))", line)), None)
+
+
+@pytest.fixture(scope='module')
+def lmgr():
+    return LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+
+
+class Test_LayoutModel:
+    def test_resource_lines_match_line_scan(self, lmgr):
+        names = {LayoutManager.name_from_line(line) for line in lmgr.lines[::7]}
+        names |= {'HHS1_HSP', 'STF_L_0001', 'CPAC_HSP_0001', 'HSP_Waste', 'HSP', 'no such name', ''}
+        for name in names:
+            assert lmgr.model.find_resource_line(name) == scan_resource_line(lmgr.lines, name), name
+
+    def test_indexed_matches_line_tests(self, lmgr):
+        for name in ('HHS1_HSP', 'Labware', 'HSP', 'TIP_50uLF', 'no_such_name'):
+            restype = ResourceType(Plate96, name)
+            assert restype.name == name
+            assert lmgr.model.has_word(name) == any(restype.test(line) for line in lmgr.lines)
+        for prefix in ('', 'STF_L_', 'HHS', 'Labware.1', 'zzz'):
+            restype = ResourceType(Plate96, LayoutManager.line_has_prefixed_name(prefix), LayoutManager.name_from_line)
+            assert restype.prefix == prefix
+            assert lmgr._matching_names(restype) == list(dict.fromkeys(
+                restype.extract_name(line) for line in lmgr.lines if restype.test(line)))
+
+    def test_name_check_matches_line_scan(self, lmgr):
+        for name in ('TIP_50uLF_L_0001', 'TIP_50uLF_L_000', 'HHS1', 'LF_L_0001', 'Labware.1.Id', 'no_such_name', ''):
+            assert lmgr.has_name(name) == any(name in line for line in lmgr.lines), name
+
+    def test_labware_positions(self, lmgr):
+        assert lmgr.model.labware_xy('TIP_50uLF_L_0001') == (230.4, 529.8)
+        assert lmgr.model.labware_xy('TIP_50uLF_L_0002') == (230.4, 433.8)
+        assert lmgr.model.labware_xy('no_such_name') is None
+
+    def test_assignment_order(self):
+        lmgr = LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+        tips = resource_list_with_prefix(lmgr, 'TIP_50uLF_L_', Tip96, 3, reverse=True)
+        assert [tip.layout_name() for tip in tips] == ['TIP_50uLF_L_0008', 'TIP_50uLF_L_0007', 'TIP_50uLF_L_0006']
+        custom = ResourceType(Plate96, lambda line: 'HHS' in line, LayoutManager.name_from_line)
+        assert custom.prefix is None
+        expected = min(LayoutManager.name_from_line(line) for line in lmgr.lines if 'HHS' in line)
+        assert lmgr.assign_unused_resource(custom).layout_name() == expected
+
+
+class Test_PositionTables:
+    def test_tables_match_position_arithmetic(self):
+        rows_1536 = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ') + ['AA', 'AB', 'AC', 'AD', 'AE', 'AF']
+        for res_class, rows, labels in ((Plate96, 8, 'ABCDEFGH'), (Plate384, 16, 'ABCDEFGHIJKLMNOP'),
+                                        (Plate1536, 32, rows_1536), (Tip96, 8, None)):
+            res = res_class('res_0001')
+            for idx in range(res._num_items):
+                assert res.well_coords(idx) == (idx // rows, idx % rows)
+                expected = str(idx + 1) if labels is None else labels[idx % rows] + str(idx // rows + 1)
+                assert res.position_id(idx) == expected
+        assert Reservoir60mL('trough').position_id(7) == '8'
+        with pytest.raises(ValueError):
+            Plate96('plate').position_id(96)
+        assert Plate96('plate').alignment_delta(0, 3) == (0, 3, ['std_96', 'v'])
+
+    def test_items_built_on_first_use(self):
+        plate = Plate384('plate')
+        assert '_items' not in vars(plate)
+        vessels = list(plate)
+        assert len(vessels) == 384 and isinstance(vessels[5], Vessel) and vessels[5].index == 5
+        assert list(plate) == vessels
+
+    def test_compound_position_str_cached(self):
+        tips = Tip96('tips_0001')
+        expected = ';'.join('tips_0001, ' + str(i + 1) for i in range(96))
+        assert HamiltonInterface._compound_pos_str_96(tips) == expected
+        assert HamiltonInterface._compound_pos_str_96(tips) is tips.compound_position_str(range(96))
+        assert tips.compound_position_str([0, 9]) == 'tips_0001, 1;tips_0001, 10'
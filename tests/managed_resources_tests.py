@@ -0,0 +1,226 @@
+import os
+import random
+import sqlite3
+import time
+
+import pytest
+
+from pyhamilton.liquid_handling_wrappers import tracked_tip_pick_up
+from pyhamilton.oemerr import ResourceUnavailableError
+from pyhamilton.resources import (ContiguousColumnPolicy, LayoutManager, MinimumTravelPolicy, Plate96,
+    SameRackPolicy, StackedResources, Tip96, TrackedTips, get_tip_policy)
+from pyhamilton.resources import managed_resources
+
+NGS_LAYOUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'pyhamilton', 'ngs', 'tests', 'PacBio_MultiPlexLibraryPrepDeck_v1.2.lay')
+
+
+@pytest.fixture(autouse=True)
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "tip_tracker.db"
+    monkeypatch.setattr(managed_resources, "_DB_PATH", path)
+    monkeypatch.setattr(managed_resources, "_STACKED_DB", tmp_path / "stacked_resources.db")
+    yield path
+
+
+def stored_occupancy(path, tracker_id):
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT position_idx, occupied FROM tips WHERE tracker_id = ?", (tracker_id,))
+        return dict(rows.fetchall())
+
+
+class Test_TrackedTips:
+    def test_multi_tip_operations_commit_once(self, db_path):
+        racks = [Tip96('tips_0001'), Tip96('tips_0002')]
+        tips = TrackedTips(racks, 50, tracker_id='t')
+        commits = tips._db.commits
+        tips.fetch_next(3)
+        rack, occupancy_map = tips.fetch_rack_with_min_columns(12)
+        assert rack is racks[1] and sum(occupancy_map) == 96
+        tips.fill_rack_from_occupancy_map(rack, occupancy_map)
+        assert tips._db.commits - commits == 3
+        stored = stored_occupancy(db_path, 't')
+        assert [stored[i] for i in range(4)] == [0, 0, 0, 1] and all(stored[i] for i in range(96, 192))
+        tips.close()
+        restored = TrackedTips(racks, 50, tracker_id='t', reset=False)
+        assert restored.restored_from_db and restored.count_remaining() == 189
+
+    def test_commit_interval_groups_commits(self, db_path):
+        tips = TrackedTips([Tip96('tips_0001')], 50, tracker_id='t', commit_interval=3600)
+        commits = tips._db.commits
+        for _ in range(4):
+            tips.fetch_next(8)
+        assert tips._db.commits == commits and stored_occupancy(db_path, 't')[0] == 1
+        tips.flush()
+        assert tips._db.commits == commits + 1
+        assert sum(stored_occupancy(db_path, 't').values()) == 64
+
+    def test_grouped_commits_are_written_when_due(self, db_path):
+        tips = TrackedTips([Tip96('tips_0001')], 50, tracker_id='t', commit_interval=0.05)
+        tips.fetch_next(8)
+        assert sum(stored_occupancy(db_path, 't').values()) == 96
+        deadline = time.monotonic() + 5
+        while sum(stored_occupancy(db_path, 't').values()) != 88 and time.monotonic() < deadline:
+            time.sleep(0.01)  # nothing else is written: the timer has to do it
+        assert sum(stored_occupancy(db_path, 't').values()) == 88
+
+    def test_grouped_commits_do_not_lock_the_database(self, db_path):
+        held = TrackedTips([Tip96('tips_0001')], 50, tracker_id='held', commit_interval=3600)
+        held.fetch_next(8)
+        # a writer on another connection would wait out its busy timeout if `held` kept a transaction open
+        with sqlite3.connect(db_path, timeout=0) as conn:
+            conn.execute("INSERT OR REPLACE INTO tips VALUES ('other', 0, 'tips_0002', 1)")
+        other = TrackedTips([Tip96('tips_0002')], 50, tracker_id='other', commit_interval=3600)
+        other.fetch_next(8)
+        held.flush()
+        other.flush()
+        assert sum(stored_occupancy(db_path, 'held').values()) == sum(stored_occupancy(db_path, 'other').values()) == 88
+
+    def test_write_behind_journal_survives_crash(self, db_path):
+        racks = [Tip96('tips_0001'), Tip96('tips_0002')]
+        tips = TrackedTips(racks, 50, tracker_id='t', write_behind=True)
+        commits, syncs = tips._db.commits, tips._journal.syncs
+        tips.fetch_next(8)
+        tips.fetch_rack_with_min_columns(12)
+        tips.mark_occupied(3)
+        assert tips._db.commits == commits and tips._journal.syncs == syncs + 3
+        assert sum(stored_occupancy(db_path, 't').values()) == 192
+        with open(tips._journal.path, 'ab') as journal:
+            journal.write(b'[4, "tips_00')  # torn by the crash
+        # no close(): the process died, and the next run replays the journal
+        restored = TrackedTips(racks, 50, tracker_id='t', reset=False, write_behind=True)
+        assert restored.count_remaining() == 192 - 8 - 96 + 1 and restored.is_occupied(3)
+        assert sum(stored_occupancy(db_path, 't').values()) == 89
+        assert restored._journal.path.stat().st_size == 0
+        restored._journal.compact_every = 16
+        restored.fetch_next(8)
+        restored.fetch_next(8)
+        assert restored._journal.compactions == 2 and sum(stored_occupancy(db_path, 't').values()) == 73
+        restored.reset_all()
+        assert TrackedTips(racks, 50, tracker_id='t', reset=False).count_remaining() == 192
+
+    def test_bitsets_match_flat_scan(self):
+        racks = [Tip96('tips_%04d' % i) for i in range(1, 6)]
+        tips = TrackedTips(racks, 50, tracker_id='t')
+        present = [True] * 480
+        rng = random.Random(4)
+
+        def next_free(n):
+            idxs = [i for i, p in enumerate(present) if p][:n]
+            for i in idxs:
+                present[i] = False
+            return [(racks[i // 96], i % 96) for i in idxs]
+
+        for _ in range(60):
+            op = rng.random()
+            if op < 0.5:
+                n = rng.randint(1, 12)
+                if n <= sum(present):
+                    assert tips.fetch_next(n) == next_free(n)
+            elif op < 0.8:
+                idx = rng.randrange(480)
+                tips.mark_occupied(idx)
+                present[idx] = True
+            else:
+                k = rng.randint(0, 12)
+                full = [r for r in range(5) if sum(all(present[r * 96 + c * 8:r * 96 + c * 8 + 8])
+                                                   for c in range(12)) >= k]
+                if not full:
+                    with pytest.raises(Exception):
+                        tips.fetch_rack_with_min_columns(k)
+                    continue
+                rack, occupancy_map = tips.fetch_rack_with_min_columns(k)
+                assert rack is racks[full[0]] and occupancy_map == [int(p) for p in present[full[0] * 96:][:96]]
+                present[full[0] * 96:full[0] * 96 + 96] = [False] * 96
+            assert tips.count_remaining() == sum(present)
+            assert [occ for _, occ in tips.occupancy] == present
+        assert [occ for _, occ in TrackedTips(racks, 50, tracker_id='t', reset=False).occupancy] == present
+
+
+class Test_StackedResources:
+    def test_names_checked_against_layout(self):
+        lmgr = LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+        stack = StackedResources.from_prefix('s', 'TIP_50uLF_L', 4, lmgr, Tip96)
+        commits = stack._db.commits
+        with stack.batch():
+            stack.fetch_next()
+            stack.fetch_next()
+        stack.put_back()
+        assert stack._db.commits == commits + 2
+        assert StackedResources.from_prefix('s', 'TIP_50uLF_L', 4, lmgr, Tip96, reset=False).count() == 3
+        with pytest.raises(ValueError):
+            StackedResources.from_prefix('s', 'TIP_50uLF_L', 9, lmgr, Tip96)
+        with pytest.raises(ResourceUnavailableError):
+            TrackedTips.from_prefix('t', 50, 'TIP_50uLF_L', 9, lmgr)
+        assert not lmgr.resources  # nothing assigned when a name is missing
+
+    def test_trackers_share_one_connection_per_database(self, db_path, monkeypatch):
+        first = StackedResources.from_prefix('s1', 'plate', 4, None, Plate96)
+        second = StackedResources.from_prefix('s2', 'lid', 4, None, Plate96, commit_interval=3600)
+        assert first._db is second._db
+        second.fetch_next()
+        first.fetch_next()  # commits the held-back row of `second` with its own
+        assert StackedResources.from_prefix('s2', 'lid', 4, None, Plate96, reset=False).count() == 3
+        monkeypatch.setattr(managed_resources, "_STACKED_DB", db_path)
+        tips = TrackedTips([Tip96('tips_0001')], 50, tracker_id='t')
+        assert StackedResources.from_prefix('s3', 'plate', 4, None, Plate96)._db is tips._db
+
+    def test_write_behind_stack(self):
+        stack = StackedResources.from_prefix('s', 'plate', 4, None, Plate96, write_behind=True)
+        assert stack.fetch_next().layout_name() == 'plate_0004'
+        stack.fetch_next()
+        stack.put_back()
+        restored = StackedResources.from_prefix('s', 'plate', 4, None, Plate96, reset=False)
+        assert restored.count() == 4  # the database has not been written since the reset
+        restored = StackedResources.from_prefix('s', 'plate', 4, None, Plate96, reset=False, write_behind=True)
+        assert restored.get_stacked() == ['plate_0004', 'plate_0002', 'plate_0001']
+        restored.close()
+        assert StackedResources.from_prefix('s', 'plate', 4, None, Plate96, reset=False).count() == 3
+
+
+class Test_TipAllocation:
+    def test_column_policy_keeps_pickups_in_one_column(self):
+        tips = TrackedTips([Tip96('tips_0001'), Tip96('tips_0002')], 50, tracker_id='t')
+        tips.fetch_next(5)
+        policy = ContiguousColumnPolicy()
+        assert policy.fetch(tips, 5) == [(tips.tip_racks[0], i) for i in range(8, 13)]
+        assert policy.fetch(tips, 3) == [(tips.tip_racks[0], i) for i in (5, 6, 7)] # best fit, not a full column
+        assert (policy.pickups, policy.moves, policy.moves_saved) == (2, 2, 1)
+        assert tips.count_remaining() == 192 - 13
+
+    def test_same_rack_and_travel_policies(self):
+        racks = [Tip96('tips_0001'), Tip96('tips_0002')]
+        tips = TrackedTips(racks, 50, tracker_id='t')
+        tips.fetch_indices(list(range(94)))
+        assert SameRackPolicy().fetch(tips, 4) == [(racks[1], i) for i in range(4)]
+        with pytest.raises(ValueError):
+            get_tip_policy('rack').fetch(tips, 95)
+        policy = get_tip_policy(MinimumTravelPolicy(rack_positions={'tips_0001': (100.0, 0), 'tips_0002': (300.0, 0)},
+                                                    start_x=120.0))
+        assert policy.fetch(tips, 2) == [(racks[0], 94), (racks[0], 95)] # x 199, nearer than 300
+        assert policy.fetch(tips, 8) == [(racks[1], i) for i in range(8, 16)] # column 1 of rack 2 is the nearest full one
+        assert policy.arm_x == 309.0
+
+    def test_named_policy_is_kept_per_tracker_with_its_layout(self):
+        class PickUp:
+            def tip_pick_up(self, positions):
+                pass
+        lmgr = LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+        tips = TrackedTips.from_prefix('t', 50, 'TIP_50uLF_L', 2, lmgr)
+        tracked_tip_pick_up(PickUp(), tips, 8, policy='travel')
+        second = tracked_tip_pick_up(PickUp(), tips, 4, policy=MinimumTravelPolicy)
+        policy = get_tip_policy('travel', tracker=tips)
+        assert policy.lmgr is lmgr and policy.pickups == 2
+        # both racks sit at the same deck x in the layout, so the second pickup stays in line with the first
+        assert second == [(tips.tip_racks[1], i) for i in range(4)] and policy.arm_x == 230.4
+        other_lmgr = LayoutManager(NGS_LAYOUT, install=False, use_cache=False)
+        assert get_tip_policy('travel', other_lmgr, tips).pickups == 0
+
+    def test_tracked_pick_up_returns_tips_on_failure(self):
+        class FailingPickUp:
+            def tip_pick_up(self, positions):
+                raise RuntimeError('no tip')
+        tips = TrackedTips([Tip96('tips_0001')], 50, tracker_id='t')
+        with pytest.raises(RuntimeError):
+            tracked_tip_pick_up(FailingPickUp(), tips, 4, policy='column')
+        assert tips.count_remaining() == 96
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from pyhamilton.interface import HamiltonInterface
+from pyhamilton.reformatting import (QUADRANTS_96_TO_384, QUADRANTS_384_TO_1536, cherry_pick_plan,
+    compression_plan, expansion_plan, quadrant_wells, split_wells)
+from pyhamilton.resources import Plate24, Plate96, Plate384, Plate1536
+
+
+def cells_96_to_384(well, idx):
+    return well*2+idx%2+(idx//2)*16+16*(well//8)
+
+
+def cells_384_to_1536(well, idx):
+    return (well%16)*2+(well//16)*64+idx%2+(idx//2)*32
+
+
+class Test_WellMaps:
+    def test_quadrants_match_well_arithmetic(self):
+        for q in range(4):
+            assert QUADRANTS_96_TO_384[q].tolist() == [cells_96_to_384(w, q) for w in range(96)]
+            assert QUADRANTS_384_TO_1536[q].tolist() == [cells_384_to_1536(w, q) for w in range(384)]
+        assert Plate384('p').position_id(int(quadrant_wells(3)[0])) == 'B2'
+        with pytest.raises(ValueError):
+            QUADRANTS_96_TO_384[0, 0] = 1
+
+    def test_split_inverts_quadrants(self):
+        for small, big in ((96, 384), (384, 1536), (96, 1536)):
+            slots, wells = split_wells(np.arange(big), small, big)
+            assert np.array_equal(quadrant_wells(slots, small, big)[np.arange(big), wells], np.arange(big))
+        assert [int(x) for x in split_wells(17)] == [3, 0]
+        with pytest.raises(ValueError):
+            quadrant_wells(0, 384, 96)
+
+    def test_quadrant_position_string(self):
+        plate = Plate384('plate_384')
+        expected = ';'.join('plate_384, ' + plate.position_id(cells_96_to_384(w, 2)) for w in range(96))
+        assert HamiltonInterface._compound_pos_str_384_quad(plate, 2) == expected
+
+
+class Test_Plans:
+    def test_compress_and_expand_96_to_1536(self):
+        plates_96 = [Plate96('p96_%02d' % i) for i in range(16)]
+        plates_384 = [Plate384('p384_%d' % i) for i in range(4)]
+        plate_1536 = Plate1536('p1536')
+        # two 4x compressions and one 16x compression put every source well in the same place
+        by_steps, direct = {}, {}
+        for first in compression_plan(plates_96, plates_384):
+            for w96, w384 in zip(first.source_wells, first.target_wells):
+                by_steps[first.source.layout_name(), int(w96)] = (first.target, int(w384))
+        for second in compression_plan(plates_384, [plate_1536]):
+            assert len(set((second.target_wells % 32) % 4)) == 1 # a 96-head stamp: every 4th row
+            for w384, w1536 in zip(second.source_wells, second.target_wells):
+                direct[second.source.layout_name(), int(w384)] = int(w1536)
+        composed = {key: direct[plate.layout_name(), w] for key, (plate, w) in by_steps.items()}
+        stamps = compression_plan(plates_96, [plate_1536])
+        assert len(stamps) == 16 and len(by_steps) == 16 * 96
+        assert composed == {(s.source.layout_name(), int(a)): int(b)
+                            for s in stamps for a, b in zip(s.source_wells, s.target_wells)}
+        back = expansion_plan([plate_1536], plates_96)
+        assert [(s.target, s.source_wells.tolist()) for s in back] == [(s.source, s.target_wells.tolist())
+                                                                      for s in stamps]
+        assert back[0].target_positions() == HamiltonInterface._compound_pos_str_96(plates_96[0])
+        with pytest.raises(ValueError):
+            compression_plan(plates_96, plates_384[:3])
+
+    def test_cherry_pick_groups_source_columns(self):
+        src, dst = Plate96('src'), Plate384('dst')
+        wells = [10, 3, 0, 9, 1, 2, 4, 5, 6, 7, 8]
+        plan = cherry_pick_plan([(src, w) for w in wells], [(dst, 100 + w) for w in wells], [float(w) for w in wells])
+        assert [[pos and pos[1] for pos in step.sources] for step in plan] == [
+            [0, 1, 2, 3, 4, 5, 6, 7], [8, 9, 10, None, None, None, None, None]]
+        assert plan[1].targets[:3] == [(dst, 108), (dst, 109), (dst, 110)] and plan[1].volumes[2] == 10.0
+        assert len(cherry_pick_plan([(src, w) for w in wells], [(dst, w) for w in wells], channels=4)) == 3
+        assert cherry_pick_plan([], []) == []
+
+    def test_cherry_pick_uses_the_source_plate_grid(self):
+        src, dst = Plate24('src'), Plate96('dst')
+        plan = cherry_pick_plan([(src, w) for w in range(8)], [(dst, w) for w in range(8)])
+        # Plate24 columns hold 4 wells, not 24
+        assert [[pos and pos[1] for pos in step.sources] for step in plan] == [
+            [0, 1, 2, 3, None, None, None, None], [4, 5, 6, 7, None, None, None, None]]
+
+    def test_cherry_pick_repeated_well_goes_in_a_new_step(self):
+        src, dst = Plate96('src'), Plate96('dst')
+        wells = [0, 1, 0, 2]
+        plan = cherry_pick_plan([(src, w) for w in wells], [(dst, 10 + i) for i in range(4)])
+        assert [[pos and pos[1] for pos in step.sources] for step in plan] == [
+            [0, 1, 2, None, None, None, None, None], [0] + [None] * 7]
+        assert plan[1].targets[0] == (dst, 12)
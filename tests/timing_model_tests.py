@@ -0,0 +1,53 @@
+import pytest
+
+from pyhamilton.interface import (HamiltonInterface, ASPIRATE, DISPENSE, HHS_START_SHAKER_TIMED, HHS_WAIT_FOR_SHAKER,
+    CENT_START, CENT_STOP, HIG_SPIN, HIG_SPINNING, ODTC_EXCT, ODTC_STATUS)
+from pyhamilton.timing_model import InstrumentTimingModel
+
+POSITIONS = 'Cos_96_DW_1mL_0001, A1;Cos_96_DW_1mL_0001, B1'
+
+
+class Test_InstrumentTimingModel:
+    def test_aspirate_time_follows_largest_volume(self):
+        model = InstrumentTimingModel()
+        small = model.record(ASPIRATE.assemble_cmd(labwarePositions=POSITIONS, volumes=[10.0, 20.0], liquidClass='x'))
+        large = model.record(ASPIRATE.assemble_cmd(labwarePositions=POSITIONS, volumes='10.0;220.0', liquidClass='x'))
+        flow, settle = InstrumentTimingModel.DEFAULT_FLOW_RATE, InstrumentTimingModel.DEFAULT_SETTLING_TIME
+        assert small.duration == pytest.approx(InstrumentTimingModel.CHANNEL_MOVE + 20.0 / flow + settle)
+        assert large.duration - small.duration == pytest.approx(200.0 / flow)
+        assert large.start == small.end and model.total_time() == large.end
+
+    def test_device_waits_and_overrides(self):
+        model = InstrumentTimingModel(durations={'channelDispense': 1.5})
+        model.record(HHS_START_SHAKER_TIMED.assemble_cmd(deviceNumber=1, shakingSpeed=800, shakingTime=60))
+        model.record(DISPENSE.assemble_cmd(labwarePositions=POSITIONS, volumes=[10.0, 10.0], liquidClass='x'))
+        wait = model.record(HHS_WAIT_FOR_SHAKER.assemble_cmd(deviceNumber=1))
+        # the dispense ran while the shaker was busy; the wait covers only the rest
+        assert wait.end == pytest.approx(InstrumentTimingModel.OTHER + 60 + InstrumentTimingModel.OTHER)
+        assert model.summary()['channelDispense'] == {'count': 1, 'seconds': 1.5}
+        assert [entry.resource for entry in model.timeline] == ['devices', 'HHS_shaker:1', 'channels', 'HHS_shaker:1']
+
+    def test_odtc_and_centrifuge_runs_are_joined(self):
+        other = InstrumentTimingModel.OTHER
+        model = InstrumentTimingModel(odtc_methods={'pcr': 2700})
+        model.record(ODTC_EXCT.assemble_cmd(DeviceID='odtc1', LockID='', MethodName='pcr', Priority=0))
+        model.record(ODTC_EXCT.assemble_cmd(DeviceID='odtc2', LockID='', MethodName='other', Priority=0))
+        # polling the status waits out the method; the second poll finds the device idle
+        assert model.record(ODTC_STATUS.assemble_cmd(DeviceID='odtc1')).end == pytest.approx(other + 2700 + other)
+        assert model.record(ODTC_STATUS.assemble_cmd(DeviceID='odtc1')).duration == pytest.approx(other)
+        assert model.record(ODTC_STATUS.assemble_cmd(DeviceID='odtc2')).end == pytest.approx(
+            2 * other + InstrumentTimingModel.ODTC_METHOD + other)
+
+        model = InstrumentTimingModel(durations={'HiG_Spin': 300})
+        model.record(CENT_START.assemble_cmd(Label='cent', Direction=0, Speed=1000, Deceleration=1, MaxRunTime=120))
+        model.record(HIG_SPIN.assemble_cmd(RotationalGs=1000, AccelPercent=50, DecelPercent=50, TimeSeconds=60))
+        assert model.record(CENT_STOP.assemble_cmd(Label='cent', Deceleration=1)).end == pytest.approx(other + 120 + other)
+        assert model.record(HIG_SPINNING.assemble_cmd()).end == pytest.approx(2 * other + 300 + other)
+        assert [entry.resource for entry in model.timeline][-2:] == ['Centrifuge:cent', 'HiG']
+
+    def test_simulating_interface_records_commands(self):
+        with HamiltonInterface(simulating=True, port=3291) as ham_int:
+            ham_int.wait_on_response(ham_int.send_command(
+                ASPIRATE, labwarePositions=POSITIONS, volumes=[10.0, 10.0], liquidClass='x'))
+            assert [entry.command for entry in ham_int.timing_model.timeline] == ['channelAspirate']
+            assert ham_int.timing_model.total_time() > InstrumentTimingModel.CHANNEL_MOVE